@@ -366,6 +366,7 @@ class GroupDetailsEndpoint(GroupEndpoint, EnvironmentMixin):
             transaction_id = uuid4().hex
 
             GroupHash.objects.filter(project_id=group.project_id, group__id=group.id).delete()
+            GroupHash.objects.invalidate_cache(group.project_id)
 
             delete_groups.apply_async(
                 kwargs={
@@ -27,16 +27,21 @@ class ProjectKeyStatsEndpoint(ProjectEndpoint, StatsMixin):
         except ValueError:
             return Response({"detail": "Invalid request data"}, status=400)
 
-        stats = OrderedDict()
-        for model, name in (
+        models = (
             (tsdb.models.key_total_received, "total"),
             (tsdb.models.key_total_blacklisted, "filtered"),
             (tsdb.models.key_total_rejected, "dropped"),
-        ):
-            # XXX (alex, 08/05/19) key stats were being stored under either key_id or str(key_id)
-            # so merge both of those back into one stats result.
-            result = tsdb.get_range(model=model, keys=[key.id, six.text_type(key.id)], **stat_args)
-            for key_id, points in six.iteritems(result):
+        )
+
+        # XXX (alex, 08/05/19) key stats were being stored under either key_id or str(key_id)
+        # so merge both of those back into one stats result.
+        results = tsdb.get_range_multi(
+            [(model, [key.id, six.text_type(key.id)]) for model, name in models], **stat_args
+        )
+
+        stats = OrderedDict()
+        for model, name in models:
+            for key_id, points in six.iteritems(results[model]):
                 for ts, count in points:
                     bucket = stats.setdefault(int(ts), {})
                     bucket.setdefault(name, 0)
@@ -20,6 +20,7 @@ from sentry.search.utils import (
     parse_datetime_value,
     InvalidQuery,
 )
+from sentry.utils.cache import LocalCache
 from sentry.utils.dates import to_timestamp
 from sentry.utils.snuba import Dataset, DATASETS, get_snuba_column_name
 
@@ -242,6 +243,10 @@ class SearchVisitor(NodeVisitor):
 
     unwrapped_exceptions = (InvalidSearchQuery,)
 
+    # Set when the result depends on the time the query was parsed at (i.e.
+    # it contains relative time filters), and so can't be reused later.
+    is_time_dependent = False
+
     @cached_property
     def key_mappings_lookup(self):
         lookup = {}
@@ -377,6 +382,8 @@ class SearchVisitor(NodeVisitor):
             except InvalidQuery as exc:
                 raise InvalidSearchQuery(six.text_type(exc))
 
+            self.is_time_dependent = True
+
             # TODO: Handle negations
             if from_val is not None:
                 operator = ">="
@@ -492,7 +499,24 @@ class SearchVisitor(NodeVisitor):
         return children or node
 
 
-def parse_search_query(query):
+# Parsed queries, keyed by the visitor class and the query string. Parsing
+# only depends on the query itself (project and environment specific values
+# are converted afterwards), so results can be shared between requests.
+parsed_query_cache = LocalCache(max_size=1000)
+
+
+def parse_query_with_visitor(query, visitor_cls):
+    """
+    Parse a search query with the provided visitor class. Results are cached
+    (unless they depend on the current time) and shared between callers, so
+    a new list is returned each time, and the terms it contains should not
+    be modified.
+    """
+    key = (visitor_cls, query)
+    terms = parsed_query_cache.get(key)
+    if terms is not None:
+        return list(terms)
+
     try:
         tree = event_search_grammar.parse(query)
     except IncompleteParseError as e:
@@ -503,7 +527,16 @@ def parse_search_query(query):
                 "This is commonly caused by unmatched-parentheses. Enclose any text in double quotes.",
             )
         )
-    return SearchVisitor().visit(tree)
+
+    visitor = visitor_cls()
+    terms = visitor.visit(tree)
+    if not visitor.is_time_dependent:
+        parsed_query_cache.set(key, tuple(terms))
+    return list(terms)
+
+
+def parse_search_query(query):
+    return parse_query_with_visitor(query, SearchVisitor)
 
 
 def convert_search_boolean_to_snuba_query(search_boolean):
@@ -307,6 +307,9 @@ def handle_discard(request, group_list, projects, user):
                     group=None, group_tombstone_id=tombstone.id
                 )
 
+    for project_id in groups_to_delete:
+        GroupHash.objects.invalidate_cache(project_id)
+
     for project in projects:
         _delete_groups(request, project, groups_to_delete.get(project.id), delete_type="discard")
 
@@ -330,6 +333,7 @@ def _delete_groups(request, project, group_list, delete_type):
     transaction_id = uuid4().hex
 
     GroupHash.objects.filter(project_id=project.id, group__id__in=group_ids).delete()
+    GroupHash.objects.invalidate_cache(project.id)
 
     delete_groups_task.apply_async(
         kwargs={
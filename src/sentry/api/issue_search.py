@@ -1,11 +1,10 @@
 from __future__ import absolute_import
 
 from django.utils.functional import cached_property
-from parsimonious.exceptions import IncompleteParseError
 
 from sentry.api.event_search import (
-    event_search_grammar,
     InvalidSearchQuery,
+    parse_query_with_visitor,
     SearchFilter,
     SearchKey,
     SearchValue,
@@ -72,17 +71,7 @@ class IssueSearchVisitor(SearchVisitor):
 
 
 def parse_search_query(query):
-    try:
-        tree = event_search_grammar.parse(query)
-    except IncompleteParseError as e:
-        raise InvalidSearchQuery(
-            "%s %s"
-            % (
-                u"Parse error: %r (column %d)." % (e.expr.name, e.column()),
-                "This is commonly caused by unmatched-parentheses. Enclose any text in double quotes.",
-            )
-        )
-    return IssueSearchVisitor().visit(tree)
+    return parse_query_with_visitor(query, IssueSearchVisitor)
 
 
 def convert_actor_value(value, projects, user, environments):
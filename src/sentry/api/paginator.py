@@ -4,12 +4,17 @@ import bisect
 import functools
 import math
 
-from datetime import datetime
-from django.db import connections
+import six
+from datetime import datetime, timedelta
+from django.db import connections, models
+from django.db.models import Q
 from django.db.models.sql.datastructures import EmptyResultSet
 from django.utils import timezone
 
+from sentry.utils import json
+from sentry.utils.cache import cache
 from sentry.utils.cursors import build_cursor, Cursor, CursorResult
+from sentry.utils.hashlib import md5_text
 
 quote_name = connections["default"].ops.quote_name
 
@@ -17,13 +22,21 @@ quote_name = connections["default"].ops.quote_name
 MAX_LIMIT = 100
 MAX_HITS_LIMIT = 1000
 
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
 
 class BadPaginationError(Exception):
     pass
 
 
 class BasePaginator(object):
-    def __init__(self, queryset, order_by=None, max_limit=MAX_LIMIT, on_results=None):
+    # The number of seconds that a count of hits can be reused for by
+    # paginators that estimate hits.
+    hits_cache_ttl = 60
+
+    def __init__(
+        self, queryset, order_by=None, max_limit=MAX_LIMIT, on_results=None, estimate_hits=False
+    ):
         if order_by:
             if order_by.startswith("-"):
                 self.key, self.desc = order_by[1:], True
@@ -35,6 +48,7 @@ class BasePaginator(object):
         self.queryset = queryset
         self.max_limit = max_limit
         self.on_results = on_results
+        self.estimate_hits = estimate_hits
 
     def _is_asc(self, is_prev):
         return (self.desc and is_prev) or not (self.desc or is_prev)
@@ -113,12 +127,7 @@ class BasePaginator(object):
 
         # TODO(dcramer): this does not yet work correctly for ``is_prev`` when
         # the key is not unique
-        if count_hits:
-            hits = self.count_hits(MAX_HITS_LIMIT)
-        elif known_hits is not None:
-            hits = known_hits
-        else:
-            hits = None
+        hits, hits_estimated = self.get_hits(count_hits, known_hits)
 
         offset = cursor.offset
         # The extra amount is needed so we can decide in the ResultCursor if there is
@@ -159,24 +168,77 @@ class BasePaginator(object):
             is_desc=self.desc,
             key=self.get_item_key,
             on_results=self.on_results,
+            hits_estimated=hits_estimated,
         )
 
-    def count_hits(self, max_hits):
-        if not max_hits:
-            return 0
+    def get_hits(self, count_hits, known_hits=None):
+        """
+        Returns a tuple of the number of hits for the query (or ``None``, if
+        they're not being counted) and whether that number is an estimate.
+        """
+        if count_hits:
+            if self.estimate_hits:
+                return self.get_estimated_hits(MAX_HITS_LIMIT)
+            return self.count_hits(MAX_HITS_LIMIT), False
+        return known_hits, False
+
+    def _get_hits_sql(self, max_hits):
         hits_query = self.queryset.values()[:max_hits].query
         # clear out any select fields (include select_related) and pull just the id
         hits_query.clear_select_clause()
         hits_query.add_fields(["id"])
         hits_query.clear_ordering(force_empty=True)
+        return hits_query.sql_with_params()
+
+    def count_hits(self, max_hits):
+        if not max_hits:
+            return 0
         try:
-            h_sql, h_params = hits_query.sql_with_params()
+            h_sql, h_params = self._get_hits_sql(max_hits)
         except EmptyResultSet:
             return 0
         cursor = connections[self.queryset.db].cursor()
         cursor.execute(u"SELECT COUNT(*) FROM ({}) as t".format(h_sql), h_params)
         return cursor.fetchone()[0]
 
+    def get_estimated_hits(self, max_hits):
+        """
+        Returns a tuple of the number of hits (up to ``max_hits``) and whether
+        that number is an estimate, avoiding counting the rows that match the
+        query where possible.
+
+        A count made for the same query in the last ``hits_cache_ttl``
+        seconds is reused. Otherwise, if the query planner expects at least
+        ``max_hits`` rows to match, ``max_hits`` is returned without
+        counting. Only queries that are expected to match fewer rows are
+        counted exactly.
+        """
+        if not max_hits:
+            return 0, False
+        try:
+            h_sql, h_params = self._get_hits_sql(max_hits)
+        except EmptyResultSet:
+            return 0, False
+
+        cache_key = u"paginator:hits:{}".format(md5_text(h_sql, repr(h_params)).hexdigest())
+        hits = cache.get(cache_key)
+        if hits is not None:
+            return hits, True
+
+        connection = connections[self.queryset.db]
+        if connection.vendor == "postgresql":
+            cursor = connection.cursor()
+            cursor.execute(u"EXPLAIN (FORMAT JSON) {}".format(h_sql), h_params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, six.string_types):
+                plan = json.loads(plan)
+            if plan[0]["Plan"]["Plan Rows"] >= max_hits:
+                return max_hits, True
+
+        hits = self.count_hits(max_hits)
+        cache.set(cache_key, hits, self.hits_cache_ttl)
+        return hits, False
+
 
 class Paginator(BasePaginator):
     def get_item_key(self, item, for_prev=False):
@@ -201,6 +263,88 @@ class DateTimePaginator(BasePaginator):
         )
 
 
+class KeysetPaginator(BasePaginator):
+    """
+    Paginates by the value of the key and the ID of each row, which breaks
+    ties between rows with the same value. Pages are selected by comparing
+    both against the row on the edge of the previous page (rather than with
+    an OFFSET), so fetching a page costs the same no matter how far into the
+    results it is.
+
+    Cursors contain the value of the key and the ID of that row. A cursor
+    without an ID refers to the start (or, for a previous page cursor, the
+    end) of the results. Keys must be integers or datetimes, which are
+    stored with microsecond precision.
+    """
+
+    def get_item_key(self, item, for_prev=False):
+        value = getattr(item, self.key)
+        if isinstance(value, datetime):
+            if value.tzinfo is None:
+                value = value.replace(tzinfo=timezone.utc)
+            delta = value - EPOCH
+            return (delta.days * 24 * 60 * 60 + delta.seconds) * 10 ** 6 + delta.microseconds
+        return int(value)
+
+    def value_from_cursor(self, cursor):
+        if isinstance(self.queryset.model._meta.get_field(self.key), models.DateTimeField):
+            return EPOCH + timedelta(microseconds=cursor.value)
+        return cursor.value
+
+    def get_result(self, limit=100, cursor=None, count_hits=False, known_hits=None):
+        if cursor is None:
+            cursor = Cursor(0, 0, 0)
+
+        limit = min(limit, self.max_limit)
+
+        asc = self._is_asc(cursor.is_prev)
+        queryset = self.queryset.order_by(
+            self.key if asc else "-%s" % self.key, "id" if asc else "-id"
+        )
+        if cursor.offset:
+            value = self.value_from_cursor(cursor)
+            operator = "gt" if asc else "lt"
+            queryset = queryset.filter(
+                Q(**{"%s__%s" % (self.key, operator): value})
+                | Q(**{self.key: value, "id__%s" % operator: cursor.offset})
+            )
+
+        hits, hits_estimated = self.get_hits(count_hits, known_hits)
+
+        # The extra row tells us whether there's another page.
+        results = list(queryset[: limit + 1])
+        has_more = len(results) > limit
+        results = results[:limit]
+
+        if cursor.is_prev:
+            results.reverse()
+            has_prev, has_next = has_more, bool(cursor.offset)
+        else:
+            has_prev, has_next = bool(cursor.offset), has_more
+
+        if results:
+            first, last = results[0], results[-1]
+            prev_cursor = Cursor(self.get_item_key(first), first.id, True, has_prev)
+            next_cursor = Cursor(self.get_item_key(last), last.id, False, has_next)
+        else:
+            # Paging past either end of the results leads back to the first
+            # (or last) page.
+            prev_cursor = Cursor(0, 0, True, has_prev)
+            next_cursor = Cursor(0, 0, False, has_next)
+
+        if self.on_results:
+            results = self.on_results(results)
+
+        return CursorResult(
+            results=results,
+            next=next_cursor,
+            prev=prev_cursor,
+            hits=hits,
+            max_hits=MAX_HITS_LIMIT if count_hits else None,
+            hits_estimated=hits_estimated,
+        )
+
+
 # TODO(dcramer): previous cursors are too complex at the moment for many things
 # and are only useful for polling situations. The OffsetPaginator ignores them
 # entirely and uses standard paging
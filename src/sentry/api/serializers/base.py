@@ -2,10 +2,19 @@ from __future__ import absolute_import
 
 from django.contrib.auth.models import AnonymousUser
 
+from sentry.api.serializers.loaders import loader_context
+
 registry = {}
 
 
 def serialize(objects, user=None, serializer=None, **kwargs):
+    # Values loaded by serializers (including those of nested objects) are
+    # shared for the duration of the outermost call.
+    with loader_context():
+        return _serialize(objects, user=user, serializer=serializer, **kwargs)
+
+
+def _serialize(objects, user=None, serializer=None, **kwargs):
     if user is None:
         user = AnonymousUser()
 
@@ -0,0 +1,150 @@
+from __future__ import absolute_import
+
+import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger("sentry.api.serializers")
+
+_local = threading.local()
+
+
+class Loader(object):
+    """
+    Loads values for many keys at once.
+
+    Loads are memoized by the current loader context (which lasts for the
+    outermost call to ``serialize``), so each key is loaded at most once no
+    matter how many serializers, or levels of nesting, ask for it. Loaders
+    are identified by their type and the arguments they were created with.
+    """
+
+    def __init__(self, *args):
+        self.args = args
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.args == other.args
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((type(self), self.args))
+
+    def __repr__(self):
+        return u"<{}: {!r}>".format(type(self).__name__, self.args)
+
+    def load(self, keys):
+        """
+        Returns a dictionary of values for the provided keys. Keys that don't
+        have a value can be omitted.
+        """
+        raise NotImplementedError
+
+
+class LoaderContext(object):
+    def __init__(self):
+        self.values = defaultdict(dict)
+        self.calls = defaultdict(int)
+        self.keys = defaultdict(int)
+
+    def load_many(self, loader, keys):
+        keys = list(keys)
+        values = self.values[loader]
+
+        missing = list(set(key for key in keys if key not in values))
+        if missing:
+            results = loader.load(missing)
+
+            name = type(loader).__name__
+            self.calls[name] += 1
+            self.keys[name] += len(missing)
+
+            for key in missing:
+                values[key] = results.get(key)
+
+        return {key: values[key] for key in keys if values[key] is not None}
+
+
+@contextmanager
+def loader_context():
+    """
+    Returns the current loader context, or creates one that lasts until the
+    block exits. When ``DEBUG`` is enabled, the number of times each loader
+    was called is logged when a context exits.
+    """
+    context = getattr(_local, "context", None)
+    if context is not None:
+        yield context
+        return
+
+    context = _local.context = LoaderContext()
+    try:
+        yield context
+    finally:
+        _local.context = None
+        if settings.DEBUG and context.calls:
+            logger.info(
+                "serializers.loaders",
+                extra={"calls": dict(context.calls), "keys": dict(context.keys)},
+            )
+
+
+def load_many(loader, keys):
+    """
+    Returns a dictionary of values for the provided keys from the loader.
+    """
+    with loader_context() as context:
+        return context.load_many(loader, keys)
+
+
+class UserLoader(Loader):
+    def load(self, keys):
+        from sentry.models import User
+
+        return {user.id: user for user in User.objects.filter(id__in=keys)}
+
+
+class OrganizationIntegrationsLoader(Loader):
+    def load(self, keys):
+        from sentry.models import OrganizationIntegration
+
+        integrations = defaultdict(list)
+        for organization_integration in OrganizationIntegration.objects.filter(
+            organization_id__in=keys
+        ).select_related("integration"):
+            integrations[organization_integration.organization_id].append(
+                organization_integration.integration
+            )
+        return integrations
+
+
+class TSDBRangeLoader(Loader):
+    """
+    Loads the series for keys from a TSDB backend, e.g.
+    ``TSDBRangeLoader(tsdb, tsdb.models.group, start, end, rollup, environment_ids)``.
+    """
+
+    def __init__(self, backend, model, start, end, rollup, environment_ids=None):
+        super(TSDBRangeLoader, self).__init__(
+            backend,
+            model,
+            start,
+            end,
+            rollup,
+            tuple(environment_ids) if environment_ids is not None else None,
+        )
+
+    def load(self, keys):
+        backend, model, start, end, rollup, environment_ids = self.args
+        return backend.get_range(
+            model=model,
+            keys=keys,
+            start=start,
+            end=end,
+            rollup=rollup,
+            environment_ids=list(environment_ids) if environment_ids is not None else None,
+        )
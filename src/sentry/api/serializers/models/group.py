@@ -1,17 +1,25 @@
 from __future__ import absolute_import, print_function
 
 import itertools
+import logging
 from collections import defaultdict
 from datetime import timedelta
 
 import six
+from concurrent.futures import CancelledError, TimeoutError
 from django.conf import settings
 from django.db.models import Min, Q
 from django.utils import timezone
 
-from sentry import tagstore, tsdb
+from sentry import options, tagstore, tsdb
 from sentry.app import env
 from sentry.api.serializers import Serializer, register, serialize
+from sentry.api.serializers.loaders import (
+    OrganizationIntegrationsLoader,
+    TSDBRangeLoader,
+    UserLoader,
+    load_many,
+)
 from sentry.api.serializers.models.actor import ActorSerializer
 from sentry.api.fields.actor import Actor
 from sentry.auth.superuser import is_active_superuser
@@ -32,15 +40,16 @@ from sentry.models import (
     GroupStatus,
     GroupSubscription,
     GroupSubscriptionReason,
-    Integration,
-    User,
     UserOption,
     UserOptionValue,
 )
 from sentry.tsdb.snuba import SnubaTSDB
+from sentry.utils import metrics, snuba
 from sentry.utils.db import attach_foreignkey
 from sentry.utils.safe import safe_execute
 
+logger = logging.getLogger("sentry.api.serializers")
+
 SUBSCRIPTION_REASON_MAP = {
     GroupSubscriptionReason.comment: "commented",
     GroupSubscriptionReason.assigned: "assigned",
@@ -210,7 +219,7 @@ class GroupSerializerBase(Serializer):
         actor_ids = set(r[-1] for r in six.itervalues(release_resolutions))
         actor_ids.update(r.actor_id for r in six.itervalues(ignore_items))
         if actor_ids:
-            users = list(User.objects.filter(id__in=actor_ids, is_active=True))
+            users = [u for u in load_many(UserLoader(), actor_ids).values() if u.is_active]
             actors = {u.id: d for u, d in itertools.izip(users, serialize(users, user))}
         else:
             actors = {}
@@ -219,6 +228,11 @@ class GroupSerializerBase(Serializer):
             GroupShare.objects.filter(group__in=item_list).values_list("group_id", "uuid")
         )
 
+        integrations = load_many(
+            OrganizationIntegrationsLoader(),
+            set(item.project.organization_id for item in item_list),
+        )
+
         result = {}
 
         seen_stats = self._get_seen_stats(item_list, user)
@@ -236,9 +250,7 @@ class GroupSerializerBase(Serializer):
 
             from sentry.integrations import IntegrationFeatures
 
-            for integration in Integration.objects.filter(
-                organizations=item.project.organization_id
-            ):
+            for integration in integrations.get(item.project.organization_id, ()):
                 if not (
                     integration.has_feature(IntegrationFeatures.ISSUE_BASIC)
                     or integration.has_feature(IntegrationFeatures.ISSUE_SYNC)
@@ -300,6 +312,15 @@ class GroupSerializerBase(Serializer):
             snooze = attrs["ignore_until"]
             if snooze.is_valid(group=obj):
                 # counts return the delta remaining when window is not set
+                if not snooze.user_count or snooze.user_window:
+                    ignore_user_count = snooze.user_count
+                elif attrs["user_count"] is not None:
+                    ignore_user_count = snooze.user_count - (
+                        attrs["user_count"] - snooze.state["users_seen"]
+                    )
+                else:
+                    # The user count couldn't be retrieved.
+                    ignore_user_count = None
                 status_details.update(
                     {
                         "ignoreCount": (
@@ -308,11 +329,7 @@ class GroupSerializerBase(Serializer):
                             else snooze.count
                         ),
                         "ignoreUntil": snooze.until,
-                        "ignoreUserCount": (
-                            snooze.user_count - (attrs["user_count"] - snooze.state["users_seen"])
-                            if snooze.user_count and not snooze.user_window
-                            else snooze.user_count
-                        ),
+                        "ignoreUserCount": ignore_user_count,
                         "ignoreUserWindow": snooze.user_window,
                         "ignoreWindow": snooze.window,
                         "actor": attrs["ignore_actor"],
@@ -371,7 +388,9 @@ class GroupSerializerBase(Serializer):
             "id": six.text_type(obj.id),
             "shareId": share_id,
             "shortId": obj.qualified_short_id,
-            "count": six.text_type(attrs["times_seen"]),
+            "count": (
+                six.text_type(attrs["times_seen"]) if attrs["times_seen"] is not None else None
+            ),
             "userCount": attrs["user_count"],
             "title": obj.title,
             "culprit": obj.culprit,
@@ -459,20 +478,20 @@ class GroupStatsMixin(object):
     def query_tsdb(self, group_ids, query_params):
         raise NotImplementedError
 
+    def get_stats_query_params(self):
+        segments, interval = self.STATS_PERIOD_CHOICES[self.stats_period]
+        now = timezone.now()
+        return {
+            "start": now - ((segments - 1) * interval),
+            "end": now,
+            "rollup": int(interval.total_seconds()),
+        }
+
     def get_stats(self, item_list, user):
         if self.stats_period:
             # we need to compute stats at 1d (1h resolution), and 14d
             group_ids = [g.id for g in item_list]
-
-            segments, interval = self.STATS_PERIOD_CHOICES[self.stats_period]
-            now = timezone.now()
-            query_params = {
-                "start": now - ((segments - 1) * interval),
-                "end": now,
-                "rollup": int(interval.total_seconds()),
-            }
-
-            return self.query_tsdb(group_ids, query_params)
+            return self.query_tsdb(group_ids, self.get_stats_query_params())
 
 
 class StreamGroupSerializer(GroupSerializer, GroupStatsMixin):
@@ -498,11 +517,14 @@ class StreamGroupSerializer(GroupSerializer, GroupStatsMixin):
         except Environment.DoesNotExist:
             stats = {key: tsdb.make_series(0, **query_params) for key in group_ids}
         else:
-            stats = tsdb.get_range(
-                model=tsdb.models.group,
-                keys=group_ids,
-                environment_ids=environment and [environment.id],
-                **query_params
+            stats = load_many(
+                TSDBRangeLoader(
+                    tsdb,
+                    tsdb.models.group,
+                    environment_ids=environment and [environment.id],
+                    **query_params
+                ),
+                group_ids,
             )
 
         return stats
@@ -557,30 +579,65 @@ class GroupSerializerSnuba(GroupSerializerBase):
         self.start = start
         self.end = end
 
-    def _get_seen_stats(self, item_list, user):
+    def _prepare_stats_queries(self, item_list):
+        """
+        Returns a dictionary of prepared queries (see
+        ``sentry.utils.snuba.prepare_query``) for the stats of the groups.
+        """
         project_ids = list(set([item.project_id for item in item_list]))
         group_ids = [item.id for item in item_list]
-        user_counts = tagstore.get_groups_user_counts(
-            project_ids,
-            group_ids,
-            environment_ids=self.environment_ids,
-            start=self.start,
-            end=self.end,
+        queries = {
+            "user_counts": tagstore.prepare_groups_user_counts(
+                project_ids,
+                group_ids,
+                environment_ids=self.environment_ids,
+                start=self.start,
+                end=self.end,
+            )
+        }
+        if self.environment_ids:
+            queries["seen_values"] = tagstore.prepare_group_seen_values_for_environments(
+                project_ids, group_ids, self.environment_ids, start=self.start, end=self.end
+            )
+        return queries
+
+    def _run_stats_queries(self, queries):
+        """
+        Runs the prepared queries concurrently, and returns a dictionary of
+        their results.
+        """
+        names = sorted(queries)
+        futures = snuba.run_concurrently([queries[name] for name in names])
+        return {name: future.result() for name, future in zip(names, futures)}
+
+    def _get_seen_stats(self, item_list, user):
+        return self._get_seen_stats_attrs(
+            item_list, self._run_stats_queries(self._prepare_stats_queries(item_list))
         )
 
+    def _get_seen_stats_attrs(self, item_list, results):
+        """
+        Returns the seen stats for each group from the results of the stats
+        queries. Stats for queries that are missing from the results are
+        ``None``, rather than being replaced with zeroes (or the issue
+        fields, which cover all environments.)
+        """
+        user_counts = results.get("user_counts")
+
         first_seen = {}
         last_seen = {}
         times_seen = {}
+        default_times_seen = 0
         if not self.environment_ids:
             # use issue fields
             for item in item_list:
                 first_seen[item.id] = item.first_seen
                 last_seen[item.id] = item.last_seen
                 times_seen[item.id] = item.times_seen
+        elif "seen_values" not in results:
+            default_times_seen = None
         else:
-            seen_data = tagstore.get_group_seen_values_for_environments(
-                project_ids, group_ids, self.environment_ids, start=self.start, end=self.end
-            )
+            seen_data = results["seen_values"]
 
             first_seen_data = {
                 ge["group_id"]: ge["first_seen__min"]
@@ -600,10 +657,10 @@ class GroupSerializerSnuba(GroupSerializerBase):
         attrs = {}
         for item in item_list:
             attrs[item] = {
-                "times_seen": times_seen.get(item.id, 0),
+                "times_seen": times_seen.get(item.id, default_times_seen),
                 "first_seen": first_seen.get(item.id),
                 "last_seen": last_seen.get(item.id),
-                "user_count": user_counts.get(item.id, 0),
+                "user_count": user_counts.get(item.id, 0) if user_counts is not None else None,
             }
 
         return attrs
@@ -620,25 +677,77 @@ class StreamGroupSerializerSnuba(GroupSerializerSnuba, GroupStatsMixin):
         self.matching_event_id = matching_event_id
 
     def query_tsdb(self, group_ids, query_params):
-        return snuba_tsdb.get_range(
+        return self.prepare_tsdb_query(group_ids, query_params)()
+
+    def prepare_tsdb_query(self, group_ids, query_params):
+        return snuba_tsdb.prepare_range(
             model=snuba_tsdb.models.group,
             keys=group_ids,
             environment_ids=self.environment_ids,
             **query_params
         )
 
-    def get_attrs(self, item_list, user):
-        attrs = super(StreamGroupSerializerSnuba, self).get_attrs(item_list, user)
+    def _run_stats_queries(self, queries):
+        """
+        Runs the prepared queries concurrently, with a shared deadline, and
+        returns a dictionary of the results of the queries that succeeded.
+        Queries that fail (or don't finish in time) are logged and omitted,
+        so that the stream can still be displayed without those stats.
+        """
+        names = sorted(queries)
+        futures = snuba.run_concurrently(
+            [queries[name] for name in names], timeout=options.get("snuba.serializer.stats-timeout")
+        )
+
+        results = {}
+        for name, future in zip(names, futures):
+            try:
+                results[name] = future.result(timeout=0)
+            except (CancelledError, TimeoutError):
+                status = "timeout"
+                logger.warning("serializers.group.stats-timeout", extra={"query": name})
+            except Exception:
+                status = "error"
+                logger.warning(
+                    "serializers.group.stats-error", extra={"query": name}, exc_info=True
+                )
+            else:
+                status = "success"
+            metrics.incr(
+                "serializers.group.stats",
+                tags={"query": name, "status": status},
+                skip_internal=False,
+            )
+        return results
 
+    def _get_seen_stats(self, item_list, user):
+        queries = self._prepare_stats_queries(item_list)
         if self.stats_period:
-            stats = self.get_stats(item_list, user)
-            for item in item_list:
-                attrs[item].update({"stats": stats[item.id]})
+            # The stats are queried along with the rest of the stats, rather
+            # than with ``get_stats``, so that all of the queries run
+            # concurrently.
+            queries["stats"] = self.prepare_tsdb_query(
+                [item.id for item in item_list], self.get_stats_query_params()
+            )
+        results = self._run_stats_queries(queries)
+
+        attrs = self._get_seen_stats_attrs(item_list, results)
+
+        # Stats that couldn't be retrieved are ``None``, and the groups are
+        # flagged so that the stats can be shown as unavailable (rather than
+        # being indistinguishable from groups without any events.)
+        stats_unavailable = len(results) < len(queries)
+        stats = results.get("stats")
+        for item in item_list:
+            attrs[item]["stats_unavailable"] = stats_unavailable
+            if self.stats_period:
+                attrs[item]["stats"] = stats[item.id] if stats is not None else None
 
         return attrs
 
     def serialize(self, obj, attrs, user):
         result = super(StreamGroupSerializerSnuba, self).serialize(obj, attrs, user)
+        result["statsUnavailable"] = attrs["stats_unavailable"]
 
         if self.stats_period:
             result["stats"] = {self.stats_period: attrs["stats"]}
@@ -3,12 +3,51 @@ from __future__ import absolute_import
 import logging
 import six
 
-from django.db.models import F
+from collections import defaultdict
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections, router
+from django.db.models import F, Model, Value
+from django.db.models.functions import Greatest
 
 from sentry.signals import buffer_incr_complete
 from sentry.tasks.process_buffer import process_incr
+from sentry.utils import metrics
+from sentry.utils.db import is_postgres
 from sentry.utils.services import Service
 
+# Column types that can't be used in a cast, mapped to the type they store.
+CAST_TYPES = {"serial": "integer", "bigserial": "bigint"}
+
+
+def get_max_columns(model):
+    """
+    Returns the names of the extra columns of ``model`` that are merged by
+    keeping the greatest value, rather than the most recently written one.
+
+    Events aren't always processed in the order that they occurred, so
+    writing these columns with "last write wins" semantics could move them
+    backwards.
+    """
+    from sentry.models import Group
+
+    if model is Group:
+        return ("last_seen",)
+    return ()
+
+
+def merge_extra(model, existing, value):
+    """
+    Merges the extra values of two buffered writes to the same row.
+    """
+    result = dict(existing or {})
+    max_columns = get_max_columns(model)
+    for name, v in six.iteritems(value or {}):
+        if name in max_columns and result.get(name) is not None and result[name] > v:
+            continue
+        result[name] = v
+    return result
+
 
 class BufferMount(type):
     def __new__(cls, name, bases, attrs):
@@ -62,7 +101,20 @@ class Buffer(Service):
                 last_seen=update_kwargs["last_seen"],
             )
 
-        _, created = model.objects.create_or_update(values=update_kwargs, **filters)
+        # Expressions that refer to the existing row can't be used when the
+        # row has to be created, so the plain values are used instead.
+        create_kwargs = {}
+        for name in get_max_columns(model):
+            value = update_kwargs.get(name)
+            if value is not None and not hasattr(value, "resolve_expression"):
+                update_kwargs[name] = Greatest(
+                    F(name), Value(value, output_field=model._meta.get_field(name))
+                )
+                create_kwargs[name] = value
+
+        _, created = model.objects.create_or_update(
+            values=update_kwargs, defaults=create_kwargs, **filters
+        )
 
         buffer_incr_complete.send_robust(
             model=model,
@@ -72,3 +124,176 @@ class Buffer(Service):
             created=created,
             sender=model,
         )
+
+    def process_batch(self, model, batch):
+        """
+        Apply many buffered updates for ``model`` at once, where ``batch`` is
+        a sequence of ``(columns, filters, extra)`` tuples.
+
+        On PostgreSQL, updates that share the same filter, counter and extra
+        columns are applied with a single ``UPDATE ... FROM (VALUES ...)``
+        statement. Updates that can't be expressed that way, or that don't
+        match an existing row (and need one to be created), are handed to
+        ``process`` one at a time.
+        """
+        using = router.db_for_write(model)
+
+        pending = []
+        if is_postgres(using):
+            signatures = defaultdict(list)
+            for update in batch:
+                signature = self._get_batch_signature(model, *update)
+                if signature is None:
+                    pending.append(update)
+                else:
+                    signatures[signature].append(update)
+
+            for signature, updates in six.iteritems(signatures):
+                pending.extend(self._bulk_update(model, using, signature, updates))
+        else:
+            pending.extend(batch)
+
+        metrics.timing(
+            "buffer.batch.fallback",
+            len(pending),
+            tags={"module": model.__module__, "model": model.__name__},
+        )
+
+        for columns, filters, extra in pending:
+            Buffer.process(self, model, columns, filters, extra)
+
+    def _get_batch_signature(self, model, columns, filters, extra):
+        from sentry.models import Group
+
+        if not filters:
+            return None
+
+        extra = extra or {}
+
+        # See the score hack in ``process``.
+        score = model is Group and "last_seen" in extra and "times_seen" in columns
+
+        for name, value in six.iteritems(extra):
+            if hasattr(value, "resolve_expression") and not (score and name == "score"):
+                return None
+
+        try:
+            for name in list(filters) + list(columns) + list(extra):
+                if name != "pk":
+                    model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+
+        return (
+            tuple(sorted(filters)),
+            tuple(sorted(columns)),
+            tuple(sorted(name for name in extra if not (score and name == "score"))),
+            score,
+        )
+
+    def _bulk_update(self, model, using, signature, updates):
+        """
+        Apply ``updates`` with a single statement, returning the updates
+        that did not match any row.
+        """
+        filter_names, column_names, extra_names, score = signature
+        max_columns = get_max_columns(model)
+        opts = model._meta
+        connection = connections[using]
+        qn = connection.ops.quote_name
+
+        def get_field(name):
+            return opts.pk if name == "pk" else opts.get_field(name)
+
+        def prepare(field, value):
+            if isinstance(value, Model):
+                value = value.pk
+            return field.get_db_prep_save(value, connection)
+
+        # Each value in the VALUES list is aliased by position, as the same
+        # field may be used both as a filter and as an extra value.
+        filters = [(get_field(name), "f%d" % i) for i, name in enumerate(filter_names)]
+        columns = [(get_field(name), "c%d" % i) for i, name in enumerate(column_names)]
+        extras = [(get_field(name), "e%d" % i) for i, name in enumerate(extra_names)]
+
+        def cast(field):
+            db_type = field.db_type(connection)
+            return "%%s::%s" % CAST_TYPES.get(db_type, db_type)
+
+        row_template = "(%s)" % ", ".join(
+            ["%s"] + [cast(field) for field, _ in filters + columns + extras]
+        )
+
+        rows = []
+        params = []
+        seen = set()
+        for index, (update_columns, update_filters, update_extra) in enumerate(updates):
+            key = [
+                prepare(field, update_filters[name])
+                for (field, _), name in zip(filters, filter_names)
+            ]
+
+            # Only one of several updates for the same row would be applied
+            # by the statement, so repeated rows are left for ``process``.
+            if repr(key) in seen:
+                continue
+            seen.add(repr(key))
+
+            rows.append(row_template)
+            params.append(index)
+            params.extend(key)
+            params.extend(update_columns[name] for name in column_names)
+            params.extend(
+                prepare(field, update_extra[name]) for (field, _), name in zip(extras, extra_names)
+            )
+
+        def assign(field, alias):
+            if field.name in max_columns:
+                return "%s = greatest(t.%s, v.%s)" % (qn(field.column), qn(field.column), alias)
+            return "%s = v.%s" % (qn(field.column), alias)
+
+        assignments = [
+            "%s = t.%s + v.%s" % (qn(field.column), qn(field.column), alias)
+            for field, alias in columns
+        ] + [assign(field, alias) for field, alias in extras]
+
+        if score:
+            assignments.append(
+                "%s = log(t.%s + v.%s) * 600 + floor(extract(epoch from greatest(t.%s, v.%s)))"
+                % (
+                    qn("score"),
+                    qn("times_seen"),
+                    columns[column_names.index("times_seen")][1],
+                    qn("last_seen"),
+                    extras[extra_names.index("last_seen")][1],
+                )
+            )
+
+        sql = "UPDATE %s AS t SET %s FROM (VALUES %s) AS v (%s) WHERE %s RETURNING v.i" % (
+            qn(opts.db_table),
+            ", ".join(assignments),
+            ", ".join(rows),
+            ", ".join(["i"] + [alias for _, alias in filters + columns + extras]),
+            " AND ".join("t.%s = v.%s" % (qn(field.column), alias) for field, alias in filters),
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            updated = set(row[0] for row in cursor.fetchall())
+
+        missing = []
+        for index, (update_columns, update_filters, update_extra) in enumerate(updates):
+            if index not in updated:
+                missing.append((update_columns, update_filters, update_extra))
+                continue
+
+            buffer_incr_complete.send_robust(
+                model=model,
+                columns=update_columns,
+                filters=update_filters,
+                extra=update_extra,
+                created=False,
+                sender=model,
+            )
+
+        return missing
@@ -6,17 +6,22 @@ import contextlib
 import threading
 from time import time
 from binascii import crc32
+from collections import defaultdict
 
 from datetime import datetime
 from django.db import models
 from django.utils import timezone
 from django.utils.encoding import force_bytes
+from pkg_resources import resource_string
 
 from sentry.buffer import Buffer
+from sentry.buffer.base import get_max_columns, merge_extra
 from sentry.exceptions import InvalidConfiguration
 from sentry.tasks.process_buffer import process_incr, process_pending
 from sentry.utils import json, metrics
+from sentry.utils.combining import WriteCombiner
 from sentry.utils.compat import pickle
+from sentry.utils.dates import to_timestamp
 from sentry.utils.hashlib import md5_text
 from sentry.utils.imports import import_string
 from sentry.utils.redis import get_cluster_from_options
@@ -24,6 +29,11 @@ from sentry.utils.redis import get_cluster_from_options
 _local_buffers = None
 _local_buffers_lock = threading.Lock()
 
+# This script is sent with ``EVAL`` (rather than loaded once and called with
+# ``EVALSHA``) as it's executed within pipelines and fanouts, where a missing
+# script can't be retried.
+set_max_script = resource_string("sentry", "scripts/buffer/set_max.lua")
+
 
 @contextlib.contextmanager
 def batch_buffers_incr():
@@ -77,13 +87,38 @@ class RedisBuffer(Buffer):
     key_expire = 60 * 60  # 1 hour
     pending_key = "b:p"
 
-    def __init__(self, pending_partitions=1, incr_batch_size=2, **options):
+    def __init__(
+        self,
+        pending_partitions=1,
+        incr_batch_size=2,
+        bulk_process_incr=False,
+        combine_interval=None,
+        combine_max_size=1000,
+        **options
+    ):
         self.cluster, options = get_cluster_from_options("SENTRY_BUFFER_OPTIONS", options)
         self.pending_partitions = pending_partitions
         self.incr_batch_size = incr_batch_size
+        # When enabled, each ``process_incr`` batch is locked, read and
+        # written as a whole, instead of one key at a time.
+        self.bulk_process_incr = bulk_process_incr
         assert self.pending_partitions > 0
         assert self.incr_batch_size > 0
 
+        # When ``combine_interval`` is provided, increments are combined in
+        # process memory and written to Redis every ``combine_interval``
+        # seconds, or whenever ``combine_max_size`` distinct keys are
+        # pending (see ``sentry.utils.combining``.)
+        if combine_interval is not None:
+            self.combiner = WriteCombiner(
+                self._write_combined_incrs,
+                self._merge_incrs,
+                interval=combine_interval,
+                max_size=combine_max_size,
+            )
+        else:
+            self.combiner = None
+
     def validate(self):
         try:
             with self.cluster.all() as client:
@@ -194,20 +229,57 @@ class RedisBuffer(Buffer):
                         stored_columns[k] = stored_columns.get(k, 0) + v
 
                     if extra is not None:
-                        stored_extra = extra
+                        stored_extra = merge_extra(model, stored_extra, extra)
 
                     _local_buffers[key] = stored_columns, stored_extra
                     return
 
+        key = self._make_key(model, filters)
+
+        if self.combiner is not None:
+            self.combiner.add(key, (model, filters, dict(columns), dict(extra or {})))
+        else:
+            # We can't use conn.map() due to wanting to support multiple pending
+            # keys (one per Redis partition)
+            conn = self.cluster.get_local_client_for_key(key)
+            pipe = conn.pipeline()
+            self._write_incr(pipe, key, model, columns, filters, extra)
+            pipe.execute()
+
+        metrics.incr(
+            "buffer.incr",
+            skip_internal=True,
+            tags={"module": model.__module__, "model": model.__name__},
+        )
+
+    def _merge_incrs(self, key, existing, value):
+        model, filters, columns, extra = existing
+        for column, amount in six.iteritems(value[2]):
+            columns[column] = columns.get(column, 0) + amount
+        # Extra values are written with HSET, so the latest value for each
+        # column wins (unless it's merged by keeping the greatest value), just
+        # as it would have in Redis.
+        return model, filters, columns, merge_extra(model, extra, value[3])
+
+    def _write_combined_incrs(self, pending):
+        with self.cluster.fanout() as conn:
+            for key, (model, filters, columns, extra) in six.iteritems(pending):
+                self._write_incr(conn.target_key(key), key, model, columns, filters, extra)
+
+        metrics.timing("buffer.combined-size", len(pending))
+
+    def _get_sort_key(self, value):
+        if isinstance(value, datetime):
+            return to_timestamp(value)
+        elif isinstance(value, six.integer_types + (float,)):
+            return value
+        return None
+
+    def _write_incr(self, pipe, key, model, columns, filters, extra):
         # TODO(dcramer): longer term we'd rather not have to serialize values
         # here (unless it's to JSON)
-        key = self._make_key(model, filters)
         pending_key = self._make_pending_key_from_key(key)
-        # We can't use conn.map() due to wanting to support multiple pending
-        # keys (one per Redis partition)
-        conn = self.cluster.get_local_client_for_key(key)
 
-        pipe = conn.pipeline()
         pipe.hsetnx(key, "m", "%s.%s" % (model.__module__, model.__name__))
         # TODO(dcramer): once this goes live in production, we can kill the pickle path
         # (this is to ensure a zero downtime deploy where we can transition event processing)
@@ -220,20 +292,20 @@ class RedisBuffer(Buffer):
             # Group tries to serialize 'score', so we'd need some kind of processing
             # hook here
             # e.g. "update score if last_seen or times_seen is changed"
+            max_columns = get_max_columns(model)
             for column, value in six.iteritems(extra):
+                sort_key = self._get_sort_key(value) if column in max_columns else None
                 # TODO(dcramer): once this goes live in production, we can kill the pickle path
                 # (this is to ensure a zero downtime deploy where we can transition event processing)
-                pipe.hset(key, "e+" + column, pickle.dumps(value))
+                if sort_key is not None:
+                    # The sort key is stored alongside the value (as "x+" +
+                    # column) so that the greatest value can be kept.
+                    pipe.eval(set_max_script, 1, key, column, repr(sort_key), pickle.dumps(value))
+                else:
+                    pipe.hset(key, "e+" + column, pickle.dumps(value))
                 # pipe.hset(key, 'e+' + column, json.dumps(self._dump_value(value)))
         pipe.expire(key, self.key_expire)
         pipe.zadd(pending_key, time(), key)
-        pipe.execute()
-
-        metrics.incr(
-            "buffer.incr",
-            skip_internal=True,
-            tags={"module": model.__module__, "model": model.__name__},
-        )
 
     def process_pending(self, partition=None):
         if partition is None and self.pending_partitions > 1:
@@ -285,9 +357,86 @@ class RedisBuffer(Buffer):
         if key is not None:
             batch_keys = [key]
 
+        if self.bulk_process_incr and len(batch_keys) > 1:
+            self._process_batch_incr(batch_keys)
+            return
+
         for key in batch_keys:
             self._process_single_incr(key)
 
+    def _load_incr_values(self, values):
+        """
+        Returns the model, filters, counter and extra values stored in a
+        buffer hash.
+        """
+        model = import_string(values.pop("m"))
+        if values["f"].startswith("{"):
+            filters = self._load_values(json.loads(values.pop("f")))
+        else:
+            # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
+            filters = pickle.loads(values.pop("f"))
+
+        incr_values = {}
+        extra_values = {}
+        for k, v in six.iteritems(values):
+            if k.startswith("i+"):
+                incr_values[k[2:]] = int(v)
+            elif k.startswith("e+"):
+                if v.startswith("["):
+                    extra_values[k[2:]] = self._load_value(json.loads(v))
+                else:
+                    # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
+                    extra_values[k[2:]] = pickle.loads(v)
+
+        return model, filters, incr_values, extra_values
+
+    def _process_batch_incr(self, keys):
+        lock_keys = {key: self._make_lock_key(key) for key in keys}
+
+        # prevent a stampede due to the way we use celery etas + duplicate
+        # tasks
+        with self.cluster.map() as conn:
+            locks = {
+                key: conn.set(lock_key, "1", nx=True, ex=10)
+                for key, lock_key in six.iteritems(lock_keys)
+            }
+
+        locked = []
+        for key, result in six.iteritems(locks):
+            if result.value:
+                locked.append(key)
+            else:
+                metrics.incr("buffer.revoked", tags={"reason": "locked"}, skip_internal=False)
+                self.logger.debug("buffer.revoked.locked", extra={"redis_key": key})
+
+        try:
+            # The pending set is partitioned per host along with the keys, so
+            # every command for a key has to be sent to the key's host.
+            with self.cluster.fanout() as conn:
+                results = {}
+                for key in locked:
+                    client = conn.target_key(key)
+                    results[key] = client.hgetall(key)
+                    client.zrem(self._make_pending_key_from_key(key), key)
+                    client.delete(key)
+
+            batches = defaultdict(list)
+            for key, result in six.iteritems(results):
+                if not result.value:
+                    metrics.incr("buffer.revoked", tags={"reason": "empty"}, skip_internal=False)
+                    self.logger.debug("buffer.revoked.empty", extra={"redis_key": key})
+                    continue
+
+                model, filters, incr_values, extra_values = self._load_incr_values(result.value)
+                batches[model].append((incr_values, filters, extra_values))
+
+            for model, batch in six.iteritems(batches):
+                super(RedisBuffer, self).process_batch(model, batch)
+        finally:
+            with self.cluster.map() as conn:
+                for key in locked:
+                    conn.delete(lock_keys[key])
+
     def _process_single_incr(self, key):
         client = self.cluster.get_routing_client()
         lock_key = self._make_lock_key(key)
@@ -313,24 +462,7 @@ class RedisBuffer(Buffer):
                 self.logger.debug("buffer.revoked.empty", extra={"redis_key": key})
                 return
 
-            model = import_string(values.pop("m"))
-            if values["f"].startswith("{"):
-                filters = self._load_values(json.loads(values.pop("f")))
-            else:
-                # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                filters = pickle.loads(values.pop("f"))
-
-            incr_values = {}
-            extra_values = {}
-            for k, v in six.iteritems(values):
-                if k.startswith("i+"):
-                    incr_values[k[2:]] = int(v)
-                elif k.startswith("e+"):
-                    if v.startswith("["):
-                        extra_values[k[2:]] = self._load_value(json.loads(v))
-                    else:
-                        # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                        extra_values[k[2:]] = pickle.loads(v)
+            model, filters, incr_values, extra_values = self._load_incr_values(values)
 
             super(RedisBuffer, self).process(model, incr_values, filters, extra_values)
         finally:
@@ -536,6 +536,7 @@ CELERY_IMPORTS = (
     "sentry.tasks.reprocessing",
     "sentry.tasks.scheduler",
     "sentry.tasks.signals",
+    "sentry.tasks.similarity",
     "sentry.tasks.store",
     "sentry.tasks.unmerge",
     "sentry.tasks.servicehooks",
@@ -1008,6 +1009,10 @@ CACHE_VERSION = 1
 SENTRY_DIGESTS = "sentry.digests.backends.dummy.DummyBackend"
 SENTRY_DIGESTS_OPTIONS = {}
 
+# The maximum number of timelines that are delivered by a single task. Values
+# greater than 1 allow the state for several digests to be fetched together.
+SENTRY_DIGESTS_DELIVERY_BATCH_SIZE = 10
+
 # Quota backend
 SENTRY_QUOTAS = "sentry.quotas.Quota"
 SENTRY_QUOTA_OPTIONS = {}
@@ -1022,6 +1027,15 @@ SENTRY_DEFAULT_MAX_EVENTS_PER_MINUTE = "90%"
 # Snuba configuration
 SENTRY_SNUBA = os.environ.get("SNUBA", "http://localhost:1218")
 
+# The number of seconds that Snuba query results may be cached for, by
+# referrer. Results are only cached for the referrers listed here, e.g.
+# {"tsdb": 10, "tagstore.__get_tag_keys_and_top_values": 30}
+SENTRY_SNUBA_CACHE_TTLS = {}
+
+# The maximum number of seconds to wait for an identical query that is being
+# executed by another process, before executing the query anyway.
+SENTRY_SNUBA_CACHE_WAIT = 10
+
 # Node storage backend
 SENTRY_NODESTORE = "sentry.nodestore.django.DjangoNodeStorage"
 SENTRY_NODESTORE_OPTIONS = {}
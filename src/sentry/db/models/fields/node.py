@@ -22,6 +22,8 @@ __all__ = ("NodeField", "NodeData")
 
 logger = logging.getLogger("sentry")
 
+_MISSING = object()
+
 
 class NodeIntegrityFailure(Exception):
     pass
@@ -35,8 +37,15 @@ class NodeData(collections.MutableMapping):
         Initializing with:
         data=None means, this is a node that needs to be fetched from nodestore.
         data={...} means, this is an object that should be saved to nodestore.
+
+        Callers that only need a few top-level keys should use ``get_keys``,
+        which avoids fetching and decoding the entire node.
     """
 
+    # Top-level keys fetched through ``get_keys`` while the full node is
+    # still unbound. Keys missing from the node are stored as ``_MISSING``.
+    _partial_data = None
+
     def __init__(self, field, id, data=None, wrapper=None):
         self.field = field
         self.id = id
@@ -57,6 +66,7 @@ class NodeData(collections.MutableMapping):
         # collection types.  For instance we have events where this is a
         # CanonicalKeyDict
         data.pop("data", None)
+        data.pop("_partial_data", None)
         data["_node_data_CANONICAL"] = isinstance(data["_node_data"], CANONICAL_TYPES)
         data["_node_data"] = dict(data["_node_data"].items())
         return data
@@ -90,6 +100,13 @@ class NodeData(collections.MutableMapping):
             return "<%s: id=%s data=%r>" % (cls_name, self.id, repr(self._node_data))
         return "<%s: id=%s>" % (cls_name, self.id)
 
+    @property
+    def is_bound(self):
+        """
+        Whether the full node data has been loaded (or provided.)
+        """
+        return self._node_data is not None
+
     def get_ref(self, instance):
         if not self.field or not self.field.ref_func:
             return
@@ -98,6 +115,27 @@ class NodeData(collections.MutableMapping):
     def copy(self):
         return self.data.copy()
 
+    def get_keys(self, keys):
+        """
+        Get a dict of only the given top-level keys. If the node has not been
+        bound yet, only these keys are fetched from nodestore.
+
+        >>> event.data.get_keys(['tags', 'sdk'])
+        """
+        if self._node_data is not None:
+            return {k: self._node_data[k] for k in keys if k in self._node_data}
+
+        if not self.id:
+            return {}
+
+        partial = self._partial_data or {}
+        missing = [k for k in keys if k not in partial]
+        if missing:
+            self.bind_partial_data(nodestore.get_keys(self.id, missing) or {}, missing)
+            partial = self._partial_data
+
+        return {k: partial[k] for k in keys if partial[k] is not _MISSING}
+
     @memoize
     def data(self):
         """
@@ -133,6 +171,15 @@ class NodeData(collections.MutableMapping):
             data = self.wrapper(data)
         self._node_data = data
 
+    def bind_partial_data(self, data, keys):
+        """
+        Bind the result of a partial nodestore fetch for ``keys``.
+        """
+        if self._partial_data is None:
+            self._partial_data = {}
+        for key in keys:
+            self._partial_data[key] = data.get(key, _MISSING)
+
     def bind_ref(self, instance):
         ref = self.get_ref(instance)
         if ref:
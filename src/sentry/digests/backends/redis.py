@@ -95,7 +95,9 @@ class RedisBackend(Backend):
 
     def _get_timeline_lock(self, key, duration):
         lock_key = u"{}:t:{}".format(self.namespace, key)
-        return self.locks.get(lock_key, duration=duration, routing_key=lock_key)
+        return self.locks.get(
+            lock_key, duration=duration, routing_key=lock_key, name="digests.timeline"
+        )
 
     def add(self, key, record, increment_delay=None, maximum_delay=None, timestamp=None):
         if timestamp is None:
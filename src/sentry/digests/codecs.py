@@ -2,7 +2,10 @@ from __future__ import absolute_import
 
 import zlib
 
+import msgpack
+
 from sentry.utils.compat import pickle
+from sentry.utils.dates import to_datetime, to_timestamp
 
 
 class Codec(object):
@@ -19,3 +22,56 @@ class CompressedPickleCodec(Codec):
 
     def decode(self, value):
         return pickle.loads(zlib.decompress(value))
+
+
+class CompactRecordCodec(Codec):
+    """
+    Encodes notification records as a compact ``msgpack`` payload containing
+    the event row (without its data) and the rule IDs, rather than pickling
+    the complete event.
+
+    The event data is not stored in the timeline: decoded events reference
+    their node by ID, and should be bound in bulk (see
+    ``sentry.digests.notifications.fetch_state``) before use. Values that were
+    encoded by ``CompressedPickleCodec`` can still be decoded, which allows
+    switching an existing installation over to this codec.
+    """
+
+    prefix = b"c1:"
+
+    event_fields = ("id", "group_id", "event_id", "project_id", "message", "platform", "time_spent")
+
+    def __init__(self):
+        self.fallback = CompressedPickleCodec()
+
+    def encode(self, value):
+        event = value.event
+        if not event.data.id:
+            # Events that haven't been saved to nodestore can't be
+            # reconstructed from their node ID.
+            return self.fallback.encode(value)
+
+        return self.prefix + msgpack.packb(
+            [
+                [getattr(event, field) for field in self.event_fields],
+                to_timestamp(event.datetime),
+                event.data.id,
+                list(value.rules),
+            ],
+            use_bin_type=True,
+        )
+
+    def decode(self, value):
+        if not value.startswith(self.prefix):
+            return self.fallback.decode(value)
+
+        from sentry.digests.notifications import Notification
+        from sentry.models import Event
+
+        fields, timestamp, node_id, rules = msgpack.unpackb(value[len(self.prefix) :], raw=False)
+        event = Event(
+            datetime=to_datetime(timestamp),
+            data={"node_id": node_id},
+            **dict(zip(self.event_fields, fields))
+        )
+        return Notification(event, rules)
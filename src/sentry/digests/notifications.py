@@ -1,5 +1,6 @@
 from __future__ import absolute_import
 
+import copy
 import functools
 import itertools
 import logging
@@ -8,6 +9,7 @@ import six
 from collections import OrderedDict, defaultdict, namedtuple
 from six.moves import reduce
 
+from sentry import eventstore
 from sentry.app import tsdb
 from sentry.digests import Record
 from sentry.models import Project, Group, GroupStatus, Rule
@@ -46,25 +48,65 @@ def event_to_record(event, rules):
 
 
 def fetch_state(project, records):
-    # This reads a little strange, but remember that records are returned in
-    # reverse chronological order, and we query the database in chronological
-    # order.
-    # NOTE: This doesn't account for any issues that are filtered out later.
-    start = records[-1].datetime
-    end = records[0].datetime
-
-    groups = Group.objects.in_bulk(record.value.event.group_id for record in records)
-    return {
-        "project": project,
-        "groups": groups,
-        "rules": Rule.objects.in_bulk(
-            itertools.chain.from_iterable(record.value.rules for record in records)
-        ),
-        "event_counts": tsdb.get_sums(tsdb.models.group, groups.keys(), start, end),
-        "user_counts": tsdb.get_distinct_counts_totals(
-            tsdb.models.users_affected_by_group, groups.keys(), start, end
-        ),
-    }
+    return fetch_state_many([(project, records)])[0]
+
+
+def fetch_state_many(digests):
+    """
+    Fetch the state required to build many digests at once, where
+    ``digests`` is a sequence of ``(project, records)`` pairs. Event data,
+    groups and rules are fetched for all of the digests together, while
+    counts are fetched separately for each digest since each covers a
+    different time range.
+    """
+    events = [record.value.event for project, records in digests for record in records]
+    eventstore.bind_nodes([event for event in events if not event.data.is_bound], "data")
+
+    groups = Group.objects.in_bulk(set(event.group_id for event in events))
+    rules = Rule.objects.in_bulk(
+        set(
+            itertools.chain.from_iterable(
+                record.value.rules for project, records in digests for record in records
+            )
+        )
+    )
+
+    states = []
+    for project, records in digests:
+        # This reads a little strange, but remember that records are returned in
+        # reverse chronological order, and we query the database in chronological
+        # order.
+        # NOTE: This doesn't account for any issues that are filtered out later.
+        start = records[-1].datetime
+        end = records[0].datetime
+
+        # Each digest gets its own copy of the groups, since counts are
+        # attached to them (see ``attach_state``.)
+        digest_groups = {}
+        for record in records:
+            group = groups.get(record.value.event.group_id)
+            if group is not None and group.id not in digest_groups:
+                digest_groups[group.id] = copy.copy(group)
+
+        states.append(
+            {
+                "project": project,
+                "groups": digest_groups,
+                "rules": {
+                    id: rules[id]
+                    for id in itertools.chain.from_iterable(
+                        record.value.rules for record in records
+                    )
+                    if id in rules
+                },
+                "event_counts": tsdb.get_sums(tsdb.models.group, digest_groups.keys(), start, end),
+                "user_counts": tsdb.get_distinct_counts_totals(
+                    tsdb.models.users_affected_by_group, digest_groups.keys(), start, end
+                ),
+            }
+        )
+
+    return states
 
 
 def attach_state(project, groups, rules, event_counts, user_counts):
@@ -191,9 +191,11 @@ class ScoreClause(Func):
         has_values = self.last_seen is not None and self.times_seen is not None
         if is_postgres(db):
             if has_values:
-                sql = "log(times_seen + %d) * 600 + %d" % (
-                    self.times_seen,
-                    to_timestamp(self.last_seen),
+                # The score is never moved backwards by an event that is
+                # older than the one that was last seen.
+                sql = (
+                    "log(times_seen + %d) * 600 + greatest(%d, floor(extract(epoch from last_seen)))"
+                    % (self.times_seen, to_timestamp(self.last_seen))
                 )
             else:
                 sql = "log(times_seen) * 600 + last_seen::abstime::int"
@@ -842,16 +844,14 @@ class EventManager(object):
                 cache.set(cache_key, e_userid, 3600)
         return euser
 
-    def _find_hashes(self, project, hash_list):
-        return map(
-            lambda hash: GroupHash.objects.get_or_create(project=project, hash=hash)[0], hash_list
-        )
+    def _find_hashes(self, project, hash_list, use_cache=True):
+        return GroupHash.objects.get_or_create_many(project, hash_list, use_cache=use_cache)
 
-    def _save_aggregate(self, event, hashes, release, **kwargs):
+    def _save_aggregate(self, event, hashes, release, use_cache=True, **kwargs):
         project = event.project
 
         # attempt to find a matching hash
-        all_hashes = self._find_hashes(project, hashes)
+        all_hashes = self._find_hashes(project, hashes, use_cache=use_cache)
 
         existing_group_id = None
         for h in all_hashes:
@@ -891,7 +891,16 @@ class EventManager(object):
             )
 
         else:
-            group = Group.objects.get_from_cache(id=existing_group_id)
+            try:
+                group = Group.objects.get_from_cache(id=existing_group_id)
+            except Group.DoesNotExist:
+                if not use_cache:
+                    raise
+
+                # The cached hash refers to a group that has since been
+                # deleted, so discard the cached hashes and try again.
+                GroupHash.objects.invalidate_cache(project.id)
+                return self._save_aggregate(event, hashes, release, use_cache=False, **kwargs)
 
             group_is_new = False
 
@@ -968,6 +977,14 @@ class EventManager(object):
         group.active_at = date
         group.status = GroupStatus.UNRESOLVED
 
+        if is_regression:
+            group.last_seen = date
+
+        # The update above doesn't refresh the cached group, and events for a
+        # group that is still cached as resolved would all attempt the same
+        # transition until the cache expires.
+        Group.objects.uncache_object(group.id)
+
         if is_regression and release:
             # resolutions are only valid if the state of the group is still
             # resolved -- if it were to change the resolution should get removed
@@ -250,12 +250,15 @@ class EventStorage(Service):
         """
         raise NotImplementedError
 
-    def bind_nodes(self, object_list, node_name="data"):
+    def bind_nodes(self, object_list, node_name="data", keys=None):
         """
         For a list of Event objects, and a property name where we might find an
         (unfetched) NodeData on those objects, fetch all the data blobs for
         those NodeDatas with a single multi-get command to nodestore, and bind
         the returned blobs to the NodeDatas
+
+        If `keys` is given, only those top-level keys are fetched and bound.
+        They can then be read with `NodeData.get_keys`.
         """
         object_node_list = [
             (i, getattr(i, node_name)) for i in object_list if getattr(i, node_name).id
@@ -265,6 +268,12 @@ class EventStorage(Service):
         if not node_ids:
             return
 
+        if keys is not None:
+            node_results = nodestore.get_multi_keys(node_ids, keys)
+            for _, node in object_node_list:
+                node.bind_partial_data(node_results.get(node.id) or {}, keys)
+            return
+
         node_results = nodestore.get_multi(node_ids)
 
         for item, node in object_node_list:
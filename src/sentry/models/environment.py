@@ -5,7 +5,7 @@ from django.utils import timezone
 
 from sentry.constants import ENVIRONMENT_NAME_PATTERN, ENVIRONMENT_NAME_MAX_LENGTH
 from sentry.db.models import BoundedPositiveIntegerField, FlexibleForeignKey, Model, sane_repr
-from sentry.utils.cache import cache
+from sentry.utils.cache import cache, local_cache
 from sentry.utils.hashlib import md5_text
 import re
 
@@ -80,10 +80,15 @@ class Environment(Model):
 
         cache_key = cls.get_cache_key(project.organization_id, name)
 
-        env = cache.get(cache_key)
+        env = local_cache.get(cache_key)
         if env is None:
-            env = cls.objects.get_or_create(name=name, organization_id=project.organization_id)[0]
-            cache.set(cache_key, env, 3600)
+            env = cache.get(cache_key)
+            if env is None:
+                env, _ = cls.objects.get_or_create(
+                    name=name, organization_id=project.organization_id
+                )
+                cache.set(cache_key, env, 3600)
+            local_cache.set(cache_key, env)
 
         env.add_project(project)
 
@@ -92,6 +97,9 @@ class Environment(Model):
     def add_project(self, project, is_hidden=None):
         cache_key = "envproj:c:%s:%s" % (self.id, project.id)
 
+        if local_cache.get(cache_key) is not None:
+            return
+
         if cache.get(cache_key) is None:
             try:
                 with transaction.atomic():
@@ -103,6 +111,8 @@ class Environment(Model):
                 # We've already created the object, should still cache the action.
                 cache.set(cache_key, 1, 3600)
 
+        local_cache.set(cache_key, 1)
+
     @staticmethod
     def get_name_from_path_segment(segment):
         # In cases where the environment name is passed as a URL path segment,
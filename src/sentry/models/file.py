@@ -62,7 +62,9 @@ def _get_size_and_checksum(fileobj, logger=nooplogger):
 @contextmanager
 def _locked_blob(checksum, logger=nooplogger):
     logger.debug("_locked_blob.start", extra={"checksum": checksum})
-    lock = locks.get(u"fileblob:upload:{}".format(checksum), duration=UPLOAD_RETRY_TIME)
+    lock = locks.get(
+        u"fileblob:upload:{}".format(checksum), duration=UPLOAD_RETRY_TIME, name="fileblob.upload"
+    )
     with TimedRetryPolicy(UPLOAD_RETRY_TIME, metric_instance="lock.fileblob.upload")(lock.acquire):
         logger.debug("_locked_blob.acquired", extra={"checksum": checksum})
         # test for presence
@@ -259,7 +261,11 @@ class FileBlob(Model):
         return u"/".join(pieces)
 
     def delete(self, *args, **kwargs):
-        lock = locks.get(u"fileblob:upload:{}".format(self.checksum), duration=UPLOAD_RETRY_TIME)
+        lock = locks.get(
+            u"fileblob:upload:{}".format(self.checksum),
+            duration=UPLOAD_RETRY_TIME,
+            name="fileblob.upload",
+        )
         with TimedRetryPolicy(UPLOAD_RETRY_TIME, metric_instance="lock.fileblob.delete")(
             lock.acquire
         ):
@@ -5,7 +5,7 @@ from django.db.models.signals import post_delete
 from django.utils import timezone
 
 from sentry.db.models import FlexibleForeignKey, Model, sane_repr
-from sentry.utils.cache import cache
+from sentry.utils.cache import cache, local_cache
 
 
 class GroupEnvironment(Model):
@@ -38,22 +38,28 @@ class GroupEnvironment(Model):
     @classmethod
     def get_or_create(cls, group_id, environment_id, defaults=None):
         cache_key = cls._get_cache_key(group_id, environment_id)
-        instance = cache.get(cache_key)
+        instance = local_cache.get(cache_key)
+        if instance is None:
+            instance = cache.get(cache_key)
+            if instance is not None:
+                local_cache.set(cache_key, instance)
+
         if instance is None:
             instance, created = cls.objects.get_or_create(
                 group_id=group_id, environment_id=environment_id, defaults=defaults
             )
             cache.set(cache_key, instance, 3600)
+            local_cache.set(cache_key, instance)
         else:
             created = False
 
         return instance, created
 
 
-post_delete.connect(
-    lambda instance, **kwargs: cache.delete(
-        GroupEnvironment._get_cache_key(instance.group_id, instance.environment_id)
-    ),
-    sender=GroupEnvironment,
-    weak=False,
-)
+def _delete_cached_instance(instance, **kwargs):
+    cache_key = GroupEnvironment._get_cache_key(instance.group_id, instance.environment_id)
+    cache.delete(cache_key)
+    local_cache.delete(cache_key)
+
+
+post_delete.connect(_delete_cached_instance, sender=GroupEnvironment, weak=False)
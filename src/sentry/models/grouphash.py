@@ -1,9 +1,113 @@
 from __future__ import absolute_import
 
+from uuid import uuid4
+
 from django.db import models
 from django.utils.translation import ugettext_lazy as _
 
-from sentry.db.models import BoundedPositiveIntegerField, FlexibleForeignKey, Model
+from sentry.db.models import BaseManager, BoundedPositiveIntegerField, FlexibleForeignKey, Model
+from sentry.utils.cache import LocalCache, cache
+
+
+class GroupHashManager(BaseManager):
+    """
+    Provides a cache of the hash to group mapping, which allows events for
+    existing groups to be associated with their group without any queries.
+
+    Hashes that are associated with a group (or a tombstone) are cached both
+    in process memory and the shared cache. Each cached value is stamped with
+    the project's cache generation, and changing the generation (via
+    ``invalidate_cache``) invalidates all cached hashes for the project. Any
+    code that changes the group or tombstone for existing hashes must call
+    ``invalidate_cache`` once those changes have been committed.
+
+    The generation is always read from the shared cache before the database
+    is queried, so values read from the database concurrently with an
+    invalidation are stored under the previous generation and never used.
+    """
+
+    hash_cache_ttl = 60 * 60
+    local_cache_size = 10000
+
+    def __init__(self, *args, **kwargs):
+        super(GroupHashManager, self).__init__(*args, **kwargs)
+        self.local_cache = LocalCache(self.local_cache_size)
+
+    def __get_generation_key(self, project_id):
+        return u"gh:g:{}".format(project_id)
+
+    def __get_hash_key(self, project_id, hash):
+        return u"gh:h:{}:{}".format(project_id, hash)
+
+    def invalidate_cache(self, project_id):
+        cache.set(self.__get_generation_key(project_id), uuid4().hex, None)
+
+    def get_or_create_many(self, project, hashes, use_cache=True):
+        """
+        Return a ``GroupHash`` for each of the provided hashes (in the same
+        order), creating any that don't exist yet.
+
+        Instances that are returned from the cache are not retrieved from the
+        database, and only have their ``id``, ``project_id``, ``hash``,
+        ``group_id`` and ``group_tombstone_id`` attributes set.
+        """
+        if not use_cache:
+            return [self.get_or_create(project=project, hash=hash)[0] for hash in hashes]
+
+        generation_key = self.__get_generation_key(project.id)
+
+        entries = {}
+        for hash in hashes:
+            entry = self.local_cache.get((project.id, hash))
+            if entry is not None:
+                entries[hash] = entry
+
+        values = cache.get_many(
+            [generation_key]
+            + [self.__get_hash_key(project.id, hash) for hash in hashes if hash not in entries]
+        )
+
+        generation = values.pop(generation_key, None)
+        if generation is None:
+            generation = uuid4().hex
+            if not cache.add(generation_key, generation, None):
+                generation = cache.get(generation_key, generation)
+
+        for key, entry in values.items():
+            hash = key.rsplit(":", 1)[1]
+            entries[hash] = entry
+            self.local_cache.set((project.id, hash), entry)
+
+        results = []
+        updates = {}
+        for hash in hashes:
+            entry = entries.get(hash)
+            if entry is not None and entry[0] == generation:
+                _, id, group_id, group_tombstone_id = entry
+                results.append(
+                    self.model(
+                        id=id,
+                        project_id=project.id,
+                        hash=hash,
+                        group_id=group_id,
+                        group_tombstone_id=group_tombstone_id,
+                    )
+                )
+                continue
+
+            instance = self.get_or_create(project=project, hash=hash)[0]
+            if (
+                instance.group_id is not None or instance.group_tombstone_id is not None
+            ) and instance.state != self.model.State.LOCKED_IN_MIGRATION:
+                entry = (generation, instance.id, instance.group_id, instance.group_tombstone_id)
+                updates[self.__get_hash_key(project.id, hash)] = entry
+                self.local_cache.set((project.id, hash), entry)
+            results.append(instance)
+
+        if updates:
+            cache.set_many(updates, self.hash_cache_ttl)
+
+        return results
 
 
 class GroupHash(Model):
@@ -21,6 +125,8 @@ class GroupHash(Model):
         choices=[(State.LOCKED_IN_MIGRATION, _("Locked (Migration in Progress)"))], null=True
     )
 
+    objects = GroupHashManager()
+
     class Meta:
         app_label = "sentry"
         db_table = "sentry_grouphash"
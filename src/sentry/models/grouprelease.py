@@ -4,7 +4,7 @@ from datetime import timedelta
 from django.db import IntegrityError, models, transaction
 from django.utils import timezone
 
-from sentry.utils.cache import cache
+from sentry.utils.cache import cache, local_cache
 from sentry.utils.hashlib import md5_text
 from sentry.db.models import BoundedPositiveIntegerField, Model, sane_repr
 
@@ -36,7 +36,12 @@ class GroupRelease(Model):
     def get_or_create(cls, group, release, environment, datetime, **kwargs):
         cache_key = cls.get_cache_key(group.id, release.id, environment.name)
 
-        instance = cache.get(cache_key)
+        instance = local_cache.get(cache_key)
+        if instance is None:
+            instance = cache.get(cache_key)
+            if instance is not None:
+                local_cache.set(cache_key, instance)
+
         if instance is None:
             try:
                 with transaction.atomic():
@@ -59,6 +64,7 @@ class GroupRelease(Model):
                     False,
                 )
             cache.set(cache_key, instance, 3600)
+            local_cache.set(cache_key, instance)
         else:
             created = False
 
@@ -71,4 +77,5 @@ class GroupRelease(Model):
             ).update(last_seen=datetime)
             instance.last_seen = datetime
             cache.set(cache_key, instance, 3600)
+            local_cache.set(cache_key, instance)
         return instance
@@ -24,7 +24,7 @@ from sentry.constants import BAD_RELEASE_CHARS, COMMIT_RANGE_DELIMITER
 from sentry.models import CommitFileChange
 from sentry.signals import issue_resolved, release_commits_updated
 from sentry.utils import metrics
-from sentry.utils.cache import cache
+from sentry.utils.cache import cache, local_cache
 from sentry.utils.hashlib import md5_text
 from sentry.utils.retries import TimedRetryPolicy
 
@@ -135,6 +135,10 @@ class Release(Model):
 
         cache_key = cls.get_cache_key(project.organization_id, version)
 
+        release = local_cache.get(cache_key)
+        if release is not None:
+            return release
+
         release = cache.get(cache_key)
         if release in (None, -1):
             # TODO(dcramer): if the cache result is -1 we could attempt a
@@ -174,6 +178,8 @@ class Release(Model):
             # the new "latest release" for this project
             cache.set(cache_key, release, 3600)
 
+        local_cache.set(cache_key, release)
+
         return release
 
     @classmethod
@@ -365,7 +371,7 @@ class Release(Model):
             if not RepositoryProvider.should_ignore_commit(c.get("message", ""))
         ]
         lock_key = type(self).get_lock_key(self.organization_id, self.id)
-        lock = locks.get(lock_key, duration=10)
+        lock = locks.get(lock_key, duration=10, name="release.commits")
         with TimedRetryPolicy(10)(lock.acquire):
             start = time()
             with transaction.atomic():
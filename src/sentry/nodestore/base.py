@@ -16,6 +16,8 @@ class NodeStorage(local, Service):
         "delete_multi",
         "get",
         "get_multi",
+        "get_keys",
+        "get_multi_keys",
         "set",
         "set_multi",
         "generate_id",
@@ -64,6 +66,31 @@ class NodeStorage(local, Service):
         """
         return dict((id, self.get(id)) for id in id_list)
 
+    def get_keys(self, id, keys):
+        """
+        Fetch only the given top-level keys of a node. Backends which store
+        key-indexed payloads can avoid decoding the rest of the node.
+
+        >>> data = nodestore.get_keys('key1', ['tags', 'sdk'])
+        >>> print data
+        """
+        return self.get_multi_keys([id], keys).get(id)
+
+    def get_multi_keys(self, id_list, keys):
+        """
+        >>> data_map = nodestore.get_multi_keys(['key1', 'key2'], ['tags'])
+        >>> print 'key1', data_map['key1']
+        """
+        results = self.get_multi(id_list)
+        rv = {}
+        for id in id_list:
+            data = results.get(id)
+            if data is None:
+                rv[id] = None
+            else:
+                rv[id] = {k: data[k] for k in keys if k in data}
+        return rv
+
     def set(self, id, data, ttl=None):
         """
         >>> nodestore.set('key1', {'foo': 'bar'})
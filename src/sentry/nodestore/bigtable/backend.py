@@ -10,6 +10,7 @@ from google.cloud.bigtable.row_set import RowSet
 from simplejson import JSONEncoder, _default_decoder
 from django.utils import timezone
 
+from sentry.nodestore import payload
 from sentry.nodestore.base import NodeStorage
 
 # Cache an instance of the encoder we want to use
@@ -61,7 +62,13 @@ class BigtableNodeStorage(NodeStorage):
     ...     table='nodestore',
     ...     default_ttl=timedelta(days=30),
     ...     compression=True,
+    ...     key_index=True,
     ... )
+
+    With ``key_index`` enabled, rows are written using the key-indexed
+    payload layout (see ``sentry.nodestore.payload``), which allows
+    ``get_keys`` and ``get_multi_keys`` to decode only the requested
+    top-level keys. Rows written without it remain readable.
     """
 
     max_size = 1024 * 1024 * 10
@@ -71,6 +78,7 @@ class BigtableNodeStorage(NodeStorage):
     data_column = b"0"
 
     _FLAG_COMPRESSED = 1 << 0
+    _FLAG_KEY_INDEX = 1 << 1
 
     def __init__(
         self,
@@ -80,6 +88,7 @@ class BigtableNodeStorage(NodeStorage):
         automatic_expiry=False,
         default_ttl=None,
         compression=False,
+        key_index=False,
         thread_pool_size=5,  # TODO(mattrobenolt): Remove this
         **kwargs
     ):
@@ -90,6 +99,7 @@ class BigtableNodeStorage(NodeStorage):
         self.automatic_expiry = automatic_expiry
         self.default_ttl = default_ttl
         self.compression = compression
+        self.key_index = key_index
         self.skip_deletes = automatic_expiry and "_SENTRY_CLEANUP" in os.environ
 
     @property
@@ -100,9 +110,18 @@ class BigtableNodeStorage(NodeStorage):
         return self.decode_row(self.connection.read_row(id))
 
     def get_multi(self, id_list):
+        return self._get_multi(id_list)
+
+    def get_keys(self, id, keys):
+        return self.decode_row(self.connection.read_row(id), keys=keys)
+
+    def get_multi_keys(self, id_list, keys):
+        return self._get_multi(id_list, keys=keys)
+
+    def _get_multi(self, id_list, keys=None):
         if len(id_list) == 1:
             id = id_list[0]
-            return {id: self.get(id)}
+            return {id: self.decode_row(self.connection.read_row(id), keys=keys)}
 
         rv = {}
         rows = RowSet()
@@ -111,11 +130,11 @@ class BigtableNodeStorage(NodeStorage):
             rv[id] = None
 
         for row in self.connection.read_rows(row_set=rows):
-            rv[row.row_key] = self.decode_row(row)
+            rv[row.row_key] = self.decode_row(row, keys=keys)
 
         return rv
 
-    def decode_row(self, row):
+    def decode_row(self, row, keys=None):
         if row is None:
             return None
 
@@ -149,14 +168,25 @@ class BigtableNodeStorage(NodeStorage):
         if flags & self._FLAG_COMPRESSED:
             data = zlib_decompress(data)
 
-        return json_loads(data)
+        if flags & self._FLAG_KEY_INDEX:
+            if keys is not None:
+                return payload.decode_keys(data, keys)
+            return payload.decode(data)
+
+        data = json_loads(data)
+        if keys is not None:
+            return {k: data[k] for k in keys if k in data}
+        return data
 
     def set(self, id, data, ttl=None):
         row = self.encode_row(id, data, ttl)
         row.commit()
 
     def encode_row(self, id, data, ttl=None):
-        data = json_dumps(data)
+        if self.key_index:
+            data = payload.encode(data, dumps=json_dumps)
+        else:
+            data = json_dumps(data)
 
         row = self.connection.row(id)
         # Call to delete is just a state mutation,
@@ -189,9 +219,11 @@ class BigtableNodeStorage(NodeStorage):
             )
 
         # Track flags for metadata about this row.
-        # This only flag we're tracking now is whether compression
-        # is on or not for the data column.
+        # We track whether compression is on or not for the data column,
+        # and whether the data was written with the key-indexed layout.
         flags = 0
+        if self.key_index:
+            flags |= self._FLAG_KEY_INDEX
         if self.compression:
             flags |= self._FLAG_COMPRESSED
             data = zlib_compress(data)
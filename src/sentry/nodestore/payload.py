@@ -0,0 +1,103 @@
+"""
+sentry.nodestore.payload
+~~~~~~~~~~~~~~~~~~~~~~~~
+
+A key-indexed layout for node payloads.
+
+A regular node payload is a single JSON document, which means that reading
+any key out of it requires decoding everything -- including large interfaces
+such as breadcrumbs and stacktraces. The key-indexed layout instead encodes
+every top-level value on its own and prefixes the blob with an offset table,
+so readers that only need a handful of keys can slice and decode just those.
+
+    +-------+-------------+-------------------------+------------------+
+    | magic | header size | header (JSON offsets)   | body (values)    |
+    +-------+-------------+-------------------------+------------------+
+
+The header maps each top-level key to an ``[offset, length]`` pair relative
+to the start of the body.
+"""
+from __future__ import absolute_import
+
+import struct
+
+import six
+
+from sentry.utils import json
+
+__all__ = ("encode", "decode", "decode_keys", "is_indexed")
+
+MAGIC = b"\x00nki\x01"
+
+_header_size = struct.Struct(">I")
+_prefix_length = len(MAGIC) + _header_size.size
+
+
+def _to_bytes(value):
+    if isinstance(value, six.text_type):
+        return value.encode("utf-8")
+    return value
+
+
+def _loads(value):
+    return json.loads(value.decode("utf-8"))
+
+
+def is_indexed(blob):
+    """
+    Returns whether ``blob`` was written with the key-indexed layout.
+    """
+    return blob[: len(MAGIC)] == MAGIC
+
+
+def encode(data, dumps=json.dumps):
+    """
+    Encode a mapping into the key-indexed layout.
+    """
+    offsets = {}
+    chunks = []
+    position = 0
+    for key, value in six.iteritems(data):
+        chunk = _to_bytes(dumps(value))
+        offsets[key] = [position, len(chunk)]
+        chunks.append(chunk)
+        position += len(chunk)
+
+    header = _to_bytes(dumps(offsets))
+    return b"".join([MAGIC, _header_size.pack(len(header)), header] + chunks)
+
+
+def _read_header(blob):
+    if not is_indexed(blob):
+        raise ValueError("Payload is not key-indexed")
+    (size,) = _header_size.unpack(blob[len(MAGIC) : _prefix_length])
+    body_start = _prefix_length + size
+    return _loads(blob[_prefix_length:body_start]), body_start
+
+
+def decode(blob):
+    """
+    Decode an entire key-indexed payload back into a dict.
+    """
+    offsets, body_start = _read_header(blob)
+    return {
+        key: _loads(blob[body_start + offset : body_start + offset + length])
+        for key, (offset, length) in six.iteritems(offsets)
+    }
+
+
+def decode_keys(blob, keys):
+    """
+    Decode only the given top-level ``keys`` from a key-indexed payload.
+
+    Keys that are not present in the payload are omitted from the result.
+    """
+    offsets, body_start = _read_header(blob)
+    rv = {}
+    for key in keys:
+        try:
+            offset, length = offsets[key]
+        except KeyError:
+            continue
+        rv[key] = _loads(blob[body_start + offset : body_start + offset + length])
+    return rv
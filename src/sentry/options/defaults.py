@@ -140,6 +140,10 @@ register("snuba.search.chunk-growth-rate", default=1.5)
 register("snuba.search.max-chunk-size", default=2000)
 register("snuba.search.max-total-chunk-time-seconds", default=30.0)
 register("snuba.search.hits-sample-size", default=100)
+register("snuba.search.candidates-cache-ttl", default=0)
+register("snuba.search.hit-ratio-cache-ttl", default=10 * 60)
+register("snuba.search.estimate-hits", type=Bool, default=False)
+register("snuba.serializer.stats-timeout", default=10.0)
 register("snuba.track-outcomes-sample-rate", default=0.0)
 
 # Kafka Publisher
@@ -1,7 +1,10 @@
 from __future__ import absolute_import
 
+import atexit
 import functools
+import os
 import six
+import threading
 
 from time import time
 
@@ -13,6 +16,8 @@ from sentry.utils.json import prune_empty_keys
 
 is_rate_limited = load_script("quotas/is_rate_limited.lua")
 
+lease_quota = load_script("quotas/lease.lua")
+
 
 def get_dynamic_cluster_from_options(setting, config):
     cluster_name = config.get("cluster", "default")
@@ -122,13 +127,46 @@ class BasicRedisQuota(object):
         )
 
 
+class QuotaLease(object):
+    """
+    A block of units that has been reserved from a set of quota counters in
+    Redis, and that can be spent locally until it runs out or ``expires``.
+    """
+
+    __slots__ = ["routing_key", "refunds", "remaining", "expires", "window_end"]
+
+    def __init__(self, routing_key, refunds, remaining, expires, window_end):
+        self.routing_key = routing_key
+        # (refund key, expiry) pairs, used to return unspent units
+        self.refunds = refunds
+        self.remaining = remaining
+        self.expires = expires
+        self.window_end = window_end
+
+
 class RedisQuota(Quota):
+    """
+    Quotas backed by Redis counters.
+
+    By default, every call to ``is_rate_limited`` runs a script in Redis.
+    When ``lease_size`` is provided, each process instead reserves blocks of
+    up to ``lease_size`` units from Redis and spends them locally, for at
+    most ``lease_ttl`` seconds or until the quota window ends, returning any
+    unspent units through the refund counters.
+
+    Reserved units are counted in Redis before they are spent, so leasing
+    never admits more than the quota limit. The tradeoff is that usage
+    reported by ``get_usage`` can include up to ``lease_size`` unspent units
+    per process, and that a quota may start rejecting events early while
+    those units are held by other processes.
+    """
+
     #: The ``grace`` period allows accommodating for clock drift in TTL
     #: calculation since the clock on the Redis instance used to store quota
     #: metrics may not be in sync with the computer running this code.
     grace = 60
 
-    def __init__(self, **options):
+    def __init__(self, lease_size=None, lease_ttl=10, **options):
         self.is_redis_cluster, self.cluster, options = get_dynamic_cluster_from_options(
             "SENTRY_QUOTA_OPTIONS", options
         )
@@ -143,6 +181,15 @@ class RedisQuota(Quota):
         super(RedisQuota, self).__init__(**options)
         self.namespace = "quota"
 
+        assert lease_size is None or lease_size > 0
+        self.lease_size = lease_size
+        self.lease_ttl = lease_ttl
+        self.__leases = {}
+        self.__leases_lock = threading.Lock()
+        self.__leases_pid = os.getpid()
+        if lease_size is not None:
+            atexit.register(self.release_leases)
+
     def validate(self):
         try:
             if self.is_redis_cluster:
@@ -314,8 +361,18 @@ class RedisQuota(Quota):
         if not keys or not args:
             return NotRateLimited()
 
-        client = self.__get_redis_client(six.text_type(project.organization_id))
-        rejections = is_rate_limited(client, keys, args)
+        routing_key = six.text_type(project.organization_id)
+        if self.lease_size is not None:
+            window_end = min(
+                self.get_next_period_start(
+                    quota.window, project.organization_id % quota.window, timestamp
+                )
+                for quota in quotas
+            )
+            rejections = self.__spend_lease(routing_key, keys, args, timestamp, window_end)
+        else:
+            client = self.__get_redis_client(routing_key)
+            rejections = is_rate_limited(client, keys, args)
 
         if not any(rejections):
             return NotRateLimited()
@@ -331,3 +388,90 @@ class RedisQuota(Quota):
                 worst_case = (delay, quota.reason_code)
 
         return RateLimited(retry_after=worst_case[0], reason_code=worst_case[1])
+
+    def __get_leases(self):
+        # Leases that were acquired before a fork are still being spent by
+        # the parent process, so the child has to start over.
+        pid = os.getpid()
+        if self.__leases_pid != pid:
+            self.__leases = {}
+            self.__leases_lock = threading.Lock()
+            self.__leases_pid = pid
+        return self.__leases
+
+    def __spend_lease(self, routing_key, keys, args, timestamp, window_end):
+        """
+        Spend a unit from the local lease for ``keys``, leasing a new block
+        from Redis when needed. Returns the rejections for each quota.
+        """
+        lease_key = tuple(keys)
+        leases = self.__get_leases()
+
+        with self.__leases_lock:
+            lease = leases.get(lease_key)
+            if lease is not None and lease.remaining > 0 and timestamp < lease.expires:
+                lease.remaining -= 1
+                return []
+
+            # Lease keys include the window, so leases for other keys that
+            # have expired (e.g. because their window has ended) would
+            # otherwise never be removed.
+            expired = [
+                key
+                for key, other in six.iteritems(leases)
+                if key == lease_key or timestamp >= other.expires
+            ]
+            released = [leases.pop(key) for key in expired]
+
+        for lease in released:
+            self.__release_lease(lease, timestamp)
+
+        client = self.__get_redis_client(routing_key)
+        result = lease_quota(client, keys, [self.lease_size] + args)
+        granted, rejections = int(result[0]), result[1:]
+        if not granted:
+            return rejections
+
+        # One of the granted units is spent on this call.
+        if granted > 1:
+            lease = QuotaLease(
+                routing_key,
+                [(keys[i + 1], args[i + 1]) for i in range(0, len(keys), 2)],
+                granted - 1,
+                min(window_end, timestamp + self.lease_ttl),
+                window_end,
+            )
+            with self.__leases_lock:
+                existing = leases.get(lease_key)
+                if existing is not None:
+                    existing.remaining += lease.remaining
+                else:
+                    leases[lease_key] = lease
+
+        return []
+
+    def __release_lease(self, lease, timestamp):
+        # Units left over at the end of a window can't be spent by anyone.
+        if lease.remaining <= 0 or timestamp >= lease.window_end:
+            return
+
+        pipe = self.__get_redis_client(lease.routing_key).pipeline()
+        for return_key, expiry in lease.refunds:
+            pipe.incrby(return_key, lease.remaining)
+            pipe.expireat(return_key, expiry)
+        pipe.execute()
+
+    def release_leases(self, timestamp=None):
+        """
+        Return all unspent leased units to Redis.
+        """
+        if timestamp is None:
+            timestamp = time()
+
+        leases = self.__get_leases()
+        with self.__leases_lock:
+            released = list(leases.values())
+            leases.clear()
+
+        for lease in released:
+            self.__release_lease(lease, timestamp)
@@ -4,7 +4,7 @@ from django.conf import settings
 
 from sentry.utils.services import LazyServiceWrapper
 
-from .base import RateLimiter  # NOQA
+from .base import RateLimit, RateLimiter  # NOQA
 
 backend = LazyServiceWrapper(
     RateLimiter, settings.SENTRY_RATELIMITER, settings.SENTRY_RATELIMITER_OPTIONS
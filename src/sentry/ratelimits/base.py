@@ -1,12 +1,35 @@
 from __future__ import absolute_import
 
+from collections import namedtuple
+
 from sentry.utils.services import Service
 
+#: The result of checking a rate limit. ``remaining`` is the number of
+#: requests that would still be allowed right away, ``retry_after`` is the
+#: number of seconds until the next request is allowed, and ``reset`` is the
+#: number of seconds until the limit is fully reset. Backends that don't
+#: track these values report them as ``None``.
+RateLimit = namedtuple("RateLimit", "is_limited remaining retry_after reset")
+
 
 class RateLimiter(Service):
-    __all__ = ("is_limited", "validate")
+    __all__ = ("is_limited", "is_limited_multi", "validate")
 
     window = 60
 
     def is_limited(self, key, limit, project=None, window=None):
         return False
+
+    def is_limited_multi(self, requests, project=None):
+        """
+        Check several rate limits for a single action, where ``requests`` is
+        a sequence of ``(key, limit, window)`` tuples (``window`` may be
+        ``None`` to use the default window.) Returns a ``RateLimit`` for each
+        request, in the same order.
+
+        >>> is_limited_multi([('api:user:1', 40, 1), ('api:org:1', 1000, 60)])
+        """
+        return [
+            RateLimit(self.is_limited(key, limit, project, window), None, None, None)
+            for key, limit, window in requests
+        ]
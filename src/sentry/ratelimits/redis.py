@@ -2,19 +2,38 @@ from __future__ import absolute_import
 
 import six
 
+from collections import defaultdict
+from pkg_resources import resource_string
+from redis.client import Script
 from time import time
 
 from sentry.exceptions import InvalidConfiguration
-from sentry.ratelimits.base import RateLimiter
+from sentry.ratelimits.base import RateLimit, RateLimiter
 from sentry.utils.hashlib import md5_text
 from sentry.utils.redis import get_cluster_from_options
 
+GCRAScript = Script(None, resource_string("sentry", "scripts/ratelimits/gcra.lua"))
+
 
 class RedisRateLimiter(RateLimiter):
+    """
+    Sliding window rate limits, using the Generic Cell Rate Algorithm (see
+    ``scripts/ratelimits/gcra.lua``.)
+
+    All of the limits that are checked together are evaluated with a single
+    script call per Redis host. Keys that are known to be limited are
+    remembered by each process until they are expected to allow requests
+    again, and are rejected without calling Redis at all. Up to
+    ``max_local_keys`` of those keys are kept.
+    """
+
     window = 60
 
-    def __init__(self, **options):
+    def __init__(self, max_local_keys=10000, **options):
         self.cluster, options = get_cluster_from_options("SENTRY_RATELIMITER_OPTIONS", options)
+        self.max_local_keys = max_local_keys
+        # key => (timestamp the next request is allowed, timestamp the limit is reset)
+        self.__limited = {}
 
     def validate(self):
         try:
@@ -23,20 +42,76 @@ class RedisRateLimiter(RateLimiter):
         except Exception as e:
             raise InvalidConfiguration(six.text_type(e))
 
-    def is_limited(self, key, limit, project=None, window=None):
-        if window is None:
-            window = self.window
-
+    def _make_key(self, key, project=None):
         key_hex = md5_text(key).hexdigest()
-        bucket = int(time() / window)
 
         if project:
-            key = "rl:%s:%s:%s" % (key_hex, project.id, bucket)
+            return "rl:%s:%s" % (key_hex, project.id)
         else:
-            key = "rl:%s:%s" % (key_hex, bucket)
+            return "rl:%s" % (key_hex,)
+
+    def __remember_limited(self, key, now, retry_after, reset):
+        if len(self.__limited) >= self.max_local_keys:
+            expired = [k for k, (allowed, _) in six.iteritems(self.__limited) if allowed <= now]
+            for k in expired:
+                self.__limited.pop(k, None)
+            if len(self.__limited) >= self.max_local_keys:
+                self.__limited.clear()
+        self.__limited[key] = (now + retry_after, now + reset)
+
+    def is_limited(self, key, limit, project=None, window=None):
+        return self.is_limited_multi([(key, limit, window)], project=project)[0].is_limited
+
+    def is_limited_multi(self, requests, project=None):
+        now = time()
+
+        results = [None] * len(requests)
+        hosts = defaultdict(list)
+        router = self.cluster.get_router()
+        for index, (key, limit, window) in enumerate(requests):
+            if window is None:
+                window = self.window
+
+            key = self._make_key(key, project)
+
+            if limit <= 0:
+                results[index] = RateLimit(True, 0, None, None)
+                continue
+
+            limited = self.__limited.get(key)
+            if limited is not None:
+                allowed, reset = limited
+                if now < allowed:
+                    results[index] = RateLimit(True, 0, allowed - now, reset - now)
+                    continue
+                self.__limited.pop(key, None)
+
+            hosts[router.get_host_for_key(key)].append((index, key, limit, window))
+
+        # Keys are routed to hosts individually (so that a key is always
+        # stored on the same host, regardless of what other keys it is checked
+        # with), and all of the keys for a host are checked by the same script
+        # call, using the first key for routing.
+        commands = {}
+        batches = {}
+        for batch in six.itervalues(hosts):
+            routing_key = batch[0][1]
+            arguments = [int(now * 1000)]
+            for _, _, limit, window in batch:
+                arguments.extend((limit, int(window * 1000)))
+            commands[routing_key] = [
+                (GCRAScript, [batch_key for _, batch_key, _, _ in batch], arguments)
+            ]
+            batches[routing_key] = batch
 
-        with self.cluster.map() as client:
-            result = client.incr(key)
-            client.expire(key, window)
+        if commands:
+            for routing_key, responses in six.iteritems(self.cluster.execute_commands(commands)):
+                for (index, key, _, _), (limited, remaining, retry_after, reset) in zip(
+                    batches[routing_key], responses[0].value
+                ):
+                    retry_after, reset = retry_after / 1000.0, reset / 1000.0
+                    if limited:
+                        self.__remember_limited(key, now, retry_after, reset)
+                    results[index] = RateLimit(bool(limited), remaining, retry_after, reset)
 
-        return result.value > limit
+        return results
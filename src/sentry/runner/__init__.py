@@ -63,6 +63,7 @@ list(
             "sentry.runner.commands.queues.queues",
             "sentry.runner.commands.repair.repair",
             "sentry.runner.commands.run.run",
+            "sentry.runner.commands.similarity.similarity",
             "sentry.runner.commands.start.start",
             "sentry.runner.commands.tsdb.tsdb",
             "sentry.runner.commands.upgrade.upgrade",
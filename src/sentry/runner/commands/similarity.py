@@ -0,0 +1,160 @@
+from __future__ import absolute_import, print_function
+
+import os
+import time
+from datetime import timedelta
+
+import click
+
+from sentry.runner.decorators import configuration
+
+
+class RateLimiter(object):
+    """
+    Blocks the caller so that no more than ``rate`` units are consumed per
+    second, averaged over the lifetime of the limiter. A rate of zero (or
+    ``None``) disables limiting.
+    """
+
+    def __init__(self, rate, clock=time.time, sleep=time.sleep):
+        self.rate = rate
+        self.clock = clock
+        self.sleep = sleep
+        self.started = clock()
+        self.consumed = 0
+
+    def acquire(self, units=1):
+        self.consumed += units
+        if not self.rate:
+            return
+
+        delay = self.started + float(self.consumed) / self.rate - self.clock()
+        if delay > 0:
+            self.sleep(delay)
+
+
+def read_checkpoint(path):
+    if path is None or not os.path.exists(path):
+        return None
+
+    with open(path) as f:
+        value = f.read().strip()
+
+    return int(value) if value else None
+
+
+def write_checkpoint(path, group_id):
+    if path is None:
+        return
+
+    # Write to a temporary file first so that an interrupted write can't
+    # leave a truncated checkpoint behind.
+    temporary = u"{}.tmp".format(path)
+    with open(temporary, "w") as f:
+        f.write(u"{}\n".format(group_id))
+    os.rename(temporary, path)
+
+
+@click.group()
+def similarity():
+    """Tools for managing the similarity index."""
+    pass
+
+
+@similarity.command()
+@click.option("--project", "-p", "projects", type=int, multiple=True, help="Project ID to index.")
+@click.option(
+    "--days", default=30, show_default=True, help="Only index groups seen within this many days."
+)
+@click.option(
+    "--events-per-group",
+    default=5,
+    show_default=True,
+    help="Number of recent events to index for each group.",
+)
+@click.option(
+    "--batch-size",
+    default=100,
+    show_default=True,
+    help="Number of groups to write to the index at once.",
+)
+@click.option(
+    "--rate",
+    default=100.0,
+    show_default=True,
+    help="Maximum number of events to index per second (0 for unlimited.)",
+)
+@click.option("--resume-from", type=int, help="Only index groups with an ID greater than this.")
+@click.option(
+    "--checkpoint",
+    type=click.Path(dir_okay=False),
+    help="File used to store progress, allowing an interrupted backfill to be resumed.",
+)
+@configuration
+def backfill(projects, days, events_per_group, batch_size, rate, resume_from, checkpoint):
+    """
+    Index recent events for existing groups.
+
+    Only groups in projects with similarity indexing enabled (via the
+    ``projects:similarity-indexing`` feature) are indexed.
+
+    Groups are processed in ascending ID order. The ID of the last group in
+    each completed batch is printed (and written to the checkpoint file, if
+    provided), and can be passed to --resume-from to continue an interrupted
+    backfill. When a checkpoint file exists, it is used as the starting point
+    unless --resume-from is provided.
+    """
+    from django.utils import timezone
+    from sentry import eventstore, features as feature_flags
+    from sentry.models import Group
+    from sentry.similarity import features
+
+    if resume_from is None:
+        resume_from = read_checkpoint(checkpoint)
+
+    queryset = Group.objects.filter(last_seen__gte=timezone.now() - timedelta(days=days))
+    if projects:
+        queryset = queryset.filter(project_id__in=projects)
+
+    limiter = RateLimiter(rate)
+    cursor = resume_from or 0
+    indexed = 0
+    enabled = {}
+
+    while True:
+        groups = list(
+            queryset.filter(id__gt=cursor).select_related("project").order_by("id")[:batch_size]
+        )
+        if not groups:
+            break
+
+        events = []
+        for group in groups:
+            if group.project_id not in enabled:
+                enabled[group.project_id] = feature_flags.has(
+                    "projects:similarity-indexing", group.project
+                )
+            if not enabled[group.project_id]:
+                continue
+
+            group_events = eventstore.get_events(
+                filter=eventstore.Filter(project_ids=[group.project_id], group_ids=[group.id]),
+                limit=events_per_group,
+                referrer="similarity.backfill",
+            )
+            for event in group_events:
+                event.group = group
+                event.project = group.project
+            events.extend(group_events)
+
+        limiter.acquire(len(events))
+
+        eventstore.bind_nodes(events, "data")
+        features.record_many(events)
+        indexed += len(events)
+
+        cursor = groups[-1].id
+        write_checkpoint(checkpoint, cursor)
+        click.echo(u"Indexed {} events (last group ID: {})".format(indexed, cursor))
+
+    click.echo(u"Done.")
@@ -0,0 +1,19 @@
+-- Sets an extra value in a buffer hash, unless a value with a greater sort
+-- key has already been buffered for the same column.
+--
+-- KEYS[1]: buffer hash key
+-- ARGV[1]: column name
+-- ARGV[2]: sort key (a number)
+-- ARGV[3]: serialized value
+local key = KEYS[1]
+local column = ARGV[1]
+local sort_key = tonumber(ARGV[2])
+
+local current = redis.call('HGET', key, 'x+' .. column)
+if current and tonumber(current) > sort_key then
+    return 0
+end
+
+redis.call('HSET', key, 'x+' .. column, ARGV[2])
+redis.call('HSET', key, 'e+' .. column, ARGV[3])
+return 1
@@ -0,0 +1,51 @@
+-- Lease a block of units from a collection of quota counters. Values provided
+-- as ``KEYS`` specify the keys of the counters to check and the keys of
+-- counters to subtract, just as they are for ``is_rate_limited.lua``. The
+-- first value of ``ARGV`` is the number of units requested, followed by the
+-- maximum value (quota limit) and expiration time for each key.
+--
+-- For example, to lease up to 100 units from a quota ``foo`` that has a
+-- corresponding refund/negative counter "subtract_from_foo", a limit of 1000
+-- items and expires at the Unix timestamp ``100``, the ``KEYS`` and ``ARGV``
+-- values would be as follows:
+--
+--   KEYS = {"foo", "subtract_from_foo"}
+--   ARGV = {100, 1000, 100}
+--
+-- The number of units granted is the smallest number of units available in
+-- any of the quotas (up to the number requested), and all counters are
+-- incremented by that amount. The result is a Lua table/array (Redis multi
+-- bulk reply) where the first item is the number of units granted, followed
+-- by whether or not each quota was exhausted (and therefore *rejected* the
+-- lease.)
+assert(#KEYS + 1 == #ARGV, "incorrect number of keys and arguments provided")
+assert(#KEYS % 2 == 0, "there must be an even number of keys")
+
+local granted = tonumber(ARGV[1])
+local exhausted = {}
+for i=1, #KEYS, 2 do
+    local limit = tonumber(ARGV[i + 1])
+    local available = false
+    -- limit=-1 means "no limit"
+    if limit >= 0 then
+        available = limit - ((redis.call('GET', KEYS[i]) or 0) - (redis.call('GET', KEYS[i + 1]) or 0))
+        if available < granted then
+            granted = math.max(available, 0)
+        end
+    end
+    exhausted[(i + 1) / 2] = available ~= false and available < 1
+end
+
+local results = {granted}
+for i, rejected in ipairs(exhausted) do
+    results[i + 1] = rejected
+end
+
+if granted > 0 then
+    for i=1, #KEYS, 2 do
+        redis.call('INCRBY', KEYS[i], granted)
+        redis.call('EXPIREAT', KEYS[i], ARGV[i + 2])
+    end
+end
+
+return results
@@ -0,0 +1,44 @@
+-- Check a collection of rate limits using the Generic Cell Rate Algorithm
+-- (GCRA), a sliding window limiter that spaces requests out evenly over the
+-- window instead of resetting all of them at fixed window boundaries (which
+-- would allow twice the limit in a burst around each boundary.)
+--
+-- Each key stores the theoretical arrival time (TAT) of the next request, in
+-- milliseconds. Values provided as ``KEYS`` specify the keys of the limits to
+-- check, and values provided as ``ARGV`` specify the current time (in
+-- milliseconds), followed by the limit and window (in milliseconds) for each
+-- key. For example, to check a limit of 10 requests per minute for ``foo``
+-- and 100 requests per hour for ``bar``:
+--
+--   KEYS = {"foo", "bar"}
+--   ARGV = {1500000000000, 10, 60000, 100, 3600000}
+--
+-- Each limit is evaluated independently, and only limits that allow the
+-- request count it. The result is a Lua table/array (Redis multi bulk reply)
+-- containing a ``{limited, remaining, retry_after, reset}`` array for each key,
+-- where ``limited`` is 1 if the request was rejected, ``remaining`` is the
+-- number of requests that would still be allowed right away, ``retry_after``
+-- is the number of milliseconds until the next request is allowed, and
+-- ``reset`` is the number of milliseconds until the limit is fully reset.
+assert(#KEYS * 2 + 1 == #ARGV, "incorrect number of keys and arguments provided")
+
+local now = tonumber(ARGV[1])
+local results = {}
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[i * 2])
+    local window = tonumber(ARGV[i * 2 + 1])
+    local interval = window / limit
+
+    local tat = math.max(tonumber(redis.call('GET', key) or now), now)
+    local allow_at = tat + interval - window
+
+    if now < allow_at then
+        results[i] = {1, 0, math.ceil(allow_at - now), math.ceil(tat - now)}
+    else
+        tat = tat + interval
+        redis.call('SET', key, string.format('%.3f', tat), 'PX', math.ceil(tat - now))
+        results[i] = {0, math.floor((now - allow_at) / interval), 0, math.ceil(tat - now)}
+    end
+end
+
+return results
@@ -604,6 +604,21 @@ local function search(configuration, parameters, limit)
 end
 
 
+local function record(configuration, key, signatures)
+    return table.imap(
+        signatures,
+        function (signature)
+            set_frequencies(configuration, signature.index, key, signature.frequencies)
+            for band, buckets in ipairs(signature.frequencies) do
+                for bucket in pairs(buckets) do
+                    get_bucket_membership_set(configuration, signature.index, band, bucket):add(key)
+                end
+            end
+        end
+    )
+end
+
+
 -- Command Parsing
 
 local commands = {
@@ -618,15 +633,36 @@ local commands = {
             )
         )(cursor, arguments)
 
+        return record(configuration, key, signatures)
+    end,
+    RECORD_MANY = function (configuration, cursor, arguments)
+        --[[
+        Record signatures for many items within the same scope in a single
+        call. Each item provides its own timestamp (which is used in place of
+        the configuration timestamp when writing that item), key, and a
+        count-prefixed list of signatures.
+        ]]--
+        local cursor, items = variadic_argument_parser(
+            object_argument_parser({
+                {"timestamp", argument_parser(validate_number)},
+                {"key", argument_parser(validate_value)},
+                {"signatures", repeated_argument_parser(
+                    object_argument_parser({
+                        {"index", argument_parser(validate_value)},
+                        {"frequencies", frequencies_argument_parser(configuration)},
+                    })
+                )},
+            })
+        )(cursor, arguments)
+
         return table.imap(
-            signatures,
-            function (signature)
-                set_frequencies(configuration, signature.index, key, signature.frequencies)
-                for band, buckets in ipairs(signature.frequencies) do
-                    for bucket in pairs(buckets) do
-                        get_bucket_membership_set(configuration, signature.index, band, bucket):add(key)
-                    end
-                end
+            items,
+            function (item)
+                local item_configuration = setmetatable(
+                    {timestamp = item.timestamp},
+                    {__index = configuration}
+                )
+                record(item_configuration, item.key, item.signatures)
             end
         )
     end,
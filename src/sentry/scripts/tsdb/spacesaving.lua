@@ -0,0 +1,298 @@
+--[[
+
+Space-Saving
+============
+
+This provides a Redis-based implementation of the Space-Saving algorithm
+(Metwally, Agrawal and El Abbadi, "Efficient Computation of Frequent and Top-k
+Elements in Data Streams"), which maintains the approximate top-k items of a
+stream using a fixed number of counters.
+
+The summary is stored as a single sorted set that holds at most CAPACITY
+members. When an item that is not in the summary is observed while the summary
+is full, the member with the lowest score is evicted and the new item takes
+over its counter, inheriting the evicted score. Scores of monitored items are
+therefore never underestimated, and overestimated by at most the minimum score
+of the summary. Unlike the Count-Min sketch (see ``cmsketch.lua``), memory use
+is bounded by the capacity alone and no estimation matrix is kept, which makes
+it a better fit for long-tail distributions where most of the matrix would be
+spent on items that never make it to the top.
+
+The public API mirrors the Count-Min sketch script:
+
+- INCR: used to record observations of items,
+- ESTIMATE: used to query the number of times a specific item has been seen,
+- RANKED: used to query the top N items that have been recorded in a summary,
+- EXPORT/IMPORT: used to move summaries between keys.
+
+The named command to use is the first item passed as ``ARGV``, followed by the
+CAPACITY of the summary.
+
+The ``KEYS`` provided to each command are passed in pairs, using the same key
+layout as the Count-Min sketch so the two implementations can be swapped for a
+model without changing how keys are generated:
+
+- summary key (sorted set)
+- reserved key (unused)
+
+To add two items, "foo" with a score of 1, and "bar" with a score of 2 to two
+summaries with a capacity of 50:
+
+    EVALSHA $SHA 4 1:i 1:e 2:i 2:e INCR 50 1 foo 2 bar
+
+To query the top 10 items from the first summary:
+
+    EVALSHA $SHA 2 1:i 1:e RANKED 50 10
+
+]]--
+
+--[[ Helpers ]]--
+
+local function map(f, t)
+    local result = {}
+    for i, value in ipairs(t) do
+        result[i] = f(value)
+    end
+    return result
+end
+
+local function head(t)
+    return (
+        function (head, ...)
+            return head, {...}
+        end
+    )(unpack(t))
+end
+
+local function response_to_table(response)
+    local result = {}
+    for i = 1, #response, 2 do
+        result[response[i]] = response[i + 1]
+    end
+    return result
+end
+
+
+--[[ Summary ]]--
+
+local Summary = {}
+
+function Summary:new(capacity, key)
+    self.__index = self
+    return setmetatable({
+        capacity = capacity,
+        key = key
+    }, self)
+end
+
+function Summary:exists()
+    return redis.call('EXISTS', self.key) == 1
+end
+
+function Summary:estimate(value)
+    -- Items that are not being monitored are reported as zero, even though
+    -- they may have been observed up to the minimum score of the summary.
+    return tonumber(redis.call('ZSCORE', self.key, value)) or 0
+end
+
+function Summary:increment(items)
+    local results = {}
+    local size = redis.call('ZCARD', self.key)
+    for i, item in ipairs(items) do
+        local value, delta = unpack(item)
+        local score = tonumber(redis.call('ZSCORE', self.key, value))
+        if score ~= nil then
+            results[i] = tonumber(redis.call('ZINCRBY', self.key, delta, value))
+        elseif size < self.capacity then
+            redis.call('ZADD', self.key, delta, value)
+            size = size + 1
+            results[i] = delta
+        else
+            -- Replace the member with the lowest score, inheriting its score
+            -- (which is the maximum possible error for the new member.)
+            local minimum = redis.call('ZRANGE', self.key, 0, 0, 'WITHSCORES')
+            redis.call('ZREM', self.key, minimum[1])
+            score = tonumber(minimum[2]) + delta
+            redis.call('ZADD', self.key, score, value)
+            results[i] = score
+        end
+    end
+    return results
+end
+
+function Summary:export()
+    -- If there's no data, there's nothing meaningful to export.
+    if not self:exists() then
+        return cmsgpack.pack(nil)
+    end
+    return cmsgpack.pack(response_to_table(redis.call('ZRANGE', self.key, 0, -1, 'WITHSCORES')))
+end
+
+function Summary:import(payload)
+    local data = cmsgpack.unpack(payload)
+    if data == nil then
+        return  -- nothing to do here
+    end
+
+    local items = {}
+    for value, score in pairs(data) do
+        table.insert(items, {value, tonumber(score)})
+    end
+
+    -- Merge the highest scores first, so that they are least likely to be
+    -- evicted by the lower scoring members of the source.
+    table.sort(items, function (x, y) return x[2] > y[2] end)
+    self:increment(items)
+end
+
+
+--[[ Redis API ]]--
+
+local Command = {}
+
+function Command:new(fn)
+    return function (keys, arguments)
+        local capacity, arguments = head(arguments)
+        capacity = tonumber(capacity)
+        assert(capacity > 0, 'The capacity must be positive and nonzero.')
+
+        local summaries = {}
+        for i = 1, #keys, 2 do
+            table.insert(summaries, Summary:new(capacity, keys[i]))
+        end
+        return fn(summaries, arguments)
+    end
+end
+
+
+local Router = {}
+
+function Router:new(commands)
+    return function (keys, arguments)
+        local name, arguments = head(arguments)
+        return commands[name:upper()](keys, arguments)
+    end
+end
+
+
+return Router:new({
+
+    --[[
+    Increment the number of observations for each item in all summaries.
+    ]]--
+    INCR = Command:new(
+        function (summaries, arguments)
+            local items = {}
+            for i = 1, #arguments, 2 do
+                local delta = tonumber(arguments[i])
+                assert(delta > 0, 'The increment value must be positive and nonzero.')
+
+                local value = arguments[i + 1]
+                table.insert(items, {value, delta})
+            end
+
+            return map(
+                function (summary)
+                    return summary:increment(items)
+                end,
+                summaries
+            )
+        end
+    ),
+
+    --[[
+    Estimate the number of observations for each item in all summaries,
+    returning a sequence containing scores for items in the order that they
+    were provided for each summary.
+    ]]--
+    ESTIMATE = Command:new(
+        function (summaries, values)
+            return map(
+                function (summary)
+                    return map(
+                        function (value)
+                            return string.format('%s', summary:estimate(value))
+                        end,
+                        values
+                    )
+                end,
+                summaries
+            )
+        end
+    ),
+
+    --[[
+    Find the most frequently observed items across all summaries, returning a
+    sequence of item, score pairs.
+    ]]--
+    RANKED = Command:new(
+        function (summaries, arguments)
+            local limit = tonumber(arguments[1]) or summaries[1].capacity
+
+            if #summaries == 1 then
+                local results = {}
+                -- Note that the ZREVRANGE bounds are *inclusive*, so the limit
+                -- needs to be reduced by one to act as a typical slice bound.
+                local members = redis.call('ZREVRANGE', summaries[1].key, 0, limit - 1, 'WITHSCORES')
+                for i = 1, #members, 2 do
+                    table.insert(results, {members[i], string.format('%s', members[i + 1])})
+                end
+                return results
+            end
+
+            local scores = {}
+            for _, summary in ipairs(summaries) do
+                local members = redis.call('ZRANGE', summary.key, 0, -1, 'WITHSCORES')
+                for i = 1, #members, 2 do
+                    scores[members[i]] = (scores[members[i]] or 0) + tonumber(members[i + 1])
+                end
+            end
+
+            local results = {}
+            for value, score in pairs(scores) do
+                table.insert(results, {value, score})
+            end
+
+            table.sort(
+                results,
+                function (x, y)
+                    if x[2] == y[2] then
+                        return x[1] < y[1]  -- lexicographically by key ascending
+                    else
+                        return x[2] > y[2]  -- score descending
+                    end
+                end
+            )
+
+            -- Trim the results to the limit.
+            local trimmed = {}
+            for i = 1, math.min(limit, #results) do
+                local item, score = unpack(results[i])
+                trimmed[i] = {item, string.format('%s', score)}
+            end
+            return trimmed
+        end
+    ),
+
+    EXPORT = Command:new(
+        function (summaries, arguments)
+            return map(
+                function (summary)
+                    return summary:export()
+                end,
+                summaries
+            )
+        end
+    ),
+
+    IMPORT = Command:new(
+        function (summaries, arguments)
+            local results = {}
+            for i, summary in ipairs(summaries) do
+                results[i] = summary:import(arguments[i])
+            end
+            return results
+        end
+    ),
+
+})(KEYS, ARGV)
@@ -0,0 +1,32 @@
+--[[
+
+Atomically acquire one or more locks.
+
+The last key is a counter that is used to generate fencing tokens, and all
+preceding keys are the locks to be acquired. Either all of the locks are
+acquired, or none of them are.
+
+ARGV[1] is the value to store in each lock (identifying the owner), and
+ARGV[2] is the duration of the locks in seconds.
+
+On success, returns a fencing token (a number that is greater than any token
+previously returned from this server.) If any of the locks are already held,
+no locks are acquired and an error is returned.
+
+]]--
+
+local counter = KEYS[#KEYS]
+local uuid = ARGV[1]
+local duration = tonumber(ARGV[2])
+
+for i = 1, #KEYS - 1 do
+    if redis.call('EXISTS', KEYS[i]) == 1 then
+        return redis.error_reply(string.format("Could not set key: %s", KEYS[i]))
+    end
+end
+
+for i = 1, #KEYS - 1 do
+    redis.call('SET', KEYS[i], uuid, 'EX', duration)
+end
+
+return redis.call('INCR', counter)
@@ -2,11 +2,12 @@ from __future__ import absolute_import
 
 import functools
 import logging
+import math
 import time
 from datetime import timedelta
 from hashlib import md5
 
-from django.db.models import Q
+from django.db.models import Model, Q
 from django.utils import timezone
 
 from sentry import options, quotas
@@ -16,6 +17,8 @@ from sentry.constants import ALLOWED_FUTURE_DELTA
 from sentry.models import Group, Release, GroupEnvironment
 from sentry.search.base import SearchBackend
 from sentry.utils import snuba, metrics
+from sentry.utils.cache import cache
+from sentry.utils.hashlib import md5_text
 
 logger = logging.getLogger("sentry.search.snuba")
 datetime_format = "%Y-%m-%dT%H:%M:%S+00:00"
@@ -56,6 +59,11 @@ issue_only_fields = set(
 )
 
 
+# When a hit ratio for the post-filter is known, chunks are sized to be
+# expected to contain this many times the number of results still needed.
+CHUNK_HIT_RATIO_MARGIN = 1.25
+
+
 class QuerySetBuilder(object):
     def __init__(self, conditions):
         self.conditions = conditions
@@ -124,6 +132,66 @@ class ScalarCondition(Condition):
         return qs_method(**q_dict)
 
 
+def _get_cache_value(value):
+    if isinstance(value, (list, tuple)):
+        return [_get_cache_value(v) for v in value]
+    elif isinstance(value, Model):
+        return [type(value).__name__, value.pk]
+    return value
+
+
+def get_search_cache_key(prefix, projects, environments, search_filters, *extra):
+    """
+    Returns a cache key for values that depend on the projects, environments
+    and search filters of a query (as well as any ``extra`` values.)
+    Filters are identified by their values, so equivalent queries made by
+    different requests share a key.
+    """
+    return u"snuba-search:{}:{}".format(
+        prefix,
+        md5_text(
+            repr(
+                [
+                    sorted(p.id for p in projects),
+                    sorted(e.id for e in environments) if environments is not None else None,
+                    sorted(
+                        repr([sf.key.name, sf.operator, _get_cache_value(sf.value.raw_value)])
+                        for sf in search_filters
+                    ),
+                    list(extra),
+                ]
+            )
+        ).hexdigest(),
+    )
+
+
+def get_chunk_limit(chunk_limit, chunk_growth, max_chunk_size, remaining, hit_ratio=None):
+    """
+    Returns the size of the next chunk to request from Snuba when
+    post-filtering. Chunks grow by at least ``chunk_growth`` each time, and
+    if the ratio of Snuba results that pass the post-filter is known, they
+    are sized to be expected to contain the ``remaining`` results needed.
+    """
+    chunk_limit = int(chunk_limit * chunk_growth)
+    if hit_ratio is not None:
+        if hit_ratio > 0:
+            chunk_limit = max(
+                chunk_limit, int(math.ceil(remaining * CHUNK_HIT_RATIO_MARGIN / hit_ratio))
+            )
+        else:
+            chunk_limit = max_chunk_size
+    return min(chunk_limit, max_chunk_size)
+
+
+def record_search_path(path, round_trips):
+    """
+    Records which strategy was used to answer a search, and the number of
+    queries (to either Postgres or Snuba) that it took.
+    """
+    metrics.incr("snuba.search.path", tags={"path": path}, skip_internal=False)
+    metrics.timing("snuba.search.round_trips", round_trips, tags={"path": path})
+
+
 def assigned_to_filter(actor, projects):
     from sentry.models import OrganizationMember, OrganizationMemberTeam, Team
 
@@ -364,7 +432,13 @@ class SnubaSearchBackend(SearchBackend):
                 ]
             ):
                 group_queryset = group_queryset.order_by("-last_seen")
-                paginator = DateTimePaginator(group_queryset, "-last_seen", **paginator_options)
+                paginator = DateTimePaginator(
+                    group_queryset,
+                    "-last_seen",
+                    estimate_hits=options.get("snuba.search.estimate-hits"),
+                    **paginator_options
+                )
+                record_search_path("postgres", 2 if count_hits else 1)
                 # When its a simple django-only search, we count_hits like normal
                 return paginator.get_result(limit, cursor, count_hits=count_hits)
 
@@ -400,11 +474,33 @@ class SnubaSearchBackend(SearchBackend):
         # clause.
         max_candidates = options.get("snuba.search.max-pre-snuba-candidates")
         too_many_candidates = False
-        candidate_ids = list(group_queryset.values_list("id", flat=True)[: max_candidates + 1])
+        round_trips = 0
+
+        # The candidates only depend on the filters that are applied in
+        # Postgres, and may optionally be reused for a short time by
+        # subsequent queries (e.g. when paginating, or changing the sort.)
+        candidates_cache_ttl = options.get("snuba.search.candidates-cache-ttl")
+        candidates_cache_key = get_search_cache_key(
+            "c",
+            projects,
+            environments,
+            [sf for sf in search_filters if sf.key.name in issue_only_fields],
+            max_candidates,
+        )
+        candidate_ids = cache.get(candidates_cache_key) if candidates_cache_ttl else None
+        if candidate_ids is None:
+            round_trips += 1
+            candidate_ids = list(group_queryset.values_list("id", flat=True)[: max_candidates + 1])
+            if candidates_cache_ttl:
+                cache.set(candidates_cache_key, candidate_ids, candidates_cache_ttl)
+        else:
+            metrics.incr("snuba.search.candidates_cache_hit", skip_internal=False)
+
         metrics.timing("snuba.search.num_candidates", len(candidate_ids))
         if not candidate_ids:
             # no matches could possibly be found from this point on
             metrics.incr("snuba.search.no_candidates", skip_internal=False)
+            record_search_path("empty", round_trips)
             return EMPTY_RESULT
         elif len(candidate_ids) > max_candidates:
             # If the pre-filter query didn't include anything to significantly
@@ -424,6 +520,17 @@ class SnubaSearchBackend(SearchBackend):
         chunk_growth = options.get("snuba.search.chunk-growth-rate")
         max_chunk_size = options.get("snuba.search.max-chunk-size")
         chunk_limit = limit
+
+        # The ratio of Snuba results that pass the post-filter, as observed
+        # by previous queries. Sparse filters (with a low ratio) can then be
+        # answered in fewer, larger chunks.
+        hit_ratio_cache_ttl = options.get("snuba.search.hit-ratio-cache-ttl")
+        hit_ratio_cache_key = get_search_cache_key(
+            "hr", projects, environments, search_filters, sort_by
+        )
+        hit_ratio = None
+        if too_many_candidates and hit_ratio_cache_ttl:
+            hit_ratio = cache.get(hit_ratio_cache_key)
         offset = 0
         num_chunks = 0
         hits = None
@@ -469,6 +576,7 @@ class SnubaSearchBackend(SearchBackend):
             # +/-10% @ 95% confidence.
 
             sample_size = options.get("snuba.search.hits-sample-size")
+            round_trips += 1
             snuba_groups, snuba_total = snuba_search(
                 start=start,
                 end=end,
@@ -482,14 +590,18 @@ class SnubaSearchBackend(SearchBackend):
             )
             snuba_count = len(snuba_groups)
             if snuba_count == 0:
+                record_search_path("empty", round_trips)
                 return EMPTY_RESULT
             else:
+                round_trips += 1
                 filtered_count = group_queryset.filter(
                     id__in=[gid for gid, _ in snuba_groups]
                 ).count()
 
-                hit_ratio = filtered_count / float(snuba_count)
-                hits = int(hit_ratio * snuba_total)
+                sample_hit_ratio = filtered_count / float(snuba_count)
+                hits = int(sample_hit_ratio * snuba_total)
+                if too_many_candidates:
+                    hit_ratio = sample_hit_ratio
 
         # Do smaller searches in chunks until we have enough results
         # to answer the query (or hit the end of possible results). We do
@@ -502,11 +614,18 @@ class SnubaSearchBackend(SearchBackend):
 
             # grow the chunk size on each iteration to account for huge projects
             # and weird queries, up to a max size
-            chunk_limit = min(int(chunk_limit * chunk_growth), max_chunk_size)
+            chunk_limit = get_chunk_limit(
+                chunk_limit,
+                chunk_growth,
+                max_chunk_size,
+                limit - len(paginator_results.results),
+                hit_ratio,
+            )
             # but if we have candidate_ids always query for at least that many items
             chunk_limit = max(chunk_limit, len(candidate_ids))
 
             # {group_id: group_score, ...}
+            round_trips += 1
             snuba_groups, total = snuba_search(
                 start=start,
                 end=end,
@@ -539,6 +658,7 @@ class SnubaSearchBackend(SearchBackend):
             else:
                 # pre-filtered candidates were *not* passed down to Snuba,
                 # so we need to do post-filtering to verify Sentry DB predicates
+                round_trips += 1
                 filtered_group_ids = group_queryset.filter(
                     id__in=[gid for gid, _ in snuba_groups]
                 ).values_list("id", flat=True)
@@ -556,6 +676,8 @@ class SnubaSearchBackend(SearchBackend):
                     result_group_ids.add(group_id)
                     result_groups.append((group_id, group_score))
 
+                hit_ratio = len(result_groups) / float(offset)
+
             # TODO do we actually have to rebuild this SequencePaginator every time
             # or can we just make it after we've broken out of the loop?
             paginator_results = SequencePaginator(
@@ -590,6 +712,13 @@ class SnubaSearchBackend(SearchBackend):
 
         metrics.timing("snuba.search.num_chunks", num_chunks)
 
+        if too_many_candidates:
+            record_search_path("post_filter", round_trips)
+            if hit_ratio is not None and hit_ratio_cache_ttl:
+                cache.set(hit_ratio_cache_key, hit_ratio, hit_ratio_cache_ttl)
+        else:
+            record_search_path("candidates", round_trips)
+
         groups = Group.objects.in_bulk(paginator_results.results)
         paginator_results.results = [groups[k] for k in paginator_results.results if k in groups]
 
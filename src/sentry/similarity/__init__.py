@@ -2,10 +2,13 @@ from __future__ import absolute_import
 
 import itertools
 import logging
+import six
 
 from django.conf import settings
+from django.core.cache import cache
 
 from sentry.interfaces.stacktrace import Frame
+from sentry.similarity.backends.cache import CacheWrapper
 from sentry.similarity.backends.dummy import DummyIndexBackend
 from sentry.similarity.backends.metrics import MetricsWrapper
 from sentry.similarity.backends.redis import RedisScriptMinHashIndexBackend
@@ -26,6 +29,10 @@ logger = logging.getLogger(__name__)
 
 
 def text_shingle(n, value):
+    if isinstance(value, six.text_type):
+        # Slicing the string directly produces the same shingles as joining
+        # each window of characters, without creating the intermediate tuples.
+        return [value[i : i + n] for i in range(len(value) - n + 1)]
     return itertools.imap(u"".join, shingle(n, value))
 
 
@@ -70,11 +77,14 @@ def _make_index_backend(cluster=None):
             logger.info(u"No redis cluster provided for similarity, using {!r}.".format(index))
             return index
 
-    return MetricsWrapper(
-        RedisScriptMinHashIndexBackend(
-            cluster, "sim:1", MinHashSignatureBuilder(16, 0xFFFF), 8, 60 * 60 * 24 * 30, 3, 5000
+    return CacheWrapper(
+        MetricsWrapper(
+            RedisScriptMinHashIndexBackend(
+                cluster, "sim:1", MinHashSignatureBuilder(16, 0xFFFF), 8, 60 * 60 * 24 * 30, 3, 5000
+            ),
+            scope_tag_name="project_id",
         ),
-        scope_tag_name="project_id",
+        cache,
     )
 
 
@@ -19,6 +19,17 @@ class AbstractIndexBackend(object):
     def record(self, scope, key, items, timestamp=None):
         pass
 
+    def record_many(self, scope, requests, timestamp=None):
+        """
+        Record many items within a scope at once. ``requests`` is a sequence
+        of ``(key, items, timestamp)`` tuples, where ``items`` uses the same
+        format as ``record`` and a ``timestamp`` of ``None`` defaults to the
+        ``timestamp`` argument. Backends that can write batches more
+        efficiently should override this.
+        """
+        for key, items, ts in requests:
+            self.record(scope, key, items, timestamp=ts if ts is not None else timestamp)
+
     @abstractmethod
     def merge(self, scope, destination, items, timestamp=None):
         pass
@@ -0,0 +1,259 @@
+from __future__ import absolute_import
+
+import hashlib
+
+from sentry.similarity.backends.abstract import AbstractIndexBackend
+from sentry.utils.metrics import incr
+
+
+class CacheWrapper(AbstractIndexBackend):
+    """
+    Caches the results of ``compare`` for each key, so that repeatedly
+    viewing the similar issues for a group does not require searching the
+    index every time.
+
+    Cached results for a key are invalidated whenever that key, or any key
+    that is included in its results, is written to (via ``record``,
+    ``merge``, ``delete``, etc.) Keys that are written to for the first time
+    may become part of the results for a key without invalidating them, so
+    results may be up to ``ttl`` seconds (or ``hot_ttl`` seconds, for hot
+    keys) stale.
+
+    Keys that are compared at least ``hot_threshold`` times within
+    ``hot_ttl`` seconds are considered "hot": their results are retained for
+    ``hot_ttl`` seconds instead, and are recomputed in the background (no
+    more than once every ``refresh_delay`` seconds) when they are
+    invalidated, so that they are always served from the cache.
+    """
+
+    def __init__(
+        self,
+        backend,
+        cache,
+        ttl=60,
+        hot_ttl=60 * 5,
+        hot_threshold=5,
+        refresh_delay=60,
+        namespace="sim:c",
+    ):
+        self.backend = backend
+        self.cache = cache
+        self.ttl = ttl
+        self.hot_ttl = hot_ttl
+        self.hot_threshold = hot_threshold
+        self.refresh_delay = refresh_delay
+        self.namespace = namespace
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def __get_cache_key(self, scope, key):
+        return u"{}:{}:{}".format(self.namespace, scope, key)
+
+    def __get_hits_key(self, scope, key):
+        return u"{}:h:{}:{}".format(self.namespace, scope, key)
+
+    def __get_dependents_key(self, scope, key):
+        return u"{}:n:{}:{}".format(self.namespace, scope, key)
+
+    def __get_request_signature(self, items, limit):
+        return hashlib.md5(
+            repr(([tuple(item) for item in items], limit)).encode("utf-8")
+        ).hexdigest()
+
+    def __hit(self, scope, key):
+        # Hits are counted separately from the entry, so that concurrent
+        # comparisons aren't lost.
+        hits_key = self.__get_hits_key(scope, key)
+        if self.cache.add(hits_key, 1, self.hot_ttl):
+            return 1
+        try:
+            return self.cache.incr(hits_key)
+        except ValueError:
+            # The counter expired since it was added.
+            self.cache.set(hits_key, 1, self.hot_ttl)
+            return 1
+
+    def __store(self, scope, key, entry, hits):
+        self.cache.set(
+            self.__get_cache_key(scope, key),
+            entry,
+            self.hot_ttl if hits >= self.hot_threshold else self.ttl,
+        )
+
+        # Register the key as a dependent of each of the keys in its
+        # results, so that writes to those keys invalidate it. (Concurrent
+        # registrations may be lost, which is bounded by the TTL.)
+        neighbours = set()
+        for items, limit, results in entry["results"].values():
+            neighbours.update(other for other, scores in results or [] if other != key)
+        if not neighbours:
+            return
+
+        dependents_keys = {self.__get_dependents_key(scope, other) for other in neighbours}
+        dependents = self.cache.get_many(list(dependents_keys))
+        updates = {}
+        for dependents_key in dependents_keys:
+            value = dependents.get(dependents_key, frozenset())
+            if key not in value:
+                updates[dependents_key] = value | frozenset([key])
+        if updates:
+            self.cache.set_many(updates, self.hot_ttl)
+
+    def __invalidate(self, scope, keys):
+        keys = set(keys)
+
+        # Most keys that are written to have never been compared (and aren't
+        # in the results for any other key), so they are checked with a single
+        # request, and nothing else is done for them.
+        dependents_keys = {self.__get_dependents_key(scope, key): key for key in keys}
+        cache_keys = {self.__get_cache_key(scope, key): key for key in keys}
+        values = self.cache.get_many(list(dependents_keys.keys()) + list(cache_keys.keys()))
+        if not values:
+            return
+
+        entries = {}
+        dependents = set()
+        found_dependents_keys = []
+        for cache_key, value in values.items():
+            if cache_key in dependents_keys:
+                dependents.update(value)
+                found_dependents_keys.append(cache_key)
+            else:
+                entries[cache_key] = value
+
+        if found_dependents_keys:
+            self.cache.delete_many(found_dependents_keys)
+
+        dependents -= keys
+        if dependents:
+            dependent_cache_keys = {self.__get_cache_key(scope, key): key for key in dependents}
+            entries.update(self.cache.get_many(list(dependent_cache_keys.keys())))
+            cache_keys.update(dependent_cache_keys)
+
+        if not entries:
+            return
+
+        hits = self.cache.get_many(
+            [self.__get_hits_key(scope, cache_keys[cache_key]) for cache_key in entries]
+        )
+
+        expired = []
+        for cache_key, entry in entries.items():
+            key = cache_keys[cache_key]
+            key_hits = hits.get(self.__get_hits_key(scope, key), 0)
+            if key_hits >= self.hot_threshold:
+                # Keep the requests around (so that they can be recomputed)
+                # while discarding the results, which are now out of date.
+                entry["results"] = {
+                    signature: (items, limit, None)
+                    for signature, (items, limit, results) in entry["results"].items()
+                }
+                self.__store(scope, key, entry, key_hits)
+                self.__schedule_refresh(scope, key)
+            else:
+                expired.append(cache_key)
+
+        if expired:
+            self.cache.delete_many(expired)
+
+    def __schedule_refresh(self, scope, key):
+        from sentry.tasks.similarity import refresh_similarity_cache
+
+        # Debounce refreshes so that a hot key that is being written to
+        # frequently isn't searched for every write.
+        if self.cache.add(
+            u"{}:r:{}:{}".format(self.namespace, scope, key), True, self.refresh_delay
+        ):
+            refresh_similarity_cache.apply_async(
+                kwargs={"scope": scope, "key": key}, countdown=self.refresh_delay
+            )
+
+    def refresh(self, scope, key):
+        """
+        Recompute the cached results for all previously requested
+        comparisons of a key.
+        """
+        entry = self.cache.get(self.__get_cache_key(scope, key))
+        if entry is None:
+            return
+
+        for signature, (items, limit, results) in entry["results"].items():
+            if results is None:
+                entry["results"][signature] = (
+                    items,
+                    limit,
+                    self.backend.compare(scope, key, items, limit=limit),
+                )
+
+        self.__store(scope, key, entry, self.cache.get(self.__get_hits_key(scope, key), 0))
+
+    def compare(self, scope, key, items, limit=None, timestamp=None):
+        if timestamp is not None:
+            # Comparisons at a specific point in time aren't cached.
+            return self.backend.compare(scope, key, items, limit=limit, timestamp=timestamp)
+
+        hits = self.__hit(scope, key)
+
+        entry = self.cache.get(self.__get_cache_key(scope, key))
+        if entry is None:
+            entry = {"results": {}}
+
+        signature = self.__get_request_signature(items, limit)
+        results = entry["results"].get(signature, (None, None, None))[2]
+        if results is None:
+            incr("similarity.cache.miss")
+            results = self.backend.compare(scope, key, items, limit=limit)
+            entry["results"][signature] = (items, limit, results)
+            self.__store(scope, key, entry, hits)
+        else:
+            incr("similarity.cache.hit")
+            if hits == self.hot_threshold:
+                # Retain the results for longer now that the key is hot.
+                self.__store(scope, key, entry, hits)
+
+        return results
+
+    def classify(self, scope, items, limit=None, timestamp=None):
+        return self.backend.classify(scope, items, limit=limit, timestamp=timestamp)
+
+    def record(self, scope, key, items, timestamp=None):
+        try:
+            return self.backend.record(scope, key, items, timestamp=timestamp)
+        finally:
+            self.__invalidate(scope, [key])
+
+    def record_many(self, scope, requests, timestamp=None):
+        try:
+            return self.backend.record_many(scope, requests, timestamp=timestamp)
+        finally:
+            self.__invalidate(scope, [key for key, items, ts in requests])
+
+    def merge(self, scope, destination, items, timestamp=None):
+        try:
+            return self.backend.merge(scope, destination, items, timestamp=timestamp)
+        finally:
+            self.__invalidate(scope, [destination] + [source for idx, source in items])
+
+    def delete(self, scope, items, timestamp=None):
+        try:
+            return self.backend.delete(scope, items, timestamp=timestamp)
+        finally:
+            self.__invalidate(scope, [key for idx, key in items])
+
+    def scan(self, scope, indices, batch=1000, timestamp=None):
+        return self.backend.scan(scope, indices, batch=batch, timestamp=timestamp)
+
+    def flush(self, scope, indices, batch=1000, timestamp=None):
+        # Flushes can't be invalidated by key, so cached results expire
+        # naturally after their TTL.
+        return self.backend.flush(scope, indices, batch=batch, timestamp=timestamp)
+
+    def export(self, scope, items, timestamp=None):
+        return self.backend.export(scope, items, timestamp=timestamp)
+
+    def import_(self, scope, items, timestamp=None):
+        try:
+            return self.backend.import_(scope, items, timestamp=timestamp)
+        finally:
+            self.__invalidate(scope, [key for idx, key, data in items])
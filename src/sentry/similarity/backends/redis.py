@@ -143,6 +143,36 @@ class RedisScriptMinHashIndexBackend(AbstractIndexBackend):
 
         return self.__index(scope, arguments)
 
+    def record_many(self, scope, requests, timestamp=None):
+        # All of the keys within a scope share the same hash tag, so they are
+        # stored on the same host and can be written with one script call
+        # regardless of how many keys (or timestamps) are included.
+        requests = [(key, items, ts) for key, items, ts in requests if items]
+        if not requests:
+            return  # nothing to do
+
+        if timestamp is None:
+            timestamp = int(time.time())
+
+        arguments = [
+            "RECORD_MANY",
+            timestamp,
+            self.namespace,
+            self.bands,
+            self.interval,
+            self.retention,
+            self.candidate_set_limit,
+            scope,
+        ]
+
+        for key, items, ts in requests:
+            arguments.extend([ts if ts is not None else timestamp, key, len(items)])
+            for idx, features in items:
+                arguments.append(idx)
+                arguments.extend(self._build_signature_arguments(features))
+
+        return self.__index(scope, arguments)
+
     def merge(self, scope, destination, items, timestamp=None):
         if timestamp is None:
             timestamp = int(time.time())
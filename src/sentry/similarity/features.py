@@ -96,6 +96,25 @@ class FeatureSet(object):
                 )
         return results
 
+    def __get_record_items(self, event):
+        items = []
+        for label, features in self.extract(event).items():
+            try:
+                features = map(self.encoder.dumps, features)
+            except Exception as error:
+                log = (
+                    logger.debug
+                    if isinstance(error, self.expected_encoding_errors)
+                    else functools.partial(logger.warning, exc_info=True)
+                )
+                log(
+                    "Could not encode features from %r for %r due to error: %r", event, label, error
+                )
+            else:
+                if features:
+                    items.append((self.aliases[label], features))
+        return items
+
     def record(self, events):
         if not events:
             return []
@@ -107,41 +126,49 @@ class FeatureSet(object):
         for event in events:
             if not event.group_id:
                 continue
-            for label, features in self.extract(event).items():
-                if scope is None:
-                    scope = self.__get_scope(event.project)
-                else:
-                    assert (
-                        self.__get_scope(event.project) == scope
-                    ), "all events must be associated with the same project"
 
-                if key is None:
-                    key = self.__get_key(event.group)
-                else:
-                    assert (
-                        self.__get_key(event.group) == key
-                    ), "all events must be associated with the same group"
+            event_items = self.__get_record_items(event)
+            if not event_items:
+                continue
 
-                try:
-                    features = map(self.encoder.dumps, features)
-                except Exception as error:
-                    log = (
-                        logger.debug
-                        if isinstance(error, self.expected_encoding_errors)
-                        else functools.partial(logger.warning, exc_info=True)
-                    )
-                    log(
-                        "Could not encode features from %r for %r due to error: %r",
-                        event,
-                        label,
-                        error,
-                    )
-                else:
-                    if features:
-                        items.append((self.aliases[label], features))
+            if scope is None:
+                scope = self.__get_scope(event.project)
+            else:
+                assert (
+                    self.__get_scope(event.project) == scope
+                ), "all events must be associated with the same project"
+
+            if key is None:
+                key = self.__get_key(event.group)
+            else:
+                assert (
+                    self.__get_key(event.group) == key
+                ), "all events must be associated with the same group"
+
+            items.extend(event_items)
 
         return self.index.record(scope, key, items, timestamp=int(to_timestamp(event.datetime)))
 
+    def record_many(self, events):
+        """
+        Record events that may belong to many different groups (and projects.)
+        Each event is recorded at its own timestamp, and all events within a
+        project are written to the index with a single request.
+        """
+        scopes = {}
+        for event in events:
+            if not event.group_id:
+                continue
+
+            items = self.__get_record_items(event)
+            if items:
+                scopes.setdefault(self.__get_scope(event.project), []).append(
+                    (self.__get_key(event.group), items, int(to_timestamp(event.datetime)))
+                )
+
+        for scope, requests in scopes.items():
+            self.index.record_many(scope, requests)
+
     def classify(self, events, limit=None, thresholds=None):
         if not events:
             return []
@@ -1,5 +1,7 @@
 from __future__ import absolute_import
 
+import itertools
+
 import mmh3
 
 
@@ -9,9 +11,14 @@ class MinHashSignatureBuilder(object):
         self.rows = rows
 
     def __call__(self, features):
-        return map(
-            lambda column: min(
-                map(lambda feature: mmh3.hash(feature, column) % self.rows, features)
-            ),
-            range(self.columns),
-        )
+        # The minimum of a column doesn't depend on how many times a feature
+        # occurs, so each distinct feature only needs to be hashed once per
+        # column. The hashing and reduction of each column is done by
+        # composing builtins (rather than Python level lambdas), which keeps
+        # the per-feature work out of the interpreter loop.
+        features = list(set(features))
+        reduce_to_row = self.rows.__rmod__
+        return [
+            min(map(reduce_to_row, map(mmh3.hash, features, itertools.repeat(column))))
+            for column in range(self.columns)
+        ]
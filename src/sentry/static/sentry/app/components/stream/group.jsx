@@ -115,10 +115,10 @@ const StreamGroup = createReactClass({
           <GroupChart id={data.id} statsPeriod={this.props.statsPeriod} data={data} />
         </Box>
         <Flex w={[40, 60, 80, 80]} mx={2} justify="flex-end">
-          <StyledCount value={data.count} />
+          {data.count !== null ? <StyledCount value={data.count} /> : '\u2014'}
         </Flex>
         <Flex w={[40, 60, 80, 80]} mx={2} justify="flex-end">
-          <StyledCount value={data.userCount} />
+          {data.userCount !== null ? <StyledCount value={data.userCount} /> : '\u2014'}
         </Flex>
         <Box w={80} mx={2} className="hidden-xs hidden-sm">
           <AssigneeSelector id={data.id} memberList={memberList} />
@@ -44,6 +44,7 @@ class TagStorage(Service):
             "get_group_list_tag_value",
             "get_tag_keys_for_projects",
             "get_groups_user_counts",
+            "prepare_groups_user_counts",
             "get_group_event_filter",
             "get_group_tag_value_count",
             "get_top_group_tag_values",
@@ -59,6 +60,7 @@ class TagStorage(Service):
             "get_group_tag_value_iter",
             "get_group_tag_value_qs",
             "get_group_seen_values_for_environments",
+            "prepare_group_seen_values_for_environments",
         ]
     )
 
@@ -238,6 +240,15 @@ class TagStorage(Service):
         """
         raise NotImplementedError
 
+    def prepare_groups_user_counts(
+        self, project_ids, group_ids, environment_ids, start=None, end=None
+    ):
+        """
+        Prepares the queries for ``get_groups_user_counts``, and returns a
+        function that returns its result, which can be called from any thread.
+        """
+        raise NotImplementedError
+
     def get_group_tag_value_count(self, project_id, group_id, environment_id, key):
         """
         >>> get_group_tag_value_count(1, 2, 3, 'key1')
@@ -315,3 +326,13 @@ class TagStorage(Service):
         self, project_ids, group_id_list, environment_ids, start=None, end=None
     ):
         raise NotImplementedError
+
+    def prepare_group_seen_values_for_environments(
+        self, project_ids, group_id_list, environment_ids, start=None, end=None
+    ):
+        """
+        Prepares the queries for ``get_group_seen_values_for_environments``,
+        and returns a function that returns its result, which can be called
+        from any thread.
+        """
+        raise NotImplementedError
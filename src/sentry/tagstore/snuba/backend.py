@@ -331,6 +331,13 @@ class SnubaTagStorage(TagStorage):
 
     def get_group_seen_values_for_environments(
         self, project_ids, group_id_list, environment_ids, start=None, end=None
+    ):
+        return self.prepare_group_seen_values_for_environments(
+            project_ids, group_id_list, environment_ids, start=start, end=end
+        )()
+
+    def prepare_group_seen_values_for_environments(
+        self, project_ids, group_id_list, environment_ids, start=None, end=None
     ):
         # Get the total times seen, first seen, and last seen across multiple environments
         filters = {"project_id": project_ids, "issue": group_id_list}
@@ -344,7 +351,7 @@ class SnubaTagStorage(TagStorage):
             ["max", SEEN_COLUMN, "last_seen"],
         ]
 
-        result = snuba.query(
+        run_query = snuba.prepare_query(
             start=start,
             end=end,
             groupby=["issue"],
@@ -354,7 +361,11 @@ class SnubaTagStorage(TagStorage):
             referrer="tagstore.get_group_seen_values_for_environments",
         )
 
-        return {issue: fix_tag_value_data(data) for issue, data in six.iteritems(result)}
+        def get_group_seen_values():
+            result = run_query()
+            return {issue: fix_tag_value_data(data) for issue, data in six.iteritems(result)}
+
+        return get_group_seen_values
 
     def get_group_tag_value_count(self, project_id, group_id, environment_id, key):
         tag = u"tags[{}]".format(key)
@@ -556,12 +567,19 @@ class SnubaTagStorage(TagStorage):
         return values
 
     def get_groups_user_counts(self, project_ids, group_ids, environment_ids, start=None, end=None):
+        return self.prepare_groups_user_counts(
+            project_ids, group_ids, environment_ids, start=start, end=end
+        )()
+
+    def prepare_groups_user_counts(
+        self, project_ids, group_ids, environment_ids, start=None, end=None
+    ):
         filters = {"project_id": project_ids, "issue": group_ids}
         if environment_ids:
             filters["environment"] = environment_ids
         aggregations = [["uniq", "tags[sentry:user]", "count"]]
 
-        result = snuba.query(
+        run_query = snuba.prepare_query(
             start=start,
             end=end,
             groupby=["issue"],
@@ -570,7 +588,12 @@ class SnubaTagStorage(TagStorage):
             aggregations=aggregations,
             referrer="tagstore.get_groups_user_counts",
         )
-        return defaultdict(int, {k: v for k, v in result.items() if v})
+
+        def get_groups_user_counts():
+            result = run_query()
+            return defaultdict(int, {k: v for k, v in result.items() if v})
+
+        return get_groups_user_counts
 
     def get_tag_value_paginator(
         self, project_id, environment_id, key, query=None, order_by="-last_seen"
@@ -1,14 +1,19 @@
 from __future__ import absolute_import
 
 import logging
+import sys
 import time
 
+import six
+from django.conf import settings
+
 from sentry.digests import get_option_key
 from sentry.digests.backends.base import InvalidState
-from sentry.digests.notifications import build_digest, split_key
+from sentry.digests.notifications import build_digest, fetch_state_many, split_key
 from sentry.models import Project, ProjectOption
 from sentry.tasks.base import instrumented_task
 from sentry.utils import snuba
+from sentry.utils.iterators import chunked
 
 logger = logging.getLogger(__name__)
 
@@ -30,8 +35,13 @@ def schedule_digests():
     timeout = 300
     digests.maintenance(deadline - timeout)
 
-    for entry in digests.schedule(deadline):
-        deliver_digest.delay(entry.key, entry.timestamp)
+    # All of the timelines returned here are ready for delivery at this
+    # deadline, so they can be delivered together.
+    for entries in chunked(digests.schedule(deadline), settings.SENTRY_DIGESTS_DELIVERY_BATCH_SIZE):
+        if len(entries) == 1:
+            deliver_digest.delay(entries[0].key, entries[0].timestamp)
+        else:
+            deliver_digests.delay([entry.key for entry in entries], deadline)
 
 
 @instrumented_task(name="sentry.tasks.digests.deliver_digest", queue="digests.delivery")
@@ -59,3 +69,82 @@ def deliver_digest(key, schedule_timestamp=None):
 
         if digest:
             plugin.notify_digest(project, digest)
+
+
+@instrumented_task(name="sentry.tasks.digests.deliver_digests", queue="digests.delivery")
+def deliver_digests(keys, schedule_timestamp=None):
+    """
+    Deliver many timelines at once. All of the timelines are opened before
+    any are delivered, so that the state for every digest can be fetched
+    together. Each timeline is closed (or left open for redelivery, if its
+    digest can't be built) independently of the others.
+    """
+    from sentry import digests
+    from sentry.plugins.base import plugins
+
+    projects = Project.objects.in_bulk(set(int(key.split(":", 2)[2]) for key in keys))
+
+    targets = []
+    for key in keys:
+        plugin_slug, _, project_id = key.split(":", 2)
+        project = projects.get(int(project_id))
+        if project is None:
+            logger.info("Cannot deliver digest %r due to error: project does not exist", key)
+            digests.delete(key)
+            continue
+
+        try:
+            plugin = plugins.get(plugin_slug)
+        except KeyError:
+            logger.info("Cannot deliver digest %r due to error: plugin does not exist", key)
+            continue
+
+        targets.append((key, plugin, project))
+
+    with snuba.options_override({"consistent": True}):
+        opened = []
+        requests = []
+        try:
+            for key, plugin, project in targets:
+                minimum_delay = ProjectOption.objects.get_value(
+                    project, get_option_key(plugin.get_conf_key(), "minimum_delay")
+                )
+                context = digests.digest(key, minimum_delay=minimum_delay)
+                try:
+                    records = list(context.__enter__())
+                except InvalidState as error:
+                    logger.info("Skipped digest delivery: %s", error, exc_info=True)
+                    continue
+                opened.append((key, plugin, project, records, context))
+                if records:
+                    requests.append((project, records))
+
+            states = fetch_state_many(requests)
+        except Exception:
+            # Leave all of the timelines open so that they are retried.
+            exc_info = sys.exc_info()
+            for key, plugin, project, records, context in opened:
+                context.__exit__(*exc_info)
+            six.reraise(*exc_info)
+
+        # Each timeline is closed as soon as its digest has been built (as in
+        # ``deliver_digest``), so that the locks aren't held while sending,
+        # and a failure to send can't cause a digest to be sent again.
+        states = iter(states)
+        pending = []
+        for key, plugin, project, records, context in opened:
+            try:
+                digest = build_digest(project, records, next(states)) if records else None
+            except Exception:
+                logger.exception("Failed to build digest %r", key)
+                context.__exit__(*sys.exc_info())
+            else:
+                context.__exit__(None, None, None)
+                if digest:
+                    pending.append((key, plugin, project, digest))
+
+        for key, plugin, project, digest in pending:
+            try:
+                plugin.notify_digest(project, digest)
+            except Exception:
+                logger.exception("Failed to deliver digest %r", key)
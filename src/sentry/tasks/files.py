@@ -15,7 +15,9 @@ def delete_file(path, checksum, **kwargs):
     from sentry.app import locks
     from sentry.utils.retries import TimedRetryPolicy
 
-    lock = locks.get(u"fileblob:upload:{}".format(checksum), duration=60 * 10)
+    lock = locks.get(
+        u"fileblob:upload:{}".format(checksum), duration=60 * 10, name="fileblob.upload"
+    )
     with TimedRetryPolicy(60)(lock.acquire):
         if not FileBlob.objects.filter(checksum=checksum).exists():
             get_storage().delete(path)
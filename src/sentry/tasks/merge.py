@@ -107,6 +107,10 @@ def merge_groups(
             model_list, group, new_group, logger=logger, transaction_id=transaction_id
         )
 
+        # Any hashes that were moved to the new group may still be cached as
+        # belonging to the old group.
+        GroupHash.objects.invalidate_cache(group.project_id)
+
         if not has_more:
             # There are no more objects to merge for *this* "from" group, remove it
             # from the list of "from" groups that are being merged, and finish the
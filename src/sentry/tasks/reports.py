@@ -31,6 +31,7 @@ from sentry.utils.dates import floor_to_utc_day, to_datetime, to_timestamp
 from sentry.utils.email import MessageBuilder
 from sentry.utils.iterators import chunked
 from sentry.utils.math import mean
+from sentry.utils.series import Series
 from six.moves import reduce
 
 
@@ -173,25 +174,29 @@ def prepare_project_series(start__stop, project, rollup=60 * 60 * 24):
     start, stop = start__stop
     resolution, series = tsdb.get_optimal_rollup_series(start, stop, rollup)
     assert resolution == rollup, "resolution does not match requested value"
-    clean = functools.partial(clean_series, start, stop, rollup)
     issue_ids = project.group_set.filter(
         status=GroupStatus.RESOLVED, resolved_at__gte=start, resolved_at__lt=stop
     ).values_list("id", flat=True)
 
     tsdb_range = _query_tsdb_chunked(tsdb.get_range, issue_ids, start, stop, rollup)
 
-    return merge_series(
-        reduce(
-            merge_series,
-            map(clean, tsdb_range.values()),
-            clean([(timestamp, 0) for timestamp in series]),
-        ),
-        clean(
-            tsdb.get_range(tsdb.models.project, [project.id], start, stop, rollup=rollup)[
-                project.id
-            ]
-        ),
-        lambda resolved, total: (resolved, total - resolved),  # unresolved
+    # Projects can have thousands of resolved issues, so the per-issue series
+    # are summed as arrays rather than merged point by point.
+    start_timestamp = int(to_timestamp(start))
+    length = len(clean_series(start, stop, rollup, [(timestamp, 0) for timestamp in series]))
+    resolved = Series.sum(tsdb_range.values(), start_timestamp, rollup, length)
+    total = Series.from_points(
+        tsdb.get_range(tsdb.models.project, [project.id], start, stop, rollup=rollup)[project.id],
+        start_timestamp,
+        rollup,
+        length,
+    )
+
+    return list(
+        zip(
+            resolved.timestamps,
+            resolved.merge(total, lambda resolved, total: (resolved, total - resolved)),
+        )
     )
 
 
@@ -266,13 +271,18 @@ def prepare_project_issue_summaries(interval, project):
 
 def prepare_project_usage_summary(start__stop, project):
     start, stop = start__stop
+    sums = tsdb.get_sums_multi(
+        [
+            (tsdb.models.project_total_blacklisted, [project.id]),
+            (tsdb.models.project_total_rejected, [project.id]),
+        ],
+        start,
+        stop,
+        rollup=60 * 60 * 24,
+    )
     return (
-        tsdb.get_sums(
-            tsdb.models.project_total_blacklisted, [project.id], start, stop, rollup=60 * 60 * 24
-        )[project.id],
-        tsdb.get_sums(
-            tsdb.models.project_total_rejected, [project.id], start, stop, rollup=60 * 60 * 24
-        )[project.id],
+        sums[tsdb.models.project_total_blacklisted][project.id],
+        sums[tsdb.models.project_total_rejected][project.id],
     )
 
 
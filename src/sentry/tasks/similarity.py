@@ -0,0 +1,10 @@
+from __future__ import absolute_import
+
+from sentry.tasks.base import instrumented_task
+
+
+@instrumented_task(name="sentry.tasks.similarity.refresh_similarity_cache", queue="default")
+def refresh_similarity_cache(scope, key, **kwargs):
+    from sentry.similarity import features
+
+    features.index.refresh(scope, key)
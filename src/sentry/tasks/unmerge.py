@@ -192,6 +192,7 @@ def migrate_events(
         GroupHash.objects.filter(project_id=project.id, hash__in=fingerprints).update(
             group=destination_id
         )
+        GroupHash.objects.invalidate_cache(project.id)
 
         # Create activity records for the source and destination group.
         Activity.objects.create(
@@ -414,8 +415,7 @@ def repair_denormalizations(caches, project, events):
     repair_group_release_data(caches, project, events)
     repair_tsdb_data(caches, project, events)
 
-    for event in events:
-        features.record([event])
+    features.record_many(events)
 
 
 def lock_hashes(project_id, source_id, fingerprints):
@@ -432,6 +432,8 @@ def lock_hashes(project_id, source_id, fingerprints):
             state=GroupHash.State.LOCKED_IN_MIGRATION
         )
 
+    GroupHash.objects.invalidate_cache(project_id)
+
     return [h.hash for h in eligible_hashes]
 
 
@@ -439,6 +441,7 @@ def unlock_hashes(project_id, fingerprints):
     GroupHash.objects.filter(
         project_id=project_id, hash__in=fingerprints, state=GroupHash.State.LOCKED_IN_MIGRATION
     ).update(state=GroupHash.State.UNLOCKED)
+    GroupHash.objects.invalidate_cache(project_id)
 
 
 @instrumented_task(name="sentry.tasks.unmerge", queue="unmerge")
@@ -82,6 +82,7 @@ from sentry.rules import EventState
 from sentry.tagstore.snuba import SnubaTagStorage
 from sentry.utils import json
 from sentry.utils.auth import SSO_SESSION_KEY
+from sentry.utils.cache import local_cache
 
 from .fixtures import Fixtures
 from .factories import Factories
@@ -219,6 +220,7 @@ class BaseTestCase(Fixtures, Exam):
         super(BaseTestCase, self)._pre_setup()
 
         cache.clear()
+        local_cache.clear()
         ProjectOption.objects.clear_local_cache()
         GroupMeta.objects.clear_local_cache()
 
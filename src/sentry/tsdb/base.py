@@ -102,7 +102,9 @@ class BaseTSDB(Service):
     __read_methods__ = frozenset(
         [
             "get_range",
+            "get_range_multi",
             "get_sums",
+            "get_sums_multi",
             "get_distinct_counts_series",
             "get_distinct_counts_totals",
             "get_distinct_counts_union",
@@ -375,6 +377,41 @@ class BaseTSDB(Service):
         )
         return sum_set
 
+    def get_range_multi(self, requests, start, end, rollup=None, environment_ids=None):
+        """
+        Get ranges of data for several models over the same time window.
+
+        ``requests`` is a sequence of ``(model, keys)`` pairs. Returns a
+        mapping of model => key => [(timestamp, count), ...].
+
+        >>> now = timezone.now()
+        >>> get_range_multi([(TSDBModel.project_total_received, [1, 2]),
+        >>>                  (TSDBModel.project_total_rejected, [1, 2])],
+        >>>                 start=now - timedelta(days=1),
+        >>>                 end=now)
+        """
+        results = {}
+        for model, keys in requests:
+            results.setdefault(model, {}).update(
+                self.get_range(model, keys, start, end, rollup, environment_ids=environment_ids)
+            )
+        return results
+
+    def get_sums_multi(self, requests, start, end, rollup=None, environment_id=None):
+        range_sets = self.get_range_multi(
+            requests,
+            start,
+            end,
+            rollup,
+            environment_ids=[environment_id] if environment_id is not None else None,
+        )
+        return {
+            model: dict(
+                (key, sum(p for _, p in points)) for (key, points) in six.iteritems(range_set)
+            )
+            for model, range_set in six.iteritems(range_sets)
+        }
+
     def rollup(self, values, rollup):
         """
         Given a set of values (as returned from ``get_range``), roll them up
@@ -0,0 +1,140 @@
+from __future__ import absolute_import
+
+from collections import defaultdict
+from fractions import gcd
+
+import six
+from django.utils import timezone
+from six.moves import reduce
+
+from sentry.tsdb.redis import RedisTSDB
+from sentry.utils.combining import WriteCombiner
+from sentry.utils.dates import to_datetime
+
+COUNTER = "c"
+DISTINCT_COUNTER = "d"
+FREQUENCY_TABLE = "f"
+
+
+def merge(key, existing, value):
+    kind = key[0]
+    if kind == COUNTER:
+        return existing + value
+    elif kind == DISTINCT_COUNTER:
+        existing.update(value)
+        return existing
+    elif kind == FREQUENCY_TABLE:
+        for member, score in six.iteritems(value):
+            existing[member] = existing.get(member, 0) + score
+        return existing
+    raise ValueError("Unknown write type: %r" % (kind,))
+
+
+class CombiningRedisTSDB(RedisTSDB):
+    """
+    A ``RedisTSDB`` that combines writes in process memory before sending
+    them to Redis.
+
+    Counter increments, distinct counter values and frequency table scores
+    for the same ``(model, key, environment, bucket)`` are merged locally,
+    where the bucket is the greatest common divisor of all configured
+    rollups, so every rollup still receives the data in the correct
+    interval. Combined writes are flushed every ``combine_interval`` seconds
+    or whenever ``combine_max_size`` distinct entries are pending, as well as
+    at process shutdown (see ``sentry.utils.combining``.)
+
+    Reads are served directly from Redis and do not include pending writes,
+    so recently written data may be delayed by up to ``combine_interval``
+    seconds. Pending writes are lost if the process is killed without
+    running its shutdown hooks.
+
+    >>> CombiningRedisTSDB(combine_interval=1.0, combine_max_size=5000)
+    """
+
+    def __init__(self, combine_interval=1.0, combine_max_size=5000, **options):
+        super(CombiningRedisTSDB, self).__init__(**options)
+        self.resolution = reduce(gcd, self.rollups.keys())
+        self.combiner = WriteCombiner(
+            self.apply_combined_writes, merge, interval=combine_interval, max_size=combine_max_size
+        )
+
+    def normalize_to_bucket(self, timestamp):
+        return self.normalize_to_epoch(timestamp, self.resolution)
+
+    def incr_multi(self, items, timestamp=None, count=1, environment_id=None):
+        self.validate_arguments([item[0] for item in items], [environment_id])
+
+        if timestamp is None:
+            timestamp = timezone.now()
+
+        for item in items:
+            if len(item) == 2:
+                model, key = item
+                options = {}
+            else:
+                model, key, options = item
+
+            self.combiner.add(
+                (
+                    COUNTER,
+                    model,
+                    key,
+                    self.normalize_to_bucket(options.get("timestamp", timestamp)),
+                    environment_id,
+                ),
+                options.get("count", count),
+            )
+
+    def record_multi(self, items, timestamp=None, environment_id=None):
+        self.validate_arguments([model for model, key, values in items], [environment_id])
+
+        if timestamp is None:
+            timestamp = timezone.now()
+
+        bucket = self.normalize_to_bucket(timestamp)
+        for model, key, values in items:
+            self.combiner.add((DISTINCT_COUNTER, model, key, bucket, environment_id), set(values))
+
+    def record_frequency_multi(self, requests, timestamp=None, environment_id=None):
+        self.validate_arguments([model for model, request in requests], [environment_id])
+
+        if not self.enable_frequency_sketches:
+            return
+
+        if timestamp is None:
+            timestamp = timezone.now()
+
+        bucket = self.normalize_to_bucket(timestamp)
+        for model, request in requests:
+            for key, items in six.iteritems(request):
+                self.combiner.add(
+                    (FREQUENCY_TABLE, model, key, bucket, environment_id), dict(items)
+                )
+
+    def apply_combined_writes(self, pending):
+        counters = defaultdict(list)
+        distinct_counters = defaultdict(list)
+        frequency_tables = defaultdict(lambda: defaultdict(dict))
+
+        for (kind, model, key, bucket, environment_id), value in six.iteritems(pending):
+            if kind == COUNTER:
+                counters[environment_id].append(
+                    (model, key, {"timestamp": to_datetime(bucket), "count": value})
+                )
+            elif kind == DISTINCT_COUNTER:
+                distinct_counters[(bucket, environment_id)].append((model, key, value))
+            elif kind == FREQUENCY_TABLE:
+                frequency_tables[(bucket, environment_id)][model][key] = value
+
+        for environment_id, items in six.iteritems(counters):
+            super(CombiningRedisTSDB, self).incr_multi(items, environment_id=environment_id)
+
+        for (bucket, environment_id), items in six.iteritems(distinct_counters):
+            super(CombiningRedisTSDB, self).record_multi(
+                items, to_datetime(bucket), environment_id=environment_id
+            )
+
+        for (bucket, environment_id), requests in six.iteritems(frequency_tables):
+            super(CombiningRedisTSDB, self).record_frequency_multi(
+                list(requests.items()), to_datetime(bucket), environment_id=environment_id
+            )
@@ -14,7 +14,7 @@ from django.utils import timezone
 from pkg_resources import resource_string
 from redis.client import Script
 
-from sentry.tsdb.base import BaseTSDB
+from sentry.tsdb.base import BaseTSDB, TSDBModel
 from sentry.utils.dates import to_datetime, to_timestamp
 from sentry.utils.redis import check_cluster_versions, get_cluster_from_options
 from sentry.utils.versioning import Version
@@ -24,8 +24,12 @@ logger = logging.getLogger(__name__)
 
 SketchParameters = namedtuple("SketchParameters", "depth width capacity")
 
+SpaceSavingParameters = namedtuple("SpaceSavingParameters", "capacity")
+
 CountMinScript = Script(None, resource_string("sentry", "scripts/tsdb/cmsketch.lua"))
 
+SpaceSavingScript = Script(None, resource_string("sentry", "scripts/tsdb/spacesaving.lua"))
+
 
 class SuppressionWrapper(object):
     """\
@@ -106,17 +110,57 @@ class RedisTSDB(BaseTSDB):
     frequency table can be displayed as percentages of the whole data set.
     (Additional documentation and the bulk of the logic for implementing the
     frequency table API can be found in the ``cmsketch.lua`` script.)
+
+    As an alternative to the Count-Min sketch, frequency tables for individual
+    models can be configured to use the Space-Saving algorithm, which only
+    keeps a fixed capacity top-N index and no estimation matrix (see the
+    ``spacesaving.lua`` script.) This uses much less memory per table, at the
+    cost of not being able to estimate scores for items outside of the index::
+
+        frequency_tables={
+            "frequent_environments_by_group": {"implementation": "spacesaving", "capacity": 100},
+        }
     """
 
     DEFAULT_SKETCH_PARAMETERS = SketchParameters(3, 128, 50)
 
+    DEFAULT_SPACE_SAVING_PARAMETERS = SpaceSavingParameters(50)
+
     def __init__(self, prefix="ts:", vnodes=64, **options):
         self.cluster, options = get_cluster_from_options("SENTRY_TSDB_OPTIONS", options)
         self.prefix = prefix
         self.vnodes = vnodes
         self.enable_frequency_sketches = options.pop("enable_frequency_sketches", False)
+        self.frequency_tables = {}
+        for model, configuration in six.iteritems(options.pop("frequency_tables", {})):
+            if not isinstance(model, TSDBModel):
+                model = TSDBModel[model]
+            self.frequency_tables[model] = self.make_frequency_table(**configuration)
         super(RedisTSDB, self).__init__(**options)
 
+    def make_frequency_table(self, implementation="cmsketch", **parameters):
+        """
+        Returns a 2-tuple of the form ``(script, parameters)`` for a frequency
+        table implementation.
+        """
+        if implementation == "cmsketch":
+            script, defaults = CountMinScript, self.DEFAULT_SKETCH_PARAMETERS
+        elif implementation == "spacesaving":
+            script, defaults = SpaceSavingScript, self.DEFAULT_SPACE_SAVING_PARAMETERS
+        else:
+            raise ValueError(u"Unknown frequency table implementation: {}".format(implementation))
+        return script, list(defaults._replace(**parameters))
+
+    def get_frequency_table(self, model):
+        """
+        Returns the ``(script, parameters)`` used for a model's frequency
+        tables.
+        """
+        try:
+            return self.frequency_tables[model]
+        except KeyError:
+            return CountMinScript, list(self.DEFAULT_SKETCH_PARAMETERS)
+
     def validate(self):
         logger.debug("Validating Redis version...")
         version = Version((2, 8, 18)) if self.enable_frequency_sketches else Version((2, 8, 9))
@@ -272,35 +316,52 @@ class RedisTSDB(BaseTSDB):
         >>>          start=now - timedelta(days=1),
         >>>          end=now)
         """
+        return self.get_range_multi(
+            [(model, keys)], start, end, rollup=rollup, environment_ids=environment_ids
+        )[model]
+
+    def get_range_multi(self, requests, start, end, rollup=None, environment_ids=None):
+        """
+        Fetch ranges for several models with a single pipelined fan-out to
+        each host in the cluster:
+
+        >>> now = timezone.now()
+        >>> get_range_multi([(TimeSeriesModel.project_total_received, [1]),
+        >>>                  (TimeSeriesModel.project_total_rejected, [1])],
+        >>>                 start=now - timedelta(days=1),
+        >>>                 end=now)
+        """
         # redis backend doesn't support multiple envs
         if environment_ids is not None and len(environment_ids) > 1:
             raise NotImplementedError
         environment_id = environment_ids[0] if environment_ids else None
 
-        self.validate_arguments([model], [environment_id])
+        self.validate_arguments([model for model, keys in requests], [environment_id])
 
         rollup, series = self.get_optimal_rollup_series(start, end, rollup)
-        series = map(to_datetime, series)
+        series = [to_datetime(timestamp) for timestamp in series]
 
         results = []
         cluster, _ = self.get_cluster(environment_id)
         with cluster.map() as client:
-            for key in keys:
-                for timestamp in series:
-                    hash_key, hash_field = self.make_counter_key(
-                        model, rollup, timestamp, key, environment_id
-                    )
-                    results.append(
-                        (to_timestamp(timestamp), key, client.hget(hash_key, hash_field))
-                    )
+            for model, keys in requests:
+                for key in keys:
+                    for timestamp in series:
+                        hash_key, hash_field = self.make_counter_key(
+                            model, rollup, timestamp, key, environment_id
+                        )
+                        results.append(
+                            (model, to_timestamp(timestamp), key, client.hget(hash_key, hash_field))
+                        )
 
-        results_by_key = defaultdict(dict)
-        for epoch, key, count in results:
-            results_by_key[key][epoch] = int(count.value or 0)
+        results_by_model = {model: defaultdict(dict) for model, keys in requests}
+        for model, epoch, key, count in results:
+            results_by_model[model][key][epoch] = int(count.value or 0)
 
-        for key, points in six.iteritems(results_by_key):
-            results_by_key[key] = sorted(points.items())
-        return dict(results_by_key)
+        return {
+            model: {key: sorted(points.items()) for key, points in six.iteritems(results_by_key)}
+            for model, results_by_key in six.iteritems(results_by_model)
+        }
 
     def merge(self, model, destination, sources, timestamp=None, environment_ids=None):
         environment_ids = (set(environment_ids) if environment_ids is not None else set()).union(
@@ -680,14 +741,15 @@ class RedisTSDB(BaseTSDB):
                         for k in chunk:
                             expirations[k] = expiry
 
-                    arguments = ["INCR"] + list(self.DEFAULT_SKETCH_PARAMETERS)
+                    script, parameters = self.get_frequency_table(model)
+                    arguments = ["INCR"] + parameters
                     for member, score in items.items():
                         arguments.extend((score, member))
 
                     # Since we're essentially merging dictionaries, we need to
                     # append this to any value that already exists at the key.
                     cmds = commands.setdefault(key, [])
-                    cmds.append((CountMinScript, keys, arguments))
+                    cmds.append((script, keys, arguments))
                     for k, t in expirations.items():
                         cmds.append(("EXPIREAT", k, t))
 
@@ -707,7 +769,8 @@ class RedisTSDB(BaseTSDB):
 
         rollup, series = self.get_optimal_rollup_series(start, end, rollup)
 
-        arguments = ["RANKED"] + list(self.DEFAULT_SKETCH_PARAMETERS)
+        script, parameters = self.get_frequency_table(model)
+        arguments = ["RANKED"] + parameters
         if limit is not None:
             arguments.append(int(limit))
 
@@ -718,7 +781,7 @@ class RedisTSDB(BaseTSDB):
                 ks.extend(
                     self.make_frequency_table_keys(model, rollup, timestamp, key, environment_id)
                 )
-            commands[key] = [(CountMinScript, ks, arguments)]
+            commands[key] = [(script, ks, arguments)]
 
         results = {}
         cluster, _ = self.get_cluster(environment_id)
@@ -737,7 +800,8 @@ class RedisTSDB(BaseTSDB):
 
         rollup, series = self.get_optimal_rollup_series(start, end, rollup)
 
-        arguments = ["RANKED"] + list(self.DEFAULT_SKETCH_PARAMETERS)
+        script, parameters = self.get_frequency_table(model)
+        arguments = ["RANKED"] + parameters
         if limit is not None:
             arguments.append(int(limit))
 
@@ -745,7 +809,7 @@ class RedisTSDB(BaseTSDB):
         for key in keys:
             commands[key] = [
                 (
-                    CountMinScript,
+                    script,
                     self.make_frequency_table_keys(model, rollup, timestamp, key, environment_id),
                     arguments,
                 )
@@ -779,7 +843,8 @@ class RedisTSDB(BaseTSDB):
 
         commands = {}
 
-        arguments = ["ESTIMATE"] + list(self.DEFAULT_SKETCH_PARAMETERS)
+        script, parameters = self.get_frequency_table(model)
+        arguments = ["ESTIMATE"] + parameters
         for key, members in items.items():
             ks = []
             for timestamp in series:
@@ -787,7 +852,7 @@ class RedisTSDB(BaseTSDB):
                     self.make_frequency_table_keys(model, rollup, timestamp, key, environment_id)
                 )
 
-            commands[key] = [(CountMinScript, ks, arguments + members)]
+            commands[key] = [(script, ks, arguments + members)]
 
         results = {}
 
@@ -829,6 +894,8 @@ class RedisTSDB(BaseTSDB):
         if not self.enable_frequency_sketches:
             return
 
+        script, parameters = self.get_frequency_table(model)
+
         rollups = []
         for rollup, samples in self.rollups.items():
             _, series = self.get_optimal_rollup_series(
@@ -851,8 +918,8 @@ class RedisTSDB(BaseTSDB):
                                     model, rollup, to_timestamp(timestamp), source, environment_id
                                 )
                             )
-                        arguments = ["EXPORT"] + list(self.DEFAULT_SKETCH_PARAMETERS)
-                        exports[source].extend([(CountMinScript, keys, arguments), ["DEL"] + keys])
+                        arguments = ["EXPORT"] + parameters
+                        exports[source].extend([(script, keys, arguments), ["DEL"] + keys])
 
             try:
                 responses = cluster.execute_commands(exports)
@@ -871,7 +938,7 @@ class RedisTSDB(BaseTSDB):
                         for environment_id, payload in zip(environment_ids, next(results).value):
                             imports.append(
                                 (
-                                    CountMinScript,
+                                    script,
                                     self.make_frequency_table_keys(
                                         model,
                                         rollup,
@@ -879,7 +946,7 @@ class RedisTSDB(BaseTSDB):
                                         destination,
                                         environment_id,
                                     ),
-                                    ["IMPORT"] + list(self.DEFAULT_SKETCH_PARAMETERS) + [payload],
+                                    ["IMPORT"] + parameters + [payload],
                                 )
                             )
                         next(results)  # pop off the result of DEL
@@ -3,6 +3,8 @@ from __future__ import absolute_import
 import inspect
 import six
 
+from collections import defaultdict
+
 from sentry.tsdb.base import BaseTSDB
 from sentry.tsdb.dummy import DummyTSDB
 from sentry.tsdb.redis import RedisTSDB
@@ -21,6 +23,10 @@ def multiple_model_argument(callargs):
     return set(callargs["models"])
 
 
+def multiple_model_requests(callargs):
+    return {model for model, keys in callargs["requests"]}
+
+
 def dont_do_this(callargs):
     raise NotImplementedError("do not run this please")
 
@@ -28,7 +34,9 @@ def dont_do_this(callargs):
 method_specifications = {
     # method: (type, function(callargs) -> set[model])
     "get_range": (READ, single_model_argument),
+    "get_range_multi": (READ, multiple_model_requests),
     "get_sums": (READ, single_model_argument),
+    "get_sums_multi": (READ, multiple_model_requests),
     "get_distinct_counts_series": (READ, single_model_argument),
     "get_distinct_counts_totals": (READ, single_model_argument),
     "get_distinct_counts_union": (READ, single_model_argument),
@@ -88,11 +96,12 @@ def make_method(key):
 # We have to apply these methods into RedisSnubaTSDB through
 # a metaclass since we can't simply overload `__getattr__` due to
 # the fact that the subclass BaseTSDB already defines all the methods.
-# So we need to actually apply methods on top to override them.
+# So we need to actually apply methods on top to override them. Methods
+# that are defined on the class itself are left alone.
 class RedisSnubaTSDBMeta(type):
     def __new__(cls, name, bases, attrs):
         for key in method_specifications.keys():
-            attrs[key] = make_method(key)
+            attrs.setdefault(key, make_method(key))
         return type.__new__(cls, name, bases, attrs)
 
 
@@ -105,3 +114,24 @@ class RedisSnubaTSDB(BaseTSDB):
             "snuba": SnubaTSDB(**options.pop("snuba", {})),
         }
         super(RedisSnubaTSDB, self).__init__(**options)
+
+    def get_range_multi(self, requests, start, end, rollup=None, environment_ids=None):
+        # Requests may span models that are served by different backends, so
+        # we split them up and issue one batch per backend.
+        requests_by_backend = defaultdict(list)
+        for model, keys in requests:
+            requests_by_backend[model_backends[model][READ]].append((model, keys))
+
+        results = {}
+        for backend, backend_requests in six.iteritems(requests_by_backend):
+            results.update(
+                self.backends[backend].get_range_multi(
+                    backend_requests, start, end, rollup=rollup, environment_ids=environment_ids
+                )
+            )
+        return results
+
+    def get_sums_multi(self, requests, start, end, rollup=None, environment_id=None):
+        return BaseTSDB.get_sums_multi(
+            self, requests, start, end, rollup=rollup, environment_id=environment_id
+        )
@@ -0,0 +1,902 @@
+from __future__ import absolute_import
+
+import fcntl
+import hashlib
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+import six
+from django.utils import timezone
+from six.moves import xrange
+
+from sentry.tsdb.base import BaseTSDB
+from sentry.utils import json
+
+logger = logging.getLogger(__name__)
+
+# Bucket numbers are always positive, so zeroed storage (e.g. a freshly
+# truncated file) is a set of empty rings.
+EMPTY = 0
+
+HEADER_MAGIC = b"SNTRYRB1"
+HEADER_SIZE = 4096
+
+# The number of records that are checked before giving up when looking up,
+# or allocating, the record for a key.
+MAX_PROBES = 32
+
+
+def get_hash(value):
+    """
+    Returns a stable 64-bit hash of a value.
+    """
+    return struct.unpack("<Q", hashlib.md5(six.text_type(value).encode("utf-8")).digest()[:8])[0]
+
+
+def estimate_cardinality(registers):
+    """
+    Returns the number of distinct values recorded in a set of HyperLogLog
+    registers.
+    """
+    size = len(registers)
+    if size == 16:
+        alpha = 0.673
+    elif size == 32:
+        alpha = 0.697
+    elif size == 64:
+        alpha = 0.709
+    else:
+        alpha = 0.7213 / (1 + 1.079 / size)
+
+    estimate = alpha * size * size / sum(2.0 ** -register for register in registers)
+    zeroes = sum(1 for register in registers if not register)
+    if estimate <= 2.5 * size and zeroes:
+        # Use linear counting for small cardinalities, where it's exact for
+        # most practical purposes.
+        estimate = size * math.log(float(size) / zeroes)
+    return int(round(estimate))
+
+
+def union_registers(size, items):
+    registers = bytearray(size)
+    for item in items:
+        registers = bytearray(map(max, registers, item))
+    return registers
+
+
+class Ring(object):
+    """
+    A fixed number of slots for the most recent buckets of a single rollup,
+    stored in a buffer (usually a region of a shared memory mapping.)
+
+    The buffer holds ``size`` bucket numbers (as signed 64-bit integers),
+    followed by ``size`` slots of ``slot_size`` bytes. A bucket is stored in
+    slot ``bucket % size``, tagged with the bucket number so that slots left
+    over from a previous lap around the ring can be recognized as expired
+    without having to sweep them.
+    """
+
+    slot_size = None
+
+    def __init__(self, size, buffer=None, offset=0):
+        self.size = size
+        if buffer is None:
+            buffer = bytearray(self.get_storage_size())
+        self.buffer = buffer
+        self.offset = offset
+        self.slots_offset = offset + 8 * size
+
+    def get_storage_size(self):
+        return self.size * (8 + self.slot_size)
+
+    def get_slot_offset(self, index):
+        return self.slots_offset + index * self.slot_size
+
+    def get_stored_bucket(self, index):
+        return struct.unpack_from("<q", self.buffer, self.offset + 8 * index)[0]
+
+    def set_stored_bucket(self, index, bucket):
+        struct.pack_into("<q", self.buffer, self.offset + 8 * index, bucket)
+
+    def read_slot(self, index):
+        raise NotImplementedError
+
+    def clear_slot(self, index):
+        start = self.get_slot_offset(index)
+        self.buffer[start : start + self.slot_size] = b"\x00" * self.slot_size
+
+    def acquire(self, bucket):
+        """
+        Returns the index of the slot for ``bucket``, recycling the slot if
+        it holds an older bucket, or ``None`` if the bucket has already been
+        overwritten by a newer one.
+        """
+        index = bucket % self.size
+        stored = self.get_stored_bucket(index)
+        if stored != bucket:
+            if stored > bucket:
+                return None
+            self.set_stored_bucket(index, bucket)
+            self.clear_slot(index)
+        return index
+
+    def get(self, bucket):
+        index = bucket % self.size
+        if self.get_stored_bucket(index) == bucket:
+            return self.read_slot(index)
+        return None
+
+    def discard(self, bucket):
+        index = bucket % self.size
+        if self.get_stored_bucket(index) == bucket:
+            self.set_stored_bucket(index, EMPTY)
+            self.clear_slot(index)
+
+    def items(self):
+        buckets = struct.unpack_from("<%dq" % self.size, self.buffer, self.offset)
+        for index, bucket in enumerate(buckets):
+            if bucket != EMPTY:
+                yield bucket, self.read_slot(index)
+
+
+class CounterRing(Ring):
+    """
+    A ring of signed 64-bit integer counters.
+    """
+
+    slot_size = 8
+
+    def read_slot(self, index):
+        return struct.unpack_from("<q", self.buffer, self.get_slot_offset(index))[0]
+
+    def incr(self, bucket, count):
+        index = self.acquire(bucket)
+        if index is not None:
+            offset = self.get_slot_offset(index)
+            value = struct.unpack_from("<q", self.buffer, offset)[0]
+            struct.pack_into("<q", self.buffer, offset, value + count)
+
+    def get(self, bucket):
+        return super(CounterRing, self).get(bucket) or 0
+
+    def get_range(self, first, count):
+        """
+        Returns the values of ``count`` consecutive buckets starting with
+        ``first``, with zeroes for buckets that are not stored.
+        """
+        size = self.size
+        if count > size:
+            # Only the most recent ``size`` buckets can still be stored.
+            return [0] * (count - size) + self.get_range(first + count - size, size)
+
+        buckets = struct.unpack_from("<%dq" % size, self.buffer, self.offset)
+        values = struct.unpack_from("<%dq" % size, self.buffer, self.slots_offset)
+
+        # Rotate the ring so that the slot for ``first`` comes first, then
+        # mask off anything that doesn't belong to the requested buckets.
+        start = first % size
+        result = [
+            value if stored == expected else 0
+            for stored, value, expected in zip(
+                buckets[start:] + buckets[:start],
+                values[start:] + values[:start],
+                xrange(first, first + size),
+            )
+        ]
+        return result[:count]
+
+
+class SetRing(Ring):
+    """
+    A ring of HyperLogLog sketches, each using ``2 ** precision`` one byte
+    registers. The standard error of the estimated cardinality is about
+    ``1.04 / sqrt(2 ** precision)``.
+    """
+
+    def __init__(self, size, buffer=None, offset=0, precision=7):
+        self.precision = precision
+        self.slot_size = 1 << precision
+        super(SetRing, self).__init__(size, buffer, offset)
+
+    def read_slot(self, index):
+        start = self.get_slot_offset(index)
+        return bytearray(self.buffer[start : start + self.slot_size])
+
+    def write_slot(self, index, registers):
+        start = self.get_slot_offset(index)
+        self.buffer[start : start + self.slot_size] = bytes(registers)
+
+    def update(self, bucket, values):
+        index = self.acquire(bucket)
+        if index is None:
+            return
+
+        registers = self.read_slot(index)
+        for value in values:
+            value = get_hash(value)
+            register = value & (self.slot_size - 1)
+            rank = (64 - self.precision) - (value >> self.precision).bit_length() + 1
+            if rank > registers[register]:
+                registers[register] = rank
+        self.write_slot(index, registers)
+
+    def merge(self, bucket, registers):
+        index = self.acquire(bucket)
+        if index is not None:
+            self.write_slot(
+                index, union_registers(self.slot_size, [self.read_slot(index), registers])
+            )
+
+
+class FrequencyRing(Ring):
+    """
+    A ring of frequency tables, each of which tracks the ``members`` highest
+    scoring members using the Space-Saving algorithm: when a table is full, the
+    lowest scoring member is replaced, and its score is carried over to the new
+    member. Scores are exact as long as no more than ``members`` distinct
+    members have been recorded in an interval, and are otherwise overestimated
+    by at most the lowest score in the table.
+
+    Members are stored as UTF-8 text of up to ``member_length`` bytes, and
+    longer members are not recorded.
+    """
+
+    def __init__(self, size, buffer=None, offset=0, members=8, member_length=31):
+        self.members = members
+        self.member_length = member_length
+        self.entry = struct.Struct("<dB%ds" % member_length)
+        self.slot_size = members * self.entry.size
+        super(FrequencyRing, self).__init__(size, buffer, offset)
+
+    def read_slot(self, index):
+        offset = self.get_slot_offset(index)
+        table = {}
+        for i in xrange(self.members):
+            score, length, member = self.entry.unpack_from(
+                self.buffer, offset + i * self.entry.size
+            )
+            if length:
+                table[member[:length].decode("utf-8")] = score
+        return table
+
+    def write_slot(self, index, table):
+        offset = self.get_slot_offset(index)
+        entries = list(table.items())
+        for i in xrange(self.members):
+            if i < len(entries):
+                member, score = entries[i]
+                member = member.encode("utf-8")
+                self.entry.pack_into(
+                    self.buffer, offset + i * self.entry.size, score, len(member), member
+                )
+            else:
+                self.entry.pack_into(self.buffer, offset + i * self.entry.size, 0.0, 0, b"")
+
+    def update(self, bucket, items):
+        index = self.acquire(bucket)
+        if index is None:
+            return
+
+        table = self.read_slot(index)
+        for member, score in six.iteritems(items):
+            member = six.text_type(member)
+            if len(member.encode("utf-8")) > self.member_length:
+                logger.warning("Not recording frequency table member that is too long")
+                continue
+
+            if member in table:
+                table[member] += score
+            elif len(table) < self.members:
+                table[member] = score
+            else:
+                lowest = min(table, key=table.get)
+                table[member] = table.pop(lowest) + score
+        self.write_slot(index, table)
+
+
+class RecordTable(object):
+    """
+    A fixed capacity, open addressing hash table of records in a buffer.
+
+    Each record holds the series for a single ``(model, key, environment)``
+    as one ring per rollup, preceded by the hash of the series (which is
+    zero for records that have never been used) and the time that the record
+    was last written to. Records that haven't been written to for longer than
+    the longest rollup retains data for only contain expired data, so they
+    are reused for other series.
+    """
+
+    header = struct.Struct("<Qq")
+
+    def __init__(self, buffer, offset, capacity, rollups, ring_class, **ring_options):
+        self.buffer = buffer
+        self.offset = offset
+        self.capacity = capacity
+        self.rollups = rollups
+        self.ring_class = ring_class
+        self.ring_options = ring_options
+
+        self.ring_offsets = OrderedDict()
+        size = self.header.size
+        for rollup, samples in rollups:
+            self.ring_offsets[rollup] = size
+            size += ring_class(samples, **ring_options).get_storage_size()
+        self.record_size = size
+
+        self.retention = max(rollup * samples for rollup, samples in rollups)
+
+    def get_storage_size(self):
+        return self.capacity * self.record_size
+
+    def get_record_offset(self, index):
+        return self.offset + index * self.record_size
+
+    def probe(self, fingerprint):
+        for i in xrange(min(MAX_PROBES, self.capacity)):
+            index = (fingerprint + i) % self.capacity
+            stored, updated = self.header.unpack_from(self.buffer, self.get_record_offset(index))
+            yield index, stored, updated
+
+    def find(self, fingerprint):
+        for index, stored, updated in self.probe(fingerprint):
+            if stored == fingerprint:
+                return index
+            elif stored == 0:
+                break
+        return None
+
+    def allocate(self, fingerprint, now):
+        """
+        Returns the index of the record for ``fingerprint``, reusing an
+        unused or expired record if it doesn't have one yet, or ``None`` if
+        there aren't any available.
+        """
+        index = self.find(fingerprint)
+        if index is None:
+            for candidate, stored, updated in self.probe(fingerprint):
+                if stored == 0 or updated + self.retention < now:
+                    index = candidate
+                    break
+            else:
+                return None
+            self.clear(index)
+
+        self.header.pack_into(self.buffer, self.get_record_offset(index), fingerprint, now)
+        return index
+
+    def clear(self, index):
+        start = self.get_record_offset(index) + self.header.size
+        size = self.record_size - self.header.size
+        self.buffer[start : start + size] = b"\x00" * size
+
+    def release(self, index):
+        """
+        Discard the data in a record, and make it available for reuse. (The
+        hash is retained so that lookups for other series still probe past
+        it.)
+        """
+        self.clear(index)
+        fingerprint, updated = self.header.unpack_from(self.buffer, self.get_record_offset(index))
+        self.header.pack_into(self.buffer, self.get_record_offset(index), fingerprint, 0)
+
+    def get_rings(self, index):
+        offset = self.get_record_offset(index)
+        return OrderedDict(
+            (
+                rollup,
+                self.ring_class(
+                    samples, self.buffer, offset + self.ring_offsets[rollup], **self.ring_options
+                ),
+            )
+            for rollup, samples in self.rollups
+        )
+
+
+class RingBufferTSDB(BaseTSDB):
+    """
+    A time-series storage built on fixed size ring buffers, kept in a memory
+    mapped file that is shared by every process that uses the same ``path``.
+
+    Each counter, distinct counter and frequency table keeps one ring per
+    rollup, sized to the number of samples configured for that rollup, and
+    expired intervals are overwritten in place. Distinct counters use
+    HyperLogLog sketches, and frequency tables keep the top
+    ``frequency_table_members`` members of each interval, so every ring has
+    a fixed size. The file holds a fixed number of counters, distinct
+    counters and frequency tables (per model, key and environment), and
+    writes to new series are dropped when all of the records that they could
+    use are taken by series that have been written to recently.
+
+    The file is created sparse, so memory is only used for the parts of it
+    that have been written to. Data persists in the file, so a path on a
+    local disk survives restarts (and a path on a tmpfs, such as
+    ``/dev/shm``, doesn't.) Data in files written with a different
+    configuration is discarded.
+
+    >>> RingBufferTSDB(path='/var/lib/sentry/tsdb', max_counters=16384)
+    """
+
+    def __init__(
+        self,
+        path,
+        max_counters=8192,
+        max_distinct_counters=1024,
+        max_frequency_tables=1024,
+        distinct_counter_precision=7,
+        frequency_table_members=8,
+        frequency_table_member_length=31,
+        **options
+    ):
+        super(RingBufferTSDB, self).__init__(**options)
+        self.path = path
+
+        rollups = list(self.rollups.items())
+        self.layout = OrderedDict(
+            [
+                ("rollups", rollups),
+                ("max_counters", max_counters),
+                ("max_distinct_counters", max_distinct_counters),
+                ("max_frequency_tables", max_frequency_tables),
+                ("distinct_counter_precision", distinct_counter_precision),
+                ("frequency_table_members", frequency_table_members),
+                ("frequency_table_member_length", frequency_table_member_length),
+            ]
+        )
+
+        self.counters = RecordTable(None, HEADER_SIZE, max_counters, rollups, CounterRing)
+        self.sets = RecordTable(
+            None,
+            self.counters.offset + self.counters.get_storage_size(),
+            max_distinct_counters,
+            rollups,
+            SetRing,
+            precision=distinct_counter_precision,
+        )
+        self.frequencies = RecordTable(
+            None,
+            self.sets.offset + self.sets.get_storage_size(),
+            max_frequency_tables,
+            rollups,
+            FrequencyRing,
+            members=frequency_table_members,
+            member_length=frequency_table_member_length,
+        )
+        self.size = self.frequencies.offset + self.frequencies.get_storage_size()
+
+        self.__open_lock = threading.Lock()
+        self.__pid = None
+        self.__fd = None
+        self.__mapping = None
+        self.__lock = None
+
+    def __get_header(self):
+        layout = json.dumps(self.layout).encode("utf-8")
+        header = struct.pack("<8sI", HEADER_MAGIC, len(layout)) + layout
+        assert len(header) <= HEADER_SIZE
+        return header
+
+    def __open(self):
+        # File locks are shared with forked processes (along with the file
+        # descriptor), so every process opens the file for itself.
+        pid = os.getpid()
+        if self.__pid == pid:
+            return
+
+        with self.__open_lock:
+            if self.__pid == pid:
+                return
+
+            if self.__pid is not None:
+                # Release the copies inherited from the parent process.
+                self.__mapping.close()
+                os.close(self.__fd)
+
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                header = self.__get_header()
+                size = os.fstat(fd).st_size
+                os.lseek(fd, 0, os.SEEK_SET)
+                if size != self.size or os.read(fd, len(header)) != header:
+                    if size:
+                        logger.warning(
+                            "Discarding tsdb data with mismatched layout", extra={"path": self.path}
+                        )
+                    os.ftruncate(fd, 0)
+                    os.ftruncate(fd, self.size)
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    os.write(fd, header)
+                mapping = mmap.mmap(fd, self.size)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+            for table in (self.counters, self.sets, self.frequencies):
+                table.buffer = mapping
+
+            self.__fd, self.__mapping, self.__lock = fd, mapping, threading.Lock()
+            self.__pid = pid
+
+    def close(self):
+        """
+        Release the file. (It is opened again if the backend is used.)
+        """
+        with self.__open_lock:
+            if self.__pid != os.getpid():
+                return
+
+            self.__mapping.close()
+            os.close(self.__fd)
+            self.__pid = self.__fd = self.__mapping = self.__lock = None
+
+    @contextmanager
+    def __locked(self, exclusive=False):
+        self.__open()
+
+        # File locks only exclude other processes, so threads in this process
+        # are excluded separately.
+        with self.__lock:
+            fcntl.flock(self.__fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(self.__fd, fcntl.LOCK_UN)
+
+    def flush(self):
+        with self.__locked(exclusive=True):
+            os.ftruncate(self.__fd, HEADER_SIZE)
+            os.ftruncate(self.__fd, self.size)
+
+    def _get_fingerprint(self, model, key, environment_id):
+        return get_hash(u"{}:{}:{}".format(model.value, key, environment_id)) or 1
+
+    def _allocate(self, table, model, key, environment_id, now):
+        index = table.allocate(self._get_fingerprint(model, key, environment_id), now)
+        if index is None:
+            logger.warning(
+                "Dropping tsdb write, no records are available",
+                extra={"model": model.name, "path": self.path},
+            )
+        return index
+
+    def _get_rings(self, table, model, key, environment_id, now):
+        index = self._allocate(table, model, key, environment_id, now)
+        if index is None:
+            return {}
+        return table.get_rings(index)
+
+    def _find_ring(self, table, model, key, environment_id, rollup):
+        index = table.find(self._get_fingerprint(model, key, environment_id))
+        if index is None:
+            return None
+        return table.get_rings(index)[rollup]
+
+    def _merge(self, table, model, destination, sources, environment_ids, update):
+        now = int(time.time())
+        with self.__locked(exclusive=True):
+            for environment_id in environment_ids:
+                for source in sources:
+                    index = table.find(self._get_fingerprint(model, source, environment_id))
+                    if index is None:
+                        continue
+                    destination_index = self._allocate(
+                        table, model, destination, environment_id, now
+                    )
+                    if destination_index is None or destination_index == index:
+                        continue
+                    dest = table.get_rings(destination_index)
+                    for rollup, ring in six.iteritems(table.get_rings(index)):
+                        for bucket, value in ring.items():
+                            update(dest[rollup], bucket, value)
+                    table.release(index)
+
+    def _delete(self, table, models, keys, start, end, timestamp, environment_ids):
+        rollups = self.get_active_series(start, end, timestamp)
+        with self.__locked(exclusive=True):
+            for rollup, series in rollups.items():
+                buckets = [
+                    self.normalize_to_rollup(bucket_timestamp, rollup)
+                    for bucket_timestamp in series
+                ]
+                for model in models:
+                    for key in keys:
+                        for environment_id in environment_ids:
+                            ring = self._find_ring(table, model, key, environment_id, rollup)
+                            if ring is None:
+                                continue
+                            for bucket in buckets:
+                                ring.discard(bucket)
+
+    def _get_slots(self, table, model, key, environment_id, rollup, series):
+        ring = self._find_ring(table, model, key, environment_id, rollup)
+        if ring is None:
+            return [None] * len(series)
+        return [ring.get(self.normalize_ts_to_rollup(timestamp, rollup)) for timestamp in series]
+
+    def incr_multi(self, items, timestamp=None, count=1, environment_id=None):
+        self.validate_arguments([item[0] for item in items], [environment_id])
+
+        if timestamp is None:
+            timestamp = timezone.now()
+
+        environment_ids = set([environment_id, None])
+
+        now = int(time.time())
+        with self.__locked(exclusive=True):
+            for item in items:
+                if len(item) == 2:
+                    model, key = item
+                    options = {}
+                else:
+                    model, key, options = item
+
+                item_timestamp = options.get("timestamp", timestamp)
+                item_count = options.get("count", count)
+                for environment_id in environment_ids:
+                    rings = self._get_rings(self.counters, model, key, environment_id, now)
+                    for rollup, ring in six.iteritems(rings):
+                        ring.incr(self.normalize_to_rollup(item_timestamp, rollup), item_count)
+
+    def incr(self, model, key, timestamp=None, count=1, environment_id=None):
+        self.incr_multi([(model, key)], timestamp, count, environment_id=environment_id)
+
+    def merge(self, model, destination, sources, timestamp=None, environment_ids=None):
+        environment_ids = (set(environment_ids) if environment_ids is not None else set()).union(
+            [None]
+        )
+
+        self.validate_arguments([model], environment_ids)
+
+        self._merge(
+            self.counters,
+            model,
+            destination,
+            sources,
+            environment_ids,
+            lambda ring, bucket, value: ring.incr(bucket, value),
+        )
+
+    def delete(self, models, keys, start=None, end=None, timestamp=None, environment_ids=None):
+        environment_ids = (set(environment_ids) if environment_ids is not None else set()).union(
+            [None]
+        )
+
+        self.validate_arguments(models, environment_ids)
+
+        self._delete(self.counters, models, keys, start, end, timestamp, environment_ids)
+
+    def get_range(self, model, keys, start, end, rollup=None, environment_ids=None):
+        self.validate_arguments([model], environment_ids if environment_ids is not None else [None])
+
+        rollup, series = self.get_optimal_rollup_series(start, end, rollup)
+        first = self.normalize_ts_to_rollup(series[0], rollup)
+
+        results = {}
+        with self.__locked():
+            for key in keys:
+                values = [0] * len(series)
+                for environment_id in environment_ids or [None]:
+                    ring = self._find_ring(self.counters, model, key, environment_id, rollup)
+                    if ring is not None:
+                        values = list(map(sum, zip(values, ring.get_range(first, len(series)))))
+                results[key] = list(zip(series, values))
+        return results
+
+    def record(self, model, key, values, timestamp=None, environment_id=None):
+        self.record_multi([(model, key, values)], timestamp, environment_id=environment_id)
+
+    def record_multi(self, items, timestamp=None, environment_id=None):
+        self.validate_arguments([model for model, key, values in items], [environment_id])
+
+        if timestamp is None:
+            timestamp = timezone.now()
+
+        environment_ids = set([environment_id, None])
+
+        now = int(time.time())
+        with self.__locked(exclusive=True):
+            for model, key, values in items:
+                for environment_id in environment_ids:
+                    rings = self._get_rings(self.sets, model, key, environment_id, now)
+                    for rollup, ring in six.iteritems(rings):
+                        ring.update(self.normalize_to_rollup(timestamp, rollup), values)
+
+    def get_distinct_counts_series(
+        self, model, keys, start, end=None, rollup=None, environment_id=None
+    ):
+        self.validate_arguments([model], [environment_id])
+
+        rollup, series = self.get_optimal_rollup_series(start, end, rollup)
+
+        results = {}
+        with self.__locked():
+            for key in keys:
+                slots = self._get_slots(self.sets, model, key, environment_id, rollup, series)
+                results[key] = [
+                    (timestamp, estimate_cardinality(registers) if registers else 0)
+                    for timestamp, registers in zip(series, slots)
+                ]
+        return results
+
+    def get_distinct_counts_totals(
+        self, model, keys, start, end=None, rollup=None, environment_id=None
+    ):
+        self.validate_arguments([model], [environment_id])
+
+        rollup, series = self.get_optimal_rollup_series(start, end, rollup)
+        size = 1 << self.layout["distinct_counter_precision"]
+
+        results = {}
+        with self.__locked():
+            for key in keys:
+                slots = self._get_slots(self.sets, model, key, environment_id, rollup, series)
+                results[key] = estimate_cardinality(union_registers(size, filter(None, slots)))
+        return results
+
+    def get_distinct_counts_union(
+        self, model, keys, start, end=None, rollup=None, environment_id=None
+    ):
+        self.validate_arguments([model], [environment_id])
+
+        rollup, series = self.get_optimal_rollup_series(start, end, rollup)
+        size = 1 << self.layout["distinct_counter_precision"]
+
+        slots = []
+        with self.__locked():
+            for key in keys:
+                slots.extend(self._get_slots(self.sets, model, key, environment_id, rollup, series))
+        return estimate_cardinality(union_registers(size, filter(None, slots)))
+
+    def merge_distinct_counts(
+        self, model, destination, sources, timestamp=None, environment_ids=None
+    ):
+        environment_ids = (set(environment_ids) if environment_ids is not None else set()).union(
+            [None]
+        )
+
+        self.validate_arguments([model], environment_ids)
+
+        self._merge(
+            self.sets,
+            model,
+            destination,
+            sources,
+            environment_ids,
+            lambda ring, bucket, registers: ring.merge(bucket, registers),
+        )
+
+    def delete_distinct_counts(
+        self, models, keys, start=None, end=None, timestamp=None, environment_ids=None
+    ):
+        environment_ids = (set(environment_ids) if environment_ids is not None else set()).union(
+            [None]
+        )
+
+        self.validate_arguments(models, environment_ids)
+
+        self._delete(self.sets, models, keys, start, end, timestamp, environment_ids)
+
+    def record_frequency_multi(self, requests, timestamp=None, environment_id=None):
+        self.validate_arguments([model for model, request in requests], [environment_id])
+
+        if timestamp is None:
+            timestamp = timezone.now()
+
+        environment_ids = set([environment_id, None])
+
+        now = int(time.time())
+        with self.__locked(exclusive=True):
+            for model, request in requests:
+                for key, items in six.iteritems(request):
+                    items = {k: float(v) for k, v in six.iteritems(items)}
+                    for environment_id in environment_ids:
+                        rings = self._get_rings(self.frequencies, model, key, environment_id, now)
+                        for rollup, ring in six.iteritems(rings):
+                            ring.update(self.normalize_to_rollup(timestamp, rollup), items)
+
+    def get_most_frequent(
+        self, model, keys, start, end=None, rollup=None, limit=None, environment_id=None
+    ):
+        self.validate_arguments([model], [environment_id])
+
+        rollup, series = self.get_optimal_rollup_series(start, end, rollup)
+
+        results = {}
+        with self.__locked():
+            for key in keys:
+                result = Counter()
+                for slot in self._get_slots(
+                    self.frequencies, model, key, environment_id, rollup, series
+                ):
+                    if slot:
+                        result.update(slot)
+                results[key] = result.most_common(limit)
+        return results
+
+    def get_most_frequent_series(
+        self, model, keys, start, end=None, rollup=None, limit=None, environment_id=None
+    ):
+        self.validate_arguments([model], [environment_id])
+
+        rollup, series = self.get_optimal_rollup_series(start, end, rollup)
+
+        results = {}
+        with self.__locked():
+            for key in keys:
+                slots = self._get_slots(
+                    self.frequencies, model, key, environment_id, rollup, series
+                )
+                results[key] = [
+                    (timestamp, dict(Counter(slot).most_common(limit)) if slot else {})
+                    for timestamp, slot in zip(series, slots)
+                ]
+        return results
+
+    def get_frequency_series(self, model, items, start, end=None, rollup=None, environment_id=None):
+        self.validate_arguments([model], [environment_id])
+
+        rollup, series = self.get_optimal_rollup_series(start, end, rollup)
+
+        results = {}
+        with self.__locked():
+            for key, members in six.iteritems(items):
+                slots = self._get_slots(
+                    self.frequencies, model, key, environment_id, rollup, series
+                )
+                results[key] = [
+                    (
+                        timestamp,
+                        {
+                            member: (slot or {}).get(six.text_type(member), 0.0)
+                            for member in members
+                        },
+                    )
+                    for timestamp, slot in zip(series, slots)
+                ]
+        return results
+
+    def get_frequency_totals(self, model, items, start, end=None, rollup=None, environment_id=None):
+        self.validate_arguments([model], [environment_id])
+
+        results = {}
+        for key, series in six.iteritems(
+            self.get_frequency_series(model, items, start, end, rollup, environment_id)
+        ):
+            result = results[key] = {}
+            for timestamp, scores in series:
+                for member, score in scores.items():
+                    result[member] = result.get(member, 0.0) + score
+        return results
+
+    def merge_frequencies(self, model, destination, sources, timestamp=None, environment_ids=None):
+        environment_ids = (set(environment_ids) if environment_ids is not None else set()).union(
+            [None]
+        )
+
+        self.validate_arguments([model], environment_ids)
+
+        self._merge(
+            self.frequencies,
+            model,
+            destination,
+            sources,
+            environment_ids,
+            lambda ring, bucket, items: ring.update(bucket, items),
+        )
+
+    def delete_frequencies(
+        self, models, keys, start=None, end=None, timestamp=None, environment_ids=None
+    ):
+        environment_ids = (set(environment_ids) if environment_ids is not None else set()).union(
+            [None]
+        )
+
+        self.validate_arguments(models, environment_ids)
+
+        self._delete(self.frequencies, models, keys, start, end, timestamp, environment_ids)
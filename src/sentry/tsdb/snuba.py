@@ -199,6 +199,35 @@ class SnubaTSDB(BaseTSDB):
         `group_on_time`: whether to add a GROUP BY clause on the 'time' field.
         `group_on_model`: whether to add a GROUP BY clause on the primary model.
         """
+        return self.prepare_data(
+            model,
+            keys,
+            start,
+            end,
+            rollup,
+            environment_ids,
+            aggregation=aggregation,
+            group_on_model=group_on_model,
+            group_on_time=group_on_time,
+        )()
+
+    def prepare_data(
+        self,
+        model,
+        keys,
+        start,
+        end,
+        rollup=None,
+        environment_ids=None,
+        aggregation="count()",
+        group_on_model=True,
+        group_on_time=False,
+    ):
+        """
+        Prepares the query for `get_data`, and returns a function that sends
+        it to snuba and returns the result, which can be called from any
+        thread.
+        """
         # XXX: to counteract the hack in project_key_stats.py
         if model in self.model_being_upgraded_query_settings2.keys():
             keys = list(set(map(lambda x: int(x), keys)))
@@ -243,7 +272,7 @@ class SnubaTSDB(BaseTSDB):
         limit = min(10000, int(len(keys) * ((end - start).total_seconds() / rollup)))
 
         if keys:
-            result = snuba.query(
+            run_query = snuba.prepare_query(
                 dataset=model_query_settings.dataset,
                 start=start,
                 end=end,
@@ -259,15 +288,18 @@ class SnubaTSDB(BaseTSDB):
                 is_grouprelease=(model == TSDBModel.frequent_releases_by_group),
             )
         else:
-            result = {}
+            run_query = dict
 
         if group_on_time:
             keys_map["time"] = series
 
-        self.zerofill(result, groupby, keys_map)
-        self.trim(result, groupby, keys)
+        def get_data():
+            result = run_query()
+            self.zerofill(result, groupby, keys_map)
+            self.trim(result, groupby, keys)
+            return result
 
-        return result
+        return get_data
 
     def zerofill(self, result, groups, flat_keys):
         """
@@ -307,6 +339,14 @@ class SnubaTSDB(BaseTSDB):
                         del result[rk]
 
     def get_range(self, model, keys, start, end, rollup=None, environment_ids=None):
+        return self.prepare_range(model, keys, start, end, rollup, environment_ids)()
+
+    def prepare_range(self, model, keys, start, end, rollup=None, environment_ids=None):
+        """
+        Prepares the query for `get_range`, and returns a function that sends
+        it to snuba and returns the result, which can be called from any
+        thread.
+        """
         # 10s is the only rollup under an hour that we support
         if rollup and rollup == 10 and model in self.lower_rollup_query_settings.keys():
             model_query_settings = self.lower_rollup_query_settings.get(model)
@@ -320,7 +360,7 @@ class SnubaTSDB(BaseTSDB):
         else:
             aggregate_function = "count()"
 
-        result = self.get_data(
+        get_data = self.prepare_data(
             model,
             keys,
             start,
@@ -330,11 +370,16 @@ class SnubaTSDB(BaseTSDB):
             aggregation=aggregate_function,
             group_on_time=True,
         )
-        # convert
-        #    {group:{timestamp:count, ...}}
-        # into
-        #    {group: [(timestamp, count), ...]}
-        return {k: sorted(result[k].items()) for k in result}
+
+        def get_range():
+            result = get_data()
+            # convert
+            #    {group:{timestamp:count, ...}}
+            # into
+            #    {group: [(timestamp, count), ...]}
+            return {k: sorted(result[k].items()) for k in result}
+
+        return get_range
 
     def get_distinct_counts_series(
         self, model, keys, start, end=None, rollup=None, environment_id=None
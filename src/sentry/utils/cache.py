@@ -1,12 +1,68 @@
 from __future__ import absolute_import, print_function
 
 import functools
+import threading
+import time
+from collections import OrderedDict
 
 from django.core.cache import cache
 
 default_cache = cache
 
 
+class LocalCache(object):
+    """
+    A small, thread safe, least recently used cache for process memory.
+
+    When ``ttl`` is provided, values expire ``ttl`` seconds after they were
+    set, which bounds how long a process can hold on to a value that has
+    been changed or invalidated elsewhere.
+    """
+
+    def __init__(self, max_size, ttl=None, clock=time.time):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.__lock = threading.Lock()
+        self.__values = OrderedDict()
+
+    def get(self, key):
+        with self.__lock:
+            item = self.__values.pop(key, None)
+            if item is None:
+                return None
+
+            value, expires = item
+            if expires is not None and expires <= self.clock():
+                return None
+
+            self.__values[key] = item
+            return value
+
+    def set(self, key, value):
+        expires = self.clock() + self.ttl if self.ttl is not None else None
+        with self.__lock:
+            self.__values.pop(key, None)
+            self.__values[key] = (value, expires)
+            while len(self.__values) > self.max_size:
+                self.__values.popitem(last=False)
+
+    def delete(self, key):
+        with self.__lock:
+            self.__values.pop(key, None)
+
+    def clear(self):
+        with self.__lock:
+            self.__values.clear()
+
+
+# Rows that are looked up (or created) for every event are also kept in
+# process memory for a short time, so that once a row has been seen, the
+# ingestion hot path doesn't need to go to the shared cache to find it.
+# Values are stored under the same key that's used for the shared cache.
+local_cache = LocalCache(max_size=10000, ttl=60)
+
+
 class memoize(object):
     """
     Memoize the result of a property call.
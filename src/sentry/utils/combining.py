@@ -0,0 +1,127 @@
+"""
+sentry.utils.combining
+~~~~~~~~~~~~~~~~~~~~~~
+
+In-process write combining.
+
+A ``WriteCombiner`` accumulates writes in process memory, merging writes
+that share a key, and hands the combined values to a callback in batches.
+Pending writes are flushed from a background thread every ``interval``
+seconds, whenever ``max_size`` distinct keys are pending, and when the
+process shuts down (``atexit``, the Celery ``worker_process_shutdown``
+signal and uWSGI's ``atexit`` hook.)
+
+Writes that are pending when a process dies without running its shutdown
+hooks (``SIGKILL``, OOM kills, segfaults) are lost. The loss window is
+bounded by the flush ``interval`` and by ``max_size`` keys per combiner.
+"""
+from __future__ import absolute_import
+
+import atexit
+import logging
+import os
+import threading
+import time
+import weakref
+
+from celery.signals import worker_process_shutdown
+
+logger = logging.getLogger(__name__)
+
+_combiners = weakref.WeakSet()
+
+_missing = object()
+
+
+def flush_all(**kwargs):
+    """
+    Flush all pending writes of every combiner in this process.
+    """
+    for combiner in list(_combiners):
+        try:
+            combiner.flush()
+        except Exception:
+            logger.exception("Failed to flush write combiner on shutdown")
+
+
+class WriteCombiner(object):
+    """
+    Combines writes to the same key and applies them in batches.
+
+    ``merge(key, existing, value)`` returns the combination of a pending
+    value with a new value for the same key. ``apply(pending)`` receives a
+    mapping of key => combined value and is responsible for writing it.
+    """
+
+    def __init__(self, apply, merge, interval=1.0, max_size=1000):
+        self.apply = apply
+        self.merge = merge
+        self.interval = interval
+        self.max_size = max_size
+        self._pid = None
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def _start(self):
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+
+        # Anything pending after a fork belongs to the parent process, which
+        # is still responsible for writing it -- the child starts empty, and
+        # with its own lock and flusher thread.
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._pid = pid
+
+        t = threading.Thread(target=self._run, args=(pid,))
+        t.setDaemon(True)
+        t.start()
+
+        _combiners.add(self)
+
+    def _run(self, pid):
+        while self._pid == pid:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush write combiner")
+
+    def add(self, key, value):
+        self._start()
+
+        with self._lock:
+            existing = self._pending.get(key, _missing)
+            if existing is not _missing:
+                value = self.merge(key, existing, value)
+            self._pending[key] = value
+            full = len(self._pending) >= self.max_size
+
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        if pending:
+            self.apply(pending)
+
+
+atexit.register(flush_all)
+
+worker_process_shutdown.connect(flush_all, weak=False)
+
+try:
+    import uwsgi
+except ImportError:
+    pass
+else:
+
+    def _uwsgi_atexit(previous=getattr(uwsgi, "atexit", None)):
+        flush_all()
+        if previous is not None:
+            previous()
+
+    uwsgi.atexit = _uwsgi_atexit
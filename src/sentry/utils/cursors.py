@@ -45,12 +45,13 @@ class Cursor(object):
 
 
 class CursorResult(Sequence):
-    def __init__(self, results, next, prev, hits=None, max_hits=None):
+    def __init__(self, results, next, prev, hits=None, max_hits=None, hits_estimated=False):
         self.results = results
         self.next = next
         self.prev = prev
         self.hits = hits
         self.max_hits = max_hits
+        self.hits_estimated = hits_estimated
 
     def __len__(self):
         return len(self.results)
@@ -194,7 +195,15 @@ def _build_prev_values(cursor, results, key, limit, is_desc):
 
 
 def build_cursor(
-    results, key, limit=100, is_desc=False, cursor=None, hits=None, max_hits=None, on_results=None
+    results,
+    key,
+    limit=100,
+    is_desc=False,
+    cursor=None,
+    hits=None,
+    max_hits=None,
+    on_results=None,
+    hits_estimated=False,
 ):
     if cursor is None:
         cursor = Cursor(0, 0, 0)
@@ -226,5 +235,10 @@ def build_cursor(
         results = on_results(results)
 
     return CursorResult(
-        results=results, next=next_cursor, prev=prev_cursor, hits=hits, max_hits=max_hits
+        results=results,
+        next=next_cursor,
+        prev=prev_cursor,
+        hits=hits,
+        max_hits=max_hits,
+        hits_estimated=hits_estimated,
     )
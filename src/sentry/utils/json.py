@@ -103,6 +103,15 @@ def loads(value, **kwargs):
     return _default_decoder.decode(value)
 
 
+def raw_decode(value, idx=0):
+    """
+    Decode a JSON document from ``value``, starting at ``idx``. Returns the
+    decoded value and the index where the document ended, ignoring anything
+    that follows it.
+    """
+    return _default_decoder.raw_decode(value, idx)
+
+
 def dumps_htmlsafe(value):
     return mark_safe(_default_escaped_encoder.encode(value))
 
@@ -1,5 +1,9 @@
 from __future__ import absolute_import
 
+import logging
+
+logger = logging.getLogger(__name__)
+
 
 class LockBackend(object):
     """
@@ -16,8 +20,10 @@ class LockBackend(object):
         but how or if it is implemented is dependent on the specific backend
         implementation.
 
-        The return value is not used. If the lock cannot be acquired, an
-        exception should be raised.
+        Backends that support fencing tokens return one here: a number that
+        is greater than the token returned by any previous acquisition of the
+        same lock. Otherwise, ``None`` is returned. If the lock cannot be
+        acquired, an exception should be raised.
         """
         raise NotImplementedError
 
@@ -26,3 +32,45 @@ class LockBackend(object):
         Release a lock. The return value is not used.
         """
         raise NotImplementedError
+
+    def acquire_many(self, keys, duration, routing_key=None):
+        """
+        Acquire several locks at once. Either all of the locks are acquired,
+        or none are (and an exception is raised.) Returns a fencing token, as
+        with ``acquire``.
+
+        The default implementation acquires the locks one at a time in sorted
+        order (so that concurrent callers can't deadlock each other), and
+        releases any locks that were already acquired if one of the locks
+        can't be acquired.
+        """
+        token = None
+        acquired = []
+        try:
+            for key in sorted(set(keys)):
+                result = self.acquire(key, duration, routing_key)
+                if result is not None and (token is None or result > token):
+                    token = result
+                acquired.append(key)
+        except Exception:
+            for key in acquired:
+                try:
+                    self.release(key, routing_key)
+                except Exception as error:
+                    logger.warning("Failed to release %r due to error: %r", key, error)
+            raise
+        return token
+
+    def release_many(self, keys, routing_key=None):
+        """
+        Release several locks at once. The return value is not used.
+        """
+        errors = []
+        for key in sorted(set(keys)):
+            try:
+                self.release(key, routing_key)
+            except Exception as error:
+                errors.append(error)
+
+        if errors:
+            raise Exception(u"Failed to release locks: {}".format(errors))
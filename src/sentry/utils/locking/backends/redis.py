@@ -2,11 +2,13 @@ from __future__ import absolute_import
 
 import six
 
+from collections import defaultdict
 from uuid import uuid4
 
 from sentry.utils import redis
 from sentry.utils.locking.backends import LockBackend
 
+acquire_locks = redis.load_script("utils/locking/acquire_locks.lua")
 delete_lock = redis.load_script("utils/locking/delete_lock.lua")
 
 
@@ -41,15 +43,85 @@ class RedisLockBackend(LockBackend):
 
         return self.cluster.get_local_client_for_key(key)
 
+    def get_host(self, key, routing_key=None):
+        if isinstance(routing_key, six.integer_types):
+            return routing_key % len(self.cluster.hosts)
+
+        if routing_key is not None:
+            key = routing_key
+        else:
+            key = self.prefix_key(key)
+
+        return self.cluster.get_router().get_host_for_key(key)
+
     def prefix_key(self, key):
         return u"{}{}".format(self.prefix, key)
 
+    def get_fencing_key(self):
+        # Tokens are generated by a counter on each host, which is shared by
+        # all locks on that host.
+        return u"{}fence".format(self.prefix)
+
     def acquire(self, key, duration, routing_key=None):
         client = self.get_client(key, routing_key)
-        full_key = self.prefix_key(key)
-        if client.set(full_key, self.uuid, ex=duration, nx=True) is not True:
-            raise Exception(u"Could not set key: {!r}".format(full_key))
+        return acquire_locks(
+            client, (self.prefix_key(key), self.get_fencing_key()), (self.uuid, duration)
+        )
 
     def release(self, key, routing_key=None):
         client = self.get_client(key, routing_key)
         delete_lock(client, (self.prefix_key(key),), (self.uuid,))
+
+    def acquire_many(self, keys, duration, routing_key=None):
+        # Locks on the same host are acquired atomically with a single script
+        # call. If the locks are spread across several hosts, the hosts are
+        # visited in a consistent order, and any locks that were already
+        # acquired are released if a later host fails.
+        hosts = defaultdict(set)
+        for key in keys:
+            hosts[self.get_host(key, routing_key)].add(key)
+
+        token = None
+        acquired = []
+        try:
+            for host, host_keys in sorted(hosts.items()):
+                host_keys = sorted(host_keys)
+                result = acquire_locks(
+                    self.cluster.get_local_client(host),
+                    [self.prefix_key(key) for key in host_keys] + [self.get_fencing_key()],
+                    (self.uuid, duration),
+                )
+                acquired.append((host, host_keys))
+                if token is None or result > token:
+                    token = result
+        except Exception:
+            for host, host_keys in acquired:
+                try:
+                    self.__release_keys(host, host_keys)
+                except Exception:
+                    pass
+            raise
+
+        return token
+
+    def release_many(self, keys, routing_key=None):
+        hosts = defaultdict(set)
+        for key in keys:
+            hosts[self.get_host(key, routing_key)].add(key)
+
+        errors = []
+        for host, host_keys in sorted(hosts.items()):
+            try:
+                self.__release_keys(host, sorted(host_keys))
+            except Exception as error:
+                errors.append(error)
+
+        if errors:
+            raise Exception(u"Failed to release locks: {}".format(errors))
+
+    def __release_keys(self, host, keys):
+        delete_lock(
+            self.cluster.get_local_client(host),
+            [self.prefix_key(key) for key in keys],
+            (self.uuid,),
+        )
@@ -2,24 +2,60 @@ from __future__ import absolute_import
 
 import logging
 import six
+import time
 
 from contextlib import contextmanager
 
+from sentry.utils import metrics
 from sentry.utils.locking import UnableToAcquireLock
 
 logger = logging.getLogger(__name__)
 
 
+def get_lock_name(key):
+    """
+    Derive a name for a lock to be used in metrics, which should not include
+    any identifiers (e.g. ``"fileblob:upload:{checksum}"`` becomes
+    ``"fileblob"``.)
+    """
+    return key.split(":", 1)[0]
+
+
 class Lock(object):
-    def __init__(self, backend, key, duration, routing_key=None):
+    """
+    A lock on a single key.
+
+    Each attempt to acquire the lock is recorded in metrics, tagged with the
+    lock ``name``. Failed attempts are counted as contention, and when the
+    lock is finally acquired, the time spent waiting (since the first failed
+    attempt) and the number of attempts are recorded. The time that the
+    lock was held for is recorded when it is released.
+    """
+
+    def __init__(self, backend, key, duration, routing_key=None, name=None):
         self.backend = backend
         self.key = key
         self.duration = duration
         self.routing_key = routing_key
+        self.name = name if name is not None else get_lock_name(key)
+
+        # The fencing token returned by the backend for the current
+        # acquisition of this lock (if supported by the backend.)
+        self.token = None
+
+        self.__attempts = 0
+        self.__first_attempt = None
+        self.__acquired_at = None
 
     def __repr__(self):
         return u"<Lock: {!r}>".format(self.key)
 
+    def _acquire(self):
+        return self.backend.acquire(self.key, self.duration, self.routing_key)
+
+    def _release(self):
+        self.backend.release(self.key, self.routing_key)
+
     def acquire(self):
         """
         Attempt to acquire the lock.
@@ -29,14 +65,27 @@ class Lock(object):
         lock cannot be acquired, an ``UnableToAcquireLock`` error will be
         raised.
         """
+        now = time.time()
+        if self.__first_attempt is None:
+            self.__first_attempt = now
+        self.__attempts += 1
+
+        tags = {"name": self.name}
         try:
-            self.backend.acquire(self.key, self.duration, self.routing_key)
+            self.token = self._acquire()
         except Exception as error:
+            metrics.incr("locks.contended", tags=tags)
             six.raise_from(
                 UnableToAcquireLock(u"Unable to acquire {!r} due to error: {}".format(self, error)),
                 error,
             )
 
+        self.__acquired_at = time.time()
+        metrics.timing("locks.wait_time", self.__acquired_at - self.__first_attempt, tags=tags)
+        metrics.timing("locks.attempts", self.__attempts, tags=tags)
+        self.__attempts = 0
+        self.__first_attempt = None
+
         @contextmanager
         def releaser():
             try:
@@ -53,7 +102,35 @@ class Lock(object):
         Any exceptions raised when attempting to release the lock are logged
         and suppressed.
         """
+        if self.__acquired_at is not None:
+            metrics.timing(
+                "locks.hold_time", time.time() - self.__acquired_at, tags={"name": self.name}
+            )
+            self.__acquired_at = None
+
         try:
-            self.backend.release(self.key, self.routing_key)
+            self._release()
         except Exception as error:
             logger.warning("Failed to release %r due to error: %r", self, error, exc_info=True)
+
+
+class MultiLock(Lock):
+    """
+    A lock on several keys, which are acquired (or not) together.
+    """
+
+    def __init__(self, backend, keys, duration, routing_key=None, name=None):
+        keys = sorted(set(keys))
+        super(MultiLock, self).__init__(
+            backend,
+            keys,
+            duration,
+            routing_key,
+            name=name if name is not None else get_lock_name(keys[0]),
+        )
+
+    def _acquire(self):
+        return self.backend.acquire_many(self.key, self.duration, self.routing_key)
+
+    def _release(self):
+        self.backend.release_many(self.key, self.routing_key)
@@ -1,14 +1,22 @@
 from __future__ import absolute_import
 
-from sentry.utils.locking.lock import Lock
+from sentry.utils.locking.lock import Lock, MultiLock
 
 
 class LockManager(object):
     def __init__(self, backend):
         self.backend = backend
 
-    def get(self, key, duration, routing_key=None):
+    def get(self, key, duration, routing_key=None, name=None):
         """
-        Retrieve a ``Lock`` instance.
+        Retrieve a ``Lock`` instance. The ``name`` is used to identify the
+        lock in metrics, and defaults to the first component of the key.
         """
-        return Lock(self.backend, key, duration, routing_key)
+        return Lock(self.backend, key, duration, routing_key, name=name)
+
+    def get_many(self, keys, duration, routing_key=None, name=None):
+        """
+        Retrieve a ``Lock`` instance that acquires all of the provided keys
+        atomically.
+        """
+        return MultiLock(self.backend, keys, duration, routing_key, name=name)
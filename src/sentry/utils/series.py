@@ -0,0 +1,172 @@
+"""
+sentry.utils.series
+~~~~~~~~~~~~~~~~~~~
+
+An array-backed representation of regular time series.
+
+Time series returned by the tsdb backends are lists of ``(timestamp, value)``
+tuples with a fixed interval between timestamps. Operating on those lists
+means creating (and asserting over) a tuple per data point. ``Series`` instead
+keeps the timestamps implicit -- ``start + rollup * i`` -- and stores values
+in a compact ``array``, so element-wise operations between aligned series run
+as a single ``map`` over two arrays instead of a Python loop over tuples.
+"""
+from __future__ import absolute_import
+
+import itertools
+import operator
+from array import array
+
+from six.moves import xrange
+
+__all__ = ("Series",)
+
+# Signed long: 64 bits on all platforms we run on.
+DEFAULT_TYPECODE = "l"
+
+
+class Series(object):
+    __slots__ = ("start", "rollup", "values")
+
+    def __init__(self, start, rollup, values, typecode=DEFAULT_TYPECODE):
+        self.start = int(start)
+        self.rollup = int(rollup)
+        if not isinstance(values, array):
+            values = array(typecode, values)
+        self.values = values
+
+    @classmethod
+    def zeros(cls, start, rollup, length, typecode=DEFAULT_TYPECODE):
+        return cls(start, rollup, array(typecode, [0]) * length)
+
+    @classmethod
+    def from_points(cls, points, start, rollup, length, typecode=DEFAULT_TYPECODE):
+        """
+        Build a series from a list of ``(timestamp, value)`` pairs. Points
+        must be aligned to ``start`` and ``rollup``, and at least ``length``
+        points must be provided. Points past ``length`` are discarded.
+        """
+        points = points[:length]
+        if len(points) != length or [p[0] for p in points] != list(
+            xrange(start, start + rollup * length, rollup)
+        ):
+            raise ValueError("points are not aligned to the series")
+        return cls(start, rollup, array(typecode, [p[1] for p in points]))
+
+    @classmethod
+    def zerofill(cls, points, start, rollup, length, typecode=DEFAULT_TYPECODE):
+        """
+        Build a series from a sparse list of ``(timestamp, value)`` pairs.
+        Missing points are filled with zeroes and points that fall outside of
+        the series (or between intervals) are discarded.
+        """
+        values = array(typecode, [0]) * length
+        for timestamp, value in points:
+            index, remainder = divmod(int(timestamp) - start, rollup)
+            if not remainder and 0 <= index < length:
+                values[index] = value
+        return cls(start, rollup, values)
+
+    @classmethod
+    def sum(cls, point_lists, start, rollup, length, typecode=DEFAULT_TYPECODE):
+        """
+        Calculate the element-wise sum of many lists of ``(timestamp, value)``
+        pairs, all of which must be aligned to ``start`` and ``rollup``.
+
+        Rather than merging the lists one at a time, all points are flattened
+        into a single list and each column is summed with one slice, which
+        keeps the per-point work out of the interpreter loop.
+        """
+        point_lists = [points[:length] for points in point_lists]
+        flattened = list(itertools.chain.from_iterable(itertools.chain.from_iterable(point_lists)))
+        if flattened[0::2] != list(xrange(start, start + rollup * length, rollup)) * len(
+            point_lists
+        ):
+            raise ValueError("points are not aligned to the series")
+
+        values = flattened[1::2]
+        return cls(start, rollup, array(typecode, [sum(values[i::length]) for i in xrange(length)]))
+
+    def __len__(self):
+        return len(self.values)
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, Series)
+            and self.start == other.start
+            and self.rollup == other.rollup
+            and self.values == other.values
+        )
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return "<Series: start=%s rollup=%s values=%r>" % (
+            self.start,
+            self.rollup,
+            self.values.tolist(),
+        )
+
+    @property
+    def stop(self):
+        return self.start + self.rollup * len(self.values)
+
+    @property
+    def timestamps(self):
+        return xrange(self.start, self.stop, self.rollup)
+
+    def check_aligned(self, start, rollup, length):
+        if (self.start, self.rollup, len(self.values)) != (start, rollup, length):
+            raise ValueError("series are not aligned")
+
+    def points(self):
+        """
+        Return the series as a list of ``(timestamp, value)`` pairs.
+        """
+        return list(zip(self.timestamps, self.values.tolist()))
+
+    def total(self):
+        return sum(self.values)
+
+    def merge(self, other, function=operator.add):
+        """
+        Combine two aligned series element-wise. The values produced by
+        ``function`` may be of any type, so the result is a list.
+        """
+        other.check_aligned(self.start, self.rollup, len(self.values))
+        return list(map(function, self.values, other.values))
+
+    def __add__(self, other):
+        other.check_aligned(self.start, self.rollup, len(self.values))
+        return Series(
+            self.start,
+            self.rollup,
+            array(self.values.typecode, map(operator.add, self.values, other.values)),
+        )
+
+    def __sub__(self, other):
+        other.check_aligned(self.start, self.rollup, len(self.values))
+        return Series(
+            self.start,
+            self.rollup,
+            array(self.values.typecode, map(operator.sub, self.values, other.values)),
+        )
+
+    def resample(self, rollup):
+        """
+        Roll the series up into a coarser resolution. ``rollup`` must be a
+        multiple of the current resolution. Buckets are aligned to the epoch,
+        like the tsdb rollups are.
+        """
+        if rollup % self.rollup:
+            raise ValueError("rollup must be a multiple of the series rollup")
+
+        start = self.start - (self.start % rollup)
+        length = -(-(self.stop - start) // rollup)
+        values = array(self.values.typecode, [0]) * length
+        offset = (self.start - start) // self.rollup
+        ratio = rollup // self.rollup
+        for i, value in enumerate(self.values):
+            values[(i + offset) // ratio] += value
+        return Series(start, rollup, values)
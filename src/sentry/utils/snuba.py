@@ -1,5 +1,6 @@
 from __future__ import absolute_import
 
+import codecs
 from collections import namedtuple, OrderedDict
 from copy import deepcopy
 from contextlib import contextmanager
@@ -10,10 +11,12 @@ import os
 import pytz
 import re
 import six
+import sys
+import threading
 import time
 import urllib3
 
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from django.conf import settings
 
 from sentry import quotas
@@ -29,7 +32,9 @@ from sentry.models import (
 )
 from sentry.net.http import connection_from_url
 from sentry.utils import metrics, json
+from sentry.utils.cache import cache
 from sentry.utils.dates import to_timestamp
+from sentry.utils.hashlib import md5_text
 from sentry.eventstore.base import Columns
 
 # TODO remove this when Snuba accepts more than 500 issues
@@ -203,6 +208,9 @@ _snuba_pool = connection_from_url(
 )
 _query_thread_pool = ThreadPoolExecutor(max_workers=10)
 
+# The number of bytes read from a Snuba response at a time.
+STREAM_CHUNK_SIZE = 64 * 1024
+
 
 epoch_naive = datetime(1970, 1, 1, tzinfo=None)
 
@@ -222,20 +230,16 @@ def zerofill(data, start, end, rollup, orderby):
     data_by_time = {}
 
     for obj in data:
-        if obj["time"] in data_by_time:
-            data_by_time[obj["time"]].append(obj)
-        else:
-            data_by_time[obj["time"]] = [obj]
+        data_by_time.setdefault(obj["time"], []).append(obj)
 
     for key in six.moves.xrange(start, end, rollup):
-        if key in data_by_time and len(data_by_time[key]) > 0:
-            rv = rv + data_by_time[key]
-            data_by_time[key] = []
+        if key in data_by_time:
+            rv.extend(data_by_time.pop(key))
         else:
             rv.append({"time": key})
 
     if "-time" in orderby:
-        return list(reversed(rv))
+        rv.reverse()
 
     return rv
 
@@ -532,11 +536,20 @@ def transform_aliases_and_query(**kwargs):
         return {translated_columns.get(key, key): value for key, value in row.items()}
 
     if len(translated_columns):
-        result["data"] = [get_row(row) for row in result["data"]]
         if rollup and rollup > 0:
             result["data"] = zerofill(
-                result["data"], kwargs["start"], kwargs["end"], kwargs["rollup"], kwargs["orderby"]
+                (get_row(row) for row in result["data"]),
+                kwargs["start"],
+                kwargs["end"],
+                kwargs["rollup"],
+                kwargs["orderby"],
             )
+        else:
+            # Rows are replaced one at a time, so that only one copy of the
+            # result is held in memory.
+            data = result["data"]
+            for i, row in enumerate(data):
+                data[i] = get_row(row)
 
     return result
 
@@ -755,67 +768,340 @@ def raw_query(
     return bulk_raw_query([snuba_params], referrer=referrer)[0]
 
 
-def bulk_raw_query(snuba_param_list, referrer=None):
+NUMBER_TYPES = six.integer_types + (float,)
+
+
+class StreamingResponseDecoder(object):
+    """
+    Decodes a JSON object from an iterable of encoded chunks, without
+    holding the whole document in memory as text.
+
+    The rows of the ``data`` array are decoded one at a time (and passed
+    through ``transform``, if provided) as the document is read, so a large
+    result is only ever held in memory once, as decoded rows.
+    """
+
+    def __init__(self, chunks, transform=None, encoding="utf-8"):
+        self.chunks = iter(chunks)
+        self.transform = transform
+        self.decoder = codecs.getincrementaldecoder(encoding)()
+        self.buffer = u""
+        self.position = 0
+        self.exhausted = False
+
+    def __fill(self):
+        if self.exhausted:
+            raise UnexpectedResponseError(u"Unexpected end of JSON response")
+
+        try:
+            chunk = self.decoder.decode(next(self.chunks))
+        except StopIteration:
+            chunk = self.decoder.decode(b"", final=True)
+            self.exhausted = True
+
+        # Anything before the current position has already been decoded.
+        self.buffer = self.buffer[self.position :] + chunk
+        self.position = 0
+
+    def __peek(self):
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position].isspace():
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            self.__fill()
+
+    def __expect(self, *characters):
+        character = self.__peek()
+        if character not in characters:
+            raise UnexpectedResponseError(
+                u"Could not decode JSON response: unexpected {!r}".format(character)
+            )
+        self.position += 1
+        return character
+
+    def __value(self):
+        self.__peek()
+        while True:
+            try:
+                value, end = json.raw_decode(self.buffer, self.position)
+            except ValueError:
+                # The value may continue in the next chunk.
+                self.__fill()
+                continue
+
+            # A number that is cut off by the end of the buffer may be a
+            # valid (but incomplete) number by itself, e.g. "1." or "12".
+            if (
+                isinstance(value, NUMBER_TYPES)
+                and (end == len(self.buffer) or self.buffer[end] in ".eE+-")
+                and not self.exhausted
+            ):
+                self.__fill()
+                continue
+
+            self.position = end
+            return value
+
+    def __rows(self):
+        rows = []
+        self.__expect("[")
+        if self.__peek() == "]":
+            self.position += 1
+            return rows
+
+        while True:
+            row = self.__value()
+            rows.append(self.transform(row) if self.transform is not None else row)
+            if self.__expect(",", "]") == "]":
+                return rows
+
+    def decode(self):
+        result = {}
+        self.__expect("{")
+        if self.__peek() == "}":
+            self.position += 1
+            return result
+
+        while True:
+            key = self.__value()
+            self.__expect(":")
+            if key == "data" and self.__peek() == "[":
+                result[key] = self.__rows()
+            else:
+                result[key] = self.__value()
+            if self.__expect(",", "}") == "}":
+                return result
+
+
+def _snuba_query(query_params, headers, transform=None):
+    # The timer includes reading (and decoding) the response, as the body is
+    # streamed after the headers have been received.
+    with timer("snuba_query"):
+        try:
+            response = _snuba_pool.urlopen(
+                "POST",
+                "/query",
+                body=json.dumps(query_params),
+                headers=dict(headers, **{"accept-encoding": "gzip"}),
+                preload_content=False,
+            )
+        except urllib3.exceptions.HTTPError as err:
+            raise SnubaError(err)
+
+        try:
+            if response.status == 200:
+                chunks = response.stream(STREAM_CHUNK_SIZE)
+                with timer("decode_response"):
+                    body = StreamingResponseDecoder(chunks, transform=transform).decode()
+                # Read the rest of the response (e.g. the end of a chunked or
+                # compressed body), so that the connection can be reused.
+                for _ in chunks:
+                    pass
+            else:
+                data = response.data
+        except Exception as err:
+            exc_info = sys.exc_info()
+            # Connections that haven't been read completely can't be reused.
+            response.close()
+            if isinstance(err, urllib3.exceptions.HTTPError):
+                raise SnubaError(err)
+            six.reraise(*exc_info)
+
+        response.release_conn()
+
+    if response.status == 200:
+        return body
+
+    try:
+        body = json.loads(data)
+    except ValueError:
+        raise UnexpectedResponseError(u"Could not decode JSON response: {}".format(data))
+
+    if body.get("error"):
+        error = body["error"]
+        if response.status == 429:
+            raise RateLimitExceeded(error["message"])
+        elif error["type"] == "schema":
+            raise SchemaValidationError(error["message"])
+        elif error["type"] == "clickhouse":
+            raise clickhouse_error_codes_map.get(error["code"], QueryExecutionError)(
+                error["message"]
+            )
+        else:
+            raise SnubaError(error["message"])
+    else:
+        raise SnubaError(u"HTTP {}".format(response.status))
+
+
+# Queries that are currently being executed by this process for the result
+# cache, by cache key.
+_inflight_queries = {}
+_inflight_queries_lock = threading.Lock()
+
+
+def get_query_cache_ttl(query_params, referrer):
+    """
+    Returns the number of seconds that the results of a query may be cached
+    for, or ``None`` if they shouldn't be cached at all.
+
+    Caching is opted into per referrer (``SENTRY_SNUBA_CACHE_TTLS``), and
+    queries that require consistent results are never cached.
+    """
+    if query_params.get("consistent"):
+        return None
+    return settings.SENTRY_SNUBA_CACHE_TTLS.get(referrer)
+
+
+def get_query_cache_key(query_params, referrer, ttl):
+    """
+    Returns the result cache key for a prepared query.
+
+    The time bounds of the query are rounded down to a multiple of ``ttl``,
+    so queries relative to the current time share results for as long as
+    they would be cached. Conditions are ANDed, so their order is ignored.
+    """
+    params = dict(query_params)
+    for name in ("from_date", "to_date"):
+        if params.get(name):
+            timestamp = to_naive_timestamp(parse_datetime(params[name]))
+            params[name] = int(timestamp // ttl * ttl)
+    params["conditions"] = sorted(params.get("conditions") or [], key=json.dumps)
+    return u"snuba:q:{}".format(
+        md5_text(json.dumps([referrer, sorted(params.items())])).hexdigest()
+    )
+
+
+def _cached_snuba_query(query_params, referrer, ttl, headers):
+    """
+    Executes a query, or returns its result from the cache.
+
+    Identical queries that are executed concurrently are coalesced into one
+    request to Snuba: within a process, followers wait on the leader's
+    result directly, and across processes, they wait (for up to
+    ``SENTRY_SNUBA_CACHE_WAIT`` seconds) for the leader's result to appear
+    in the cache.
+    """
+    tags = {"referrer": referrer}
+    key = get_query_cache_key(query_params, referrer, ttl)
+
+    body = cache.get(key)
+    if body is not None:
+        metrics.incr("snuba.client.cache.hit", tags=tags)
+        return body
+
+    with _inflight_queries_lock:
+        future = _inflight_queries.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight_queries[key] = Future()
+
+    if not leader:
+        metrics.incr("snuba.client.cache.coalesced", tags=tags)
+        # Results are modified by the caller, so every caller needs its own
+        # copy of a shared result.
+        return deepcopy(future.result())
+
+    try:
+        body = _wait_for_cached_query(key, ttl)
+        if body is None:
+            metrics.incr("snuba.client.cache.miss", tags=tags)
+            lock_key = u"{}:l".format(key)
+            locked = cache.add(lock_key, True, settings.SENTRY_SNUBA_CACHE_WAIT)
+            try:
+                body = _snuba_query(query_params, headers)
+                cache.set(key, body, ttl)
+            finally:
+                if locked:
+                    cache.delete(lock_key)
+        else:
+            metrics.incr("snuba.client.cache.coalesced", tags=tags)
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(body)
+        return deepcopy(body)
+    finally:
+        with _inflight_queries_lock:
+            del _inflight_queries[key]
+
+
+def _wait_for_cached_query(key, ttl):
+    """
+    Waits for another process that is executing the same query to cache
+    its result, returning the result, or ``None`` if no other process is
+    executing the query (or it didn't finish in time.)
+    """
+    lock_key = u"{}:l".format(key)
+    deadline = time.time() + settings.SENTRY_SNUBA_CACHE_WAIT
+    while True:
+        values = cache.get_many([key, lock_key])
+        if key in values:
+            return values[key]
+        if lock_key not in values or time.time() >= deadline:
+            return None
+        time.sleep(0.05)
+
+
+def _run_query(params, referrer=None):
+    query_params, forward, reverse = params
     headers = {}
     if referrer:
         headers["referer"] = referrer
 
+    # Forward and reverse translation maps from model ids to snuba keys, per column
+    ttl = get_query_cache_ttl(query_params, referrer)
+    if ttl:
+        body = _cached_snuba_query(query_params, referrer, ttl, headers)
+        body["data"] = [reverse(d) for d in body["data"]]
+    else:
+        # Rows are translated as they're decoded.
+        body = _snuba_query(query_params, headers, transform=reverse)
+    return body
+
+
+def bulk_raw_query(snuba_param_list, referrer=None):
     query_param_list = map(_prepare_query_params, snuba_param_list)
 
     def snuba_query(params):
-        query_params, forward, reverse = params
-        try:
-            with timer("snuba_query"):
-                return (
-                    _snuba_pool.urlopen(
-                        "POST", "/query", body=json.dumps(query_params), headers=headers
-                    ),
-                    forward,
-                    reverse,
-                )
-        except urllib3.exceptions.HTTPError as err:
-            raise SnubaError(err)
+        return _run_query(params, referrer)
 
     if len(snuba_param_list) > 1:
-        query_results = _query_thread_pool.map(snuba_query, query_param_list)
+        return list(_query_thread_pool.map(snuba_query, query_param_list))
     else:
         # No need to submit to the thread pool if we're just performing a
         # single query
-        query_results = [snuba_query(query_param_list[0])]
-
-    results = []
-    for response, _, reverse in query_results:
-        try:
-            body = json.loads(response.data)
-        except ValueError:
-            raise UnexpectedResponseError(
-                u"Could not decode JSON response: {}".format(response.data)
-            )
-
-        if response.status != 200:
-            if body.get("error"):
-                error = body["error"]
-                if response.status == 429:
-                    raise RateLimitExceeded(error["message"])
-                elif error["type"] == "schema":
-                    raise SchemaValidationError(error["message"])
-                elif error["type"] == "clickhouse":
-                    raise clickhouse_error_codes_map.get(error["code"], QueryExecutionError)(
-                        error["message"]
-                    )
-                else:
-                    raise SnubaError(error["message"])
-            else:
-                raise SnubaError(u"HTTP {}".format(response.status))
+        return [snuba_query(query_param_list[0])]
 
-        # Forward and reverse translation maps from model ids to snuba keys, per column
-        body["data"] = [reverse(d) for d in body["data"]]
-        results.append(body)
 
-    return results
+def query(
+    dataset=None,
+    start=None,
+    end=None,
+    groupby=None,
+    conditions=None,
+    filter_keys=None,
+    aggregations=None,
+    selected_columns=None,
+    totals=None,
+    **kwargs
+):
+    return prepare_query(
+        dataset=dataset,
+        start=start,
+        end=end,
+        groupby=groupby,
+        conditions=conditions,
+        filter_keys=filter_keys,
+        aggregations=aggregations,
+        selected_columns=selected_columns,
+        totals=totals,
+        **kwargs
+    )()
 
 
-def query(
+def prepare_query(
     dataset=None,
     start=None,
     end=None,
@@ -825,49 +1111,82 @@ def query(
     aggregations=None,
     selected_columns=None,
     totals=None,
+    referrer=None,
+    is_grouprelease=False,
     **kwargs
 ):
+    """
+    Prepares a query (with the same arguments as `query`) and returns a
+    function that sends it to Snuba and returns its result.
 
+    Preparing a query can require the database, so it has to be done by the
+    caller, while the returned function can be called from any thread (e.g.
+    by `run_concurrently`.)
+    """
     aggregations = aggregations or [["count()", "", "aggregate"]]
     filter_keys = filter_keys or {}
     selected_columns = selected_columns or []
     groupby = groupby or []
 
     try:
-        body = raw_query(
-            dataset=dataset,
-            start=start,
-            end=end,
-            groupby=groupby,
-            conditions=conditions,
-            filter_keys=filter_keys,
-            aggregations=aggregations,
-            selected_columns=selected_columns,
-            totals=totals,
-            **kwargs
+        params = _prepare_query_params(
+            SnubaQueryParams(
+                dataset=dataset,
+                start=start,
+                end=end,
+                groupby=groupby,
+                conditions=conditions,
+                filter_keys=filter_keys,
+                aggregations=aggregations,
+                is_grouprelease=is_grouprelease,
+                selected_columns=selected_columns,
+                totals=totals,
+                **kwargs
+            )
         )
     except (QueryOutsideRetentionError, QueryOutsideGroupActivityError):
         if totals:
-            return OrderedDict(), {}
+            return lambda: (OrderedDict(), {})
         else:
-            return OrderedDict()
+            return lambda: OrderedDict()
 
-    # Validate and scrub response, and translate snuba keys back to IDs
-    aggregate_names = [a[2] for a in aggregations]
-    selected_names = [c[2] if isinstance(c, (list, tuple)) else c for c in selected_columns]
-    expected_cols = set(groupby + aggregate_names + selected_names)
-    got_cols = set(c["name"] for c in body["meta"])
+    def run_query():
+        body = _run_query(params, referrer)
 
-    assert expected_cols == got_cols, "expected {}, got {}".format(expected_cols, got_cols)
+        # Validate and scrub response, and translate snuba keys back to IDs
+        aggregate_names = [a[2] for a in aggregations]
+        selected_names = [c[2] if isinstance(c, (list, tuple)) else c for c in selected_columns]
+        expected_cols = set(groupby + aggregate_names + selected_names)
+        got_cols = set(c["name"] for c in body["meta"])
 
-    with timer("process_result"):
-        if totals:
-            return (
-                nest_groups(body["data"], groupby, aggregate_names + selected_names),
-                body["totals"],
-            )
-        else:
-            return nest_groups(body["data"], groupby, aggregate_names + selected_names)
+        assert expected_cols == got_cols, "expected {}, got {}".format(expected_cols, got_cols)
+
+        with timer("process_result"):
+            if totals:
+                return (
+                    nest_groups(body["data"], groupby, aggregate_names + selected_names),
+                    body["totals"],
+                )
+            else:
+                return nest_groups(body["data"], groupby, aggregate_names + selected_names)
+
+    return run_query
+
+
+def run_concurrently(prepared_queries, timeout=None):
+    """
+    Runs prepared queries (see `prepare_query`) concurrently, and returns a
+    future for the result of each of them, in the same order.
+
+    Waits until every query has completed, or `timeout` seconds have passed,
+    whichever is first. Queries that haven't completed by then are cancelled
+    if they haven't started yet, and are otherwise left to finish in the
+    background, so callers must check whether each future is done.
+    """
+    futures = [_query_thread_pool.submit(run_query) for run_query in prepared_queries]
+    for future in wait(futures, timeout=timeout).not_done:
+        future.cancel()
+    return futures
 
 
 def nest_groups(data, groups, aggregate_cols):
@@ -877,11 +1196,14 @@ def nest_groups(data, groups, aggregate_cols):
     """
     if not groups:
         # At leaf level, just return the aggregations from the first data row
-        if len(aggregate_cols) == 1:
+        row = next(iter(data), None)
+        if row is None:
+            return None
+        elif len(aggregate_cols) == 1:
             # Special case, if there is only one aggregate, just return the raw value
-            return data[0][aggregate_cols[0]] if data else None
+            return row[aggregate_cols[0]]
         else:
-            return {c: data[0][c] for c in aggregate_cols} if data else None
+            return {c: row[c] for c in aggregate_cols}
     else:
         g, rest = groups[0], groups[1:]
         inter = OrderedDict()
@@ -0,0 +1,76 @@
+from __future__ import absolute_import
+
+from mock import patch
+
+from sentry.api.serializers import Serializer, serialize
+from sentry.api.serializers.loaders import Loader, UserLoader, load_many, loader_context
+from sentry.testutils import TestCase
+
+
+class RecordingLoader(Loader):
+    def __init__(self, calls, *args):
+        super(RecordingLoader, self).__init__(*args)
+        self.calls = calls
+
+    def load(self, keys):
+        self.calls.append((self.args, sorted(keys)))
+        return {key: key * 2 for key in keys if key > 0}
+
+
+class Item(object):
+    def __init__(self, key, children=()):
+        self.key = key
+        self.children = children
+
+
+class ItemSerializer(Serializer):
+    def __init__(self, calls):
+        self.calls = calls
+
+    def get_attrs(self, item_list, user):
+        values = load_many(RecordingLoader(self.calls), [item.key for item in item_list])
+        return {item: {"value": values.get(item.key)} for item in item_list}
+
+    def serialize(self, obj, attrs, user):
+        return {"value": attrs["value"], "children": serialize(list(obj.children), user, self)}
+
+
+class LoaderTest(TestCase):
+    def test_load_many(self):
+        calls = []
+        with loader_context():
+            assert load_many(RecordingLoader(calls), [1, 2, 0]) == {1: 2, 2: 4}
+            assert load_many(RecordingLoader(calls), [2, 3, 0]) == {2: 4, 3: 6}
+            assert load_many(RecordingLoader(calls, "other"), [1]) == {1: 2}
+
+        # Keys are only loaded once per context (including keys that don't
+        # have a value), and loaders with different arguments are separate.
+        assert calls == [((), [0, 1, 2]), ((), [3]), (("other",), [1])]
+
+        # Outside of a context, nothing is shared.
+        load_many(RecordingLoader(calls), [1])
+        assert len(calls) == 4
+
+    def test_nested_serializers(self):
+        calls = []
+        items = [Item(1, [Item(2), Item(3)]), Item(2, [Item(1)])]
+        assert serialize(items, serializer=ItemSerializer(calls)) == [
+            {"value": 2, "children": [{"value": 4, "children": []}, {"value": 6, "children": []}]},
+            {"value": 4, "children": [{"value": 2, "children": []}]},
+        ]
+        assert [keys for args, keys in calls] == [[1, 2], [3]]
+
+    def test_debug_logging(self):
+        calls = []
+        with self.settings(DEBUG=True), patch("sentry.api.serializers.loaders.logger") as logger:
+            serialize([Item(1, [Item(2)])], serializer=ItemSerializer(calls))
+
+        logger.info.assert_called_once_with(
+            "serializers.loaders",
+            extra={"calls": {"RecordingLoader": 2}, "keys": {"RecordingLoader": 2}},
+        )
+
+    def test_user_loader(self):
+        user = self.create_user()
+        with self.assertNumQueries(1):
+            assert load_many(UserLoader(), [user.id, 0]) == {user.id: user}
@@ -15,6 +15,7 @@ from sentry.api.event_search import (
     resolve_field_list,
     get_reference_event_conditions,
     parse_search_query,
+    parsed_query_cache,
     InvalidSearchQuery,
     SearchBoolean,
     SearchFilter,
@@ -235,6 +236,27 @@ class ParseSearchQueryTest(unittest.TestCase):
                 SearchFilter(key=SearchKey(name="random"), operator="=", value=SearchValue("-2w"))
             ]
 
+    def test_cache(self):
+        parsed_query_cache.clear()
+
+        query = "user.email:foo@example.com hello"
+        result = parse_search_query(query)
+        assert parsed_query_cache.get((SearchVisitor, query)) == tuple(result)
+
+        # Callers get their own copy of the cached result.
+        cached_result = parse_search_query(query)
+        assert cached_result == result
+        assert cached_result is not result
+
+        # Relative time filters are parsed again each time.
+        now = timezone.now()
+        with freeze_time(now):
+            parse_search_query("first_seen:-2w")
+        assert parsed_query_cache.get((SearchVisitor, "first_seen:-2w")) is None
+        with freeze_time(now + timedelta(days=1)):
+            result = parse_search_query("first_seen:-2w")
+        assert result[0].value.raw_value == now - timedelta(days=13)
+
     def test_invalid_date_formats(self):
         invalid_queries = ["first_seen:hello", "first_seen:123", "first_seen:2018-01-01T00:01ZZ"]
         for invalid_query in invalid_queries:
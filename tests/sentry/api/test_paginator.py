@@ -8,6 +8,7 @@ from sentry.api.paginator import (
     BadPaginationError,
     Paginator,
     DateTimePaginator,
+    KeysetPaginator,
     OffsetPaginator,
     SequencePaginator,
     GenericOffsetPaginator,
@@ -60,6 +61,32 @@ class PaginatorTest(TestCase):
         result = paginator.count_hits(1)
         assert result == 1
 
+    def test_estimate_hits(self):
+        self.create_user("foo@example.com")
+        self.create_user("bar@example.com")
+
+        # The query planner knows that at most three users can match.
+        queryset = User.objects.filter(
+            username__in=["foo@example.com", "bar@example.com", "baz@example.com"]
+        )
+        paginator = self.cls(queryset, "id", estimate_hits=True)
+
+        # Queries that are expected to match fewer rows than the maximum are
+        # counted, and the count is reused for a short time.
+        assert paginator.get_estimated_hits(1000) == (2, False)
+        self.create_user("baz@example.com")
+        assert paginator.get_estimated_hits(1000) == (2, True)
+
+        # Queries that are expected to match more are not counted.
+        assert paginator.get_estimated_hits(1) == (1, True)
+
+        result = paginator.get_result(limit=1, count_hits=True)
+        assert (result.hits, result.max_hits, result.hits_estimated) == (2, 1000, True)
+
+        queryset = User.objects.none()
+        paginator = self.cls(queryset, "id", estimate_hits=True)
+        assert paginator.get_estimated_hits(1000) == (0, False)
+
     def test_prev_emptyset(self):
         queryset = User.objects.all()
 
@@ -76,6 +103,64 @@ class PaginatorTest(TestCase):
         assert len(result3) == 0, (result3, list(result3))
 
 
+class KeysetPaginatorTest(TestCase):
+    def test_descending(self):
+        joined = timezone.now()
+
+        # Rows with the same key are ordered by ID.
+        res1 = self.create_user("foo@example.com", date_joined=joined)
+        res2 = self.create_user("bar@example.com", date_joined=joined + timedelta(seconds=1))
+        res3 = self.create_user("baz@example.com", date_joined=joined + timedelta(seconds=1))
+        res4 = self.create_user("qux@example.com", date_joined=joined + timedelta(seconds=2))
+
+        queryset = User.objects.all()
+
+        paginator = KeysetPaginator(queryset, "-date_joined")
+        result1 = paginator.get_result(limit=2, cursor=None)
+        assert list(result1) == [res4, res3]
+        assert result1.next
+        assert not result1.prev
+
+        result2 = paginator.get_result(limit=2, cursor=result1.next)
+        assert list(result2) == [res2, res1]
+        assert not result2.next
+        assert result2.prev
+
+        result3 = paginator.get_result(limit=1, cursor=result2.prev)
+        assert list(result3) == [res3]
+        assert result3.next
+        assert result3.prev
+
+        result4 = paginator.get_result(limit=2, cursor=result3.prev)
+        assert list(result4) == [res4]
+        assert result4.next
+        assert not result4.prev
+
+        # Paging past the end leads back to the last page.
+        result5 = paginator.get_result(limit=2, cursor=result2.next)
+        assert list(result5) == []
+        assert not result5.next
+        assert result5.prev
+
+        result6 = paginator.get_result(limit=2, cursor=result5.prev)
+        assert list(result6) == [res2, res1]
+
+    def test_ascending(self):
+        users = [self.create_user("%s@example.com" % i) for i in range(5)]
+
+        paginator = KeysetPaginator(User.objects.all(), "id")
+        cursor = None
+        pages = []
+        while True:
+            result = paginator.get_result(limit=2, cursor=cursor)
+            pages.append(list(result))
+            if not result.next:
+                break
+            cursor = result.next
+
+        assert pages == [users[0:2], users[2:4], users[4:5]]
+
+
 class OffsetPaginatorTest(TestCase):
     # offset paginator does not support dynamic limits on is_prev
     def test_simple(self):
@@ -51,6 +51,29 @@ class BufferTest(TestCase):
         assert group_.times_seen == group.times_seen + 1
         assert group_.last_seen == the_date
 
+    def test_process_keeps_greatest_last_seen(self):
+        the_date = timezone.now()
+        group = self.create_group(last_seen=the_date)
+        self.buf.process(
+            Group, {"times_seen": 1}, {"id": group.id}, {"last_seen": the_date - timedelta(days=1)}
+        )
+        group_ = Group.objects.get(id=group.id)
+        assert group_.times_seen == group.times_seen + 1
+        assert group_.last_seen == the_date
+
+    def test_process_saves_extra_without_existing_row(self):
+        the_date = timezone.now()
+        self.buf.process(
+            Group,
+            {"times_seen": 1},
+            {"message": "foo bar", "project_id": 1},
+            {"last_seen": the_date},
+        )
+        group = Group.objects.get(message="foo bar")
+        assert group.times_seen == 2
+        assert group.last_seen == the_date
+        assert group.score == int(Group.calculate_score(2, the_date))
+
     def test_increments_when_null(self):
         org = Organization.objects.create(slug="test-org")
         team = Team.objects.create(organization=org, slug="test-team")
@@ -65,3 +88,38 @@ class BufferTest(TestCase):
         self.buf.process(ReleaseProject, columns, filters)
         release_project_ = ReleaseProject.objects.get(id=release_project.id)
         assert release_project_.new_groups == 1
+
+    def test_process_batch(self):
+        project = self.create_project()
+        group = self.create_group(project=project, times_seen=1)
+        other = self.create_group(project=project, times_seen=5)
+        the_date = timezone.now() + timedelta(days=5)
+
+        self.buf.process_batch(
+            Group,
+            [
+                ({"times_seen": 2}, {"id": group.id}, {"last_seen": the_date}),
+                ({"times_seen": 3}, {"id": other.id}, {"last_seen": the_date}),
+                # doesn't match an existing row, so it's created
+                ({"times_seen": 1}, {"message": "foo bar", "project_id": project.id}, None),
+            ],
+        )
+
+        group_ = Group.objects.get(id=group.id)
+        assert group_.times_seen == 3
+        assert group_.last_seen == the_date
+        assert Group.objects.get(id=other.id).times_seen == 8
+        assert Group.objects.get(message="foo bar").project_id == project.id
+
+        self.buf.process_batch(
+            Group,
+            [({"times_seen": 1}, {"id": group.id}, {"last_seen": the_date - timedelta(days=1)})],
+        )
+        assert Group.objects.get(id=group.id).last_seen == the_date
+
+    @mock.patch("sentry.buffer.base.Buffer.process")
+    def test_process_batch_falls_back_for_expressions(self, process):
+        group = self.create_group()
+        extra = {"score": mock.Mock(spec=["resolve_expression"])}
+        self.buf.process_batch(Group, [({"times_seen": 1}, {"id": group.id}, extra)])
+        process.assert_called_once_with(Group, {"times_seen": 1}, {"id": group.id}, extra)
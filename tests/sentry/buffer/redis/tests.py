@@ -10,6 +10,7 @@ from django.utils import timezone
 from sentry.buffer.redis import RedisBuffer
 from sentry.models import Group, Project
 from sentry.testutils import TestCase
+from sentry.utils.compat import pickle
 
 
 class RedisBufferTest(TestCase):
@@ -89,6 +90,30 @@ class RedisBufferTest(TestCase):
         self.buf.process("foo")
         process.assert_called_once_with(Group, columns, filters, extra)
 
+    @mock.patch("sentry.buffer.base.Buffer.process_batch")
+    def test_process_batch(self, process_batch):
+        self.buf.bulk_process_incr = True
+        client = self.buf.cluster.get_routing_client()
+        for key, pk in (("foo", 1), ("bar", 2)):
+            client.hmset(
+                key,
+                {"f": '{"pk": ["i","%d"]}' % pk, "i+times_seen": "2", "m": "sentry.models.Group"},
+            )
+            client.zadd("b:p", 1, key)
+
+        self.buf.process(batch_keys=["foo", "bar", "baz"])
+
+        assert len(process_batch.mock_calls) == 1
+        model, batch = process_batch.call_args[0]
+        assert model is Group
+        assert sorted(batch, key=lambda update: update[1]["pk"]) == [
+            ({"times_seen": 2}, {"pk": 1}, {}),
+            ({"times_seen": 2}, {"pk": 2}, {}),
+        ]
+        assert client.zrange("b:p", 0, -1) == []
+        assert not client.exists("foo")
+        assert not client.exists("l:foo")
+
     # this test should be passing once we no longer serialize using pickle
     @pytest.mark.xfail
     @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
@@ -123,6 +148,44 @@ class RedisBufferTest(TestCase):
         pending = client.zrange("b:p", 0, -1)
         assert pending == ["foo"]
 
+    @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
+    def test_incr_combines_writes(self):
+        buf = RedisBuffer(combine_interval=60)
+        buf.incr(Group, {"times_seen": 1}, {"pk": 1}, extra={"message": "foo", "level": 40})
+        buf.incr(Group, {"times_seen": 2}, {"pk": 1}, extra={"message": "bar"})
+
+        client = buf.cluster.get_routing_client()
+        assert client.hgetall("foo") == {}
+
+        buf.combiner.flush()
+        result = client.hgetall("foo")
+        assert result["i+times_seen"] == "3"
+        assert pickle.loads(result["e+message"]) == "bar"
+        assert pickle.loads(result["e+level"]) == 40
+        assert client.zrange("b:p", 0, -1) == ["foo"]
+
+    @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
+    def test_incr_keeps_greatest_last_seen(self):
+        now = datetime(2017, 5, 3, 6, 6, 6, tzinfo=timezone.utc)
+        earlier = datetime(2017, 5, 3, 6, 6, 5, tzinfo=timezone.utc)
+        client = self.buf.cluster.get_routing_client()
+
+        self.buf.incr(Group, {"times_seen": 1}, {"pk": 1}, extra={"last_seen": now})
+        self.buf.incr(Group, {"times_seen": 1}, {"pk": 1}, extra={"last_seen": earlier})
+        assert pickle.loads(client.hget("foo", "e+last_seen")) == now
+
+        # Values that are merged in process memory are merged the same way.
+        client.delete("foo")
+        buf = RedisBuffer(combine_interval=60)
+        buf.incr(Group, {"times_seen": 1}, {"pk": 1}, extra={"last_seen": now})
+        buf.incr(Group, {"times_seen": 1}, {"pk": 1}, extra={"last_seen": earlier})
+        buf.combiner.flush()
+        assert pickle.loads(client.hget("foo", "e+last_seen")) == now
+
+        model, filters, incr_values, extra_values = buf._load_incr_values(client.hgetall("foo"))
+        assert incr_values == {"times_seen": 2}
+        assert extra_values == {"last_seen": now}
+
     @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
     @mock.patch("sentry.buffer.redis.process_incr")
     @mock.patch("sentry.buffer.redis.process_pending")
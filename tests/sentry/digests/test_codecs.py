@@ -0,0 +1,37 @@
+from __future__ import absolute_import
+
+from sentry.digests.codecs import CompactRecordCodec, CompressedPickleCodec
+from sentry.digests.notifications import Notification, event_to_record
+from sentry.testutils import TestCase
+
+
+class CompactRecordCodecTestCase(TestCase):
+    def test_round_trip(self):
+        event = self.create_event(group=self.group, message="hello world")
+        rule = self.project.rule_set.all()[0]
+        record = event_to_record(event, (rule,))
+
+        codec = CompactRecordCodec()
+        encoded = codec.encode(record.value)
+        assert len(encoded) < len(CompressedPickleCodec().encode(record.value))
+
+        value = codec.decode(encoded)
+        assert value.rules == [rule.id]
+        assert value.event.id == event.id
+        assert value.event.event_id == event.event_id
+        assert value.event.group_id == event.group_id
+        assert value.event.datetime == event.datetime
+        assert value.event.message == event.message
+
+        # The event data is not stored in the record.
+        assert not value.event.data.is_bound
+        assert value.event.data.id == event.data.id
+
+    def test_decodes_pickled_records(self):
+        event = self.create_event(group=self.group)
+        value = Notification(event, [1])
+
+        decoded = CompactRecordCodec().decode(CompressedPickleCodec().encode(value))
+        assert decoded.event == event
+        assert decoded.event.data.is_bound
+        assert decoded.rules == [1]
@@ -5,9 +5,11 @@ from exam import fixture
 from six.moves import reduce
 
 from sentry.digests import Record
+from sentry.digests.codecs import CompactRecordCodec
 from sentry.digests.notifications import (
     Notification,
     event_to_record,
+    fetch_state_many,
     rewrite_record,
     group_records,
     sort_group_contents,
@@ -53,6 +55,35 @@ class RewriteRecordTestCase(TestCase):
         ) == Record(self.record.key, Notification(self.event, []), self.record.timestamp)
 
 
+class FetchStateManyTestCase(TestCase):
+    def test_success(self):
+        codec = CompactRecordCodec()
+
+        def make_record(event):
+            rule = event.project.rule_set.all()[0]
+            record = event_to_record(event, (rule,))
+            return Record(record.key, codec.decode(codec.encode(record.value)), record.timestamp)
+
+        other_project = self.create_project()
+        other_group = self.create_group(project=other_project)
+
+        digests = [
+            (self.project, [make_record(self.create_event(group=self.group))]),
+            (other_project, [make_record(self.create_event(group=other_group))]),
+        ]
+
+        states = fetch_state_many(digests)
+        assert [state["project"] for state in states] == [self.project, other_project]
+        assert list(states[0]["groups"].keys()) == [self.group.id]
+        assert list(states[1]["groups"].keys()) == [other_group.id]
+        assert list(states[0]["rules"].values()) == [self.project.rule_set.all()[0]]
+
+        # Event data is bound for all records.
+        for project, records in digests:
+            for record in records:
+                assert record.value.event.data.is_bound
+
+
 class GroupRecordsTestCase(TestCase):
     @fixture
     def rule(self):
@@ -1008,6 +1008,23 @@ class EventManagerTest(TestCase):
             mock_event_discarded, project=group.project, sender=EventManager, signal=event_discarded
         )
 
+    def test_cached_hash_for_deleted_group(self):
+        manager = EventManager(make_event(message="foo", event_id="a" * 32, fingerprint=["a" * 32]))
+        event = manager.save(1)
+
+        # Associate the hash with the group in the cache.
+        manager = EventManager(make_event(message="foo", event_id="b" * 32, fingerprint=["a" * 32]))
+        assert manager.save(1).group_id == event.group_id
+
+        # Delete the group without invalidating the cached hashes.
+        GroupHash.objects.filter(group_id=event.group_id).delete()
+        Group.objects.filter(id=event.group_id).delete()
+
+        manager = EventManager(make_event(message="foo", event_id="c" * 32, fingerprint=["a" * 32]))
+        new_event = manager.save(1)
+        assert new_event.group_id != event.group_id
+        assert Group.objects.filter(id=new_event.group_id).exists()
+
     def test_event_saved_signal(self):
         mock_event_saved = mock.Mock()
         event_saved.connect(mock_event_saved)
@@ -1,5 +1,6 @@
 from __future__ import absolute_import
 
+import mock
 import pytest
 
 from sentry.models import Environment
@@ -25,6 +26,18 @@ class GetOrCreateTest(TestCase):
         with self.assertNumQueries(0):
             assert Environment.get_for_organization_id(project.organization_id, "prod").id == env.id
 
+    @mock.patch("sentry.models.environment.cache")
+    def test_local_cache(self, cache):
+        cache.get.return_value = None
+        project = self.create_project()
+        env = Environment.get_or_create(project=project, name="prod")
+        cache.get.reset_mock()
+
+        # Once an environment has been seen, it's served from process memory.
+        with self.assertNumQueries(0):
+            assert Environment.get_or_create(project=project, name="prod").id == env.id
+        assert not cache.get.called
+
 
 @pytest.mark.parametrize(
     "val,expected",
@@ -0,0 +1,49 @@
+from __future__ import absolute_import
+
+from sentry.models import GroupHash
+from sentry.testutils import TestCase
+
+
+class GroupHashManagerTest(TestCase):
+    def test_get_or_create_many(self):
+        project = self.create_project()
+        group = self.create_group(project=project)
+        GroupHash.objects.create(project=project, hash="a" * 32, group=group)
+
+        hashes = GroupHash.objects.get_or_create_many(project, ["a" * 32, "b" * 32])
+        assert [(h.hash, h.group_id) for h in hashes] == [("a" * 32, group.id), ("b" * 32, None)]
+
+        # Hashes that are associated with a group are cached, while new
+        # hashes are retrieved from the database again.
+        with self.assertNumQueries(0):
+            hashes = GroupHash.objects.get_or_create_many(project, ["a" * 32])
+        assert [(h.hash, h.group_id) for h in hashes] == [("a" * 32, group.id)]
+
+        with self.assertNumQueries(1):
+            hashes = GroupHash.objects.get_or_create_many(project, ["b" * 32])
+        assert [(h.hash, h.group_id) for h in hashes] == [("b" * 32, None)]
+
+    def test_invalidate_cache(self):
+        project = self.create_project()
+        group = self.create_group(project=project)
+        other = self.create_group(project=project)
+        GroupHash.objects.create(project=project, hash="a" * 32, group=group)
+
+        assert GroupHash.objects.get_or_create_many(project, ["a" * 32])[0].group_id == group.id
+
+        GroupHash.objects.filter(project=project).update(group=other)
+        assert GroupHash.objects.get_or_create_many(project, ["a" * 32])[0].group_id == group.id
+
+        GroupHash.objects.invalidate_cache(project.id)
+        assert GroupHash.objects.get_or_create_many(project, ["a" * 32])[0].group_id == other.id
+
+    def test_locked_hashes_are_not_cached(self):
+        project = self.create_project()
+        group = self.create_group(project=project)
+        GroupHash.objects.create(
+            project=project, hash="a" * 32, group=group, state=GroupHash.State.LOCKED_IN_MIGRATION
+        )
+
+        GroupHash.objects.get_or_create_many(project, ["a" * 32])
+        with self.assertNumQueries(1):
+            GroupHash.objects.get_or_create_many(project, ["a" * 32])
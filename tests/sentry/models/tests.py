@@ -2,6 +2,7 @@
 
 from __future__ import absolute_import
 
+import mock
 import pytest
 
 from datetime import timedelta
@@ -179,3 +180,15 @@ class EventNodeStoreTest(TestCase):
     def test_basic_ref_binding(self):
         event = self.create_event()
         assert event.data.get_ref(event) == event.project.id
+
+    def test_get_keys(self):
+        nodestore.set("1:pqr", {"foo": "bar", "baz": {"large": "value"}})
+        event = Event(project_id=1, event_id="pqr", data={"node_id": "1:pqr"})
+
+        with mock.patch.object(nodestore, "get_keys", wraps=nodestore.get_keys) as get_keys:
+            assert event.data.get_keys(["foo", "missing"]) == {"foo": "bar"}
+            assert event.data.get_keys(["foo"]) == {"foo": "bar"}
+            assert get_keys.call_count == 1
+
+        assert event.data._node_data is None, "Only the requested keys should be bound"
+        assert event.data.get_keys(["baz"]) == {"baz": {"large": "value"}}
@@ -31,6 +31,22 @@ class DjangoNodeStorageTest(TestCase):
         )
         assert result == dict((n.id, n.data) for n in nodes)
 
+    def test_get_multi_keys(self):
+        Node.objects.create(
+            id="d2502ebbd7df41ceba8d3275595cac33", data={"foo": "bar", "baz": [1, 2]}
+        )
+
+        result = self.ns.get_multi_keys(
+            ["d2502ebbd7df41ceba8d3275595cac33", "5394aa025b8e401ca6bc3ddee3130edc"], ["foo"]
+        )
+        assert result == {
+            "d2502ebbd7df41ceba8d3275595cac33": {"foo": "bar"},
+            "5394aa025b8e401ca6bc3ddee3130edc": None,
+        }
+        assert self.ns.get_keys("d2502ebbd7df41ceba8d3275595cac33", ["baz", "nope"]) == {
+            "baz": [1, 2]
+        }
+
     def test_set(self):
         self.ns.set("d2502ebbd7df41ceba8d3275595cac33", {"foo": "bar"})
         assert Node.objects.get(id="d2502ebbd7df41ceba8d3275595cac33").data == {"foo": "bar"}
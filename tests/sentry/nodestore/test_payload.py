@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+import pytest
+
+from sentry.nodestore import payload
+from sentry.utils import json
+
+
+DATA = {
+    "tags": [["level", "error"], ["browser", u"Firefox ✓"]],
+    "sdk": {"name": "sentry.python", "version": "0.13.1"},
+    "breadcrumbs": {"values": [{"message": "x" * 100}] * 50},
+    "title": None,
+}
+
+
+def test_roundtrip():
+    blob = payload.encode(DATA)
+    assert payload.is_indexed(blob)
+    assert payload.decode(blob) == DATA
+
+
+def test_decode_keys():
+    blob = payload.encode(DATA)
+    assert payload.decode_keys(blob, ["tags", "sdk"]) == {"tags": DATA["tags"], "sdk": DATA["sdk"]}
+    assert payload.decode_keys(blob, ["title"]) == {"title": None}
+    assert payload.decode_keys(blob, ["missing"]) == {}
+
+
+def test_not_indexed():
+    blob = json.dumps(DATA).encode("utf-8")
+    assert not payload.is_indexed(blob)
+    with pytest.raises(ValueError):
+        payload.decode_keys(blob, ["tags"])
@@ -9,7 +9,7 @@ import time
 
 from exam import fixture, patcher
 
-from sentry.quotas.redis import is_rate_limited, BasicRedisQuota, RedisQuota
+from sentry.quotas.redis import is_rate_limited, lease_quota, BasicRedisQuota, RedisQuota
 from sentry.testutils import TestCase
 from sentry.utils.redis import clusters
 from six.moves import xrange
@@ -68,6 +68,35 @@ def test_is_rate_limited_script():
     assert list(map(bool, is_rate_limited(client, ("orange", "apple"), (1, now + 60)))) == [False]
 
 
+def test_lease_quota_script():
+    now = int(time.time())
+
+    cluster = clusters.get("default")
+    client = cluster.get_local_client(six.next(iter(cluster.hosts)))
+
+    # The lease is bounded by the quota with the fewest units available.
+    assert lease_quota(
+        client, ("foo", "r:foo", "bar", "r:bar"), (5, 3, now + 60, 10, now + 120)
+    ) == [3, None, None]
+    assert client.get("foo") == "3"
+    assert client.get("bar") == "3"
+    assert 59 <= client.ttl("foo") <= 60
+
+    # Once a quota is exhausted, no units are granted.
+    assert lease_quota(
+        client, ("foo", "r:foo", "bar", "r:bar"), (5, 3, now + 60, 10, now + 120)
+    ) == [0, 1, None]
+    assert client.get("bar") == "3"
+
+    # Refunds make units available again, and unlimited quotas don't limit.
+    client.set("r:foo", 1)
+    assert lease_quota(client, ("foo", "r:foo", "baz", "r:baz"), (5, 3, now + 60, -1, now)) == [
+        1,
+        None,
+        None,
+    ]
+
+
 class RedisQuotaTest(TestCase):
     quota = fixture(RedisQuota)
 
@@ -209,6 +238,38 @@ class RedisQuotaTest(TestCase):
             # the - 1 is because we refunded once
         ) == [n - 1 for _ in quotas] + [0, 0]
 
+    @mock.patch.object(RedisQuota, "get_quotas")
+    def test_leases(self, mock_get_quotas):
+        quota = RedisQuota(lease_size=3)
+        mock_get_quotas.return_value = (
+            BasicRedisQuota(prefix="p", subscope=1, limit=4, window=60, reason_code="p_quota"),
+        )
+        timestamp = time.time()
+
+        with mock.patch("sentry.quotas.redis.lease_quota", wraps=lease_quota) as mock_lease:
+            for _ in xrange(4):
+                assert not quota.is_rate_limited(self.project, timestamp=timestamp).is_limited
+            assert quota.is_rate_limited(self.project, timestamp=timestamp).is_limited
+
+        # A block of 3 units, a block of 1 unit, and the rejection.
+        assert len(mock_lease.mock_calls) == 3
+
+        n = 3
+        for _ in xrange(n):
+            assert not quota.is_rate_limited(self.project, timestamp=timestamp + 60).is_limited
+        assert quota.get_usage(
+            self.project.organization_id, mock_get_quotas.return_value, timestamp=timestamp + 60
+        ) == [n]
+
+        # Unspent units are returned through the refund counters, and leases
+        # from previous windows are removed.
+        assert not quota.is_rate_limited(self.project, timestamp=timestamp + 120).is_limited
+        assert len(quota._RedisQuota__leases) == 1
+        quota.release_leases(timestamp=timestamp + 120)
+        assert quota.get_usage(
+            self.project.organization_id, mock_get_quotas.return_value, timestamp=timestamp + 120
+        ) == [1]
+
 
 @pytest.mark.parametrize(
     "obj,json",
@@ -2,6 +2,9 @@
 
 from __future__ import absolute_import
 
+import mock
+
+from sentry.ratelimits.base import RateLimit
 from sentry.ratelimits.redis import RedisRateLimiter
 from sentry.testutils import TestCase
 
@@ -17,3 +20,34 @@ class RedisRateLimiterTest(TestCase):
     def test_simple_key(self):
         assert not self.backend.is_limited("foo", 1)
         assert self.backend.is_limited("foo", 1)
+
+    def test_sliding_window(self):
+        with mock.patch("sentry.ratelimits.redis.time", return_value=1000.0):
+            assert not self.backend.is_limited("foo", 2, window=60)
+            assert not self.backend.is_limited("foo", 2, window=60)
+            assert self.backend.is_limited("foo", 2, window=60)
+
+        # Requests are spaced out over the window, so a single request is
+        # allowed again halfway through it (rather than all of them when the
+        # next window starts.)
+        with mock.patch("sentry.ratelimits.redis.time", return_value=1030.0):
+            assert not self.backend.is_limited("foo", 2, window=60)
+            assert self.backend.is_limited("foo", 2, window=60)
+
+    def test_is_limited_multi(self):
+        with mock.patch("sentry.ratelimits.redis.time", return_value=1000.0):
+            assert self.backend.is_limited_multi([("foo", 1, 60), ("bar", 10, 60)]) == [
+                RateLimit(False, 0, 0, 60),
+                RateLimit(False, 9, 0, 6),
+            ]
+            assert self.backend.is_limited_multi([("foo", 1, 60), ("bar", 10, 60)]) == [
+                RateLimit(True, 0, 60, 60),
+                RateLimit(False, 8, 0, 12),
+            ]
+
+            # Keys that are known to be limited don't need a trip to Redis.
+            with mock.patch.object(self.backend.cluster, "execute_commands") as execute_commands:
+                assert self.backend.is_limited_multi([("foo", 1, 60)]) == [
+                    RateLimit(True, 0, 60, 60)
+                ]
+                assert not execute_commands.called
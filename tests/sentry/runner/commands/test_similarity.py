@@ -0,0 +1,75 @@
+from __future__ import absolute_import
+
+import os
+import shutil
+import tempfile
+
+from mock import patch
+
+from sentry.runner.commands.similarity import (
+    RateLimiter,
+    backfill,
+    read_checkpoint,
+    write_checkpoint,
+)
+from sentry.testutils import CliTestCase
+
+
+def test_rate_limiter():
+    now = [0.0]
+    delays = []
+
+    def sleep(delay):
+        delays.append(delay)
+        now[0] += delay
+
+    limiter = RateLimiter(10, clock=lambda: now[0], sleep=sleep)
+    limiter.acquire(5)
+    assert delays == [0.5]
+
+    # Time spent elsewhere counts towards the budget.
+    now[0] += 1.0
+    limiter.acquire(10)
+    assert delays == [0.5]
+
+    limiter.acquire(10)
+    assert delays == [0.5, 1.0]
+
+    unlimited = RateLimiter(0, clock=lambda: now[0], sleep=sleep)
+    unlimited.acquire(1000)
+    assert delays == [0.5, 1.0]
+
+
+def test_checkpoint():
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, "checkpoint")
+        assert read_checkpoint(None) is None
+        assert read_checkpoint(path) is None
+
+        write_checkpoint(path, 123)
+        assert read_checkpoint(path) == 123
+        assert os.listdir(directory) == ["checkpoint"]
+    finally:
+        shutil.rmtree(directory)
+
+
+class BackfillTest(CliTestCase):
+    command = backfill
+    default_args = ["--rate=0"]
+
+    @patch("sentry.similarity.features.record_many")
+    @patch("sentry.eventstore.get_events", return_value=[])
+    def test_feature_disabled(self, get_events, record_many):
+        enabled = self.create_group(project=self.create_project())
+        self.create_group(project=self.create_project())
+
+        with patch(
+            "sentry.features.has",
+            side_effect=lambda name, project, *args, **kwargs: project.id == enabled.project_id,
+        ):
+            rv = self.invoke()
+
+        assert rv.exit_code == 0, rv.output
+        assert get_events.call_count == 1
+        assert get_events.call_args[1]["filter"].group_ids == [enabled.id]
@@ -1,6 +1,7 @@
 from __future__ import absolute_import
 
 import abc
+import time
 
 
 class MinHashIndexBackendTestMixin(object):
@@ -174,6 +175,24 @@ class MinHashIndexBackendTestMixin(object):
         self.index.merge("example", "2", [("index", "1")])
         assert self.index.classify("example", [("index", 0, ["foo", "bar"])]) == [("2", [0.5])]
 
+    def test_record_many(self):
+        self.index.record_many(
+            "example",
+            [
+                ("1", [("index:a", ["foo", "bar"]), ("index:b", ["baz"])], None),
+                # Items can be recorded at different timestamps (this one is
+                # in the previous interval, but still within the retention.)
+                ("2", [("index:a", ["foo", "bar"])], int(time.time()) - self.index.interval),
+                ("3", [], None),
+            ],
+        )
+
+        assert self.index.classify("example", [("index:a", 0, ["foo", "bar"])]) == [
+            ("1", [1.0]),
+            ("2", [1.0]),
+        ]
+        assert self.index.classify("example", [("index:b", 0, ["baz"])]) == [("1", [1.0])]
+
     def test_flush_scoped(self):
         self.index.record("example", "1", [("index", ["foo", "bar"])])
         assert self.index.classify("example", [("index", 0, ["foo", "bar"])]) == [("1", [1.0])]
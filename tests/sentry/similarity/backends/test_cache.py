@@ -0,0 +1,81 @@
+from __future__ import absolute_import
+
+from django.core.cache import cache
+from mock import Mock, patch
+
+from sentry.similarity.backends.cache import CacheWrapper
+from sentry.testutils import TestCase
+
+
+class CacheWrapperTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.backend = Mock()
+        self.backend.compare.return_value = [("1", [1.0]), ("2", [0.5])]
+        self.index = CacheWrapper(self.backend, cache, hot_threshold=3)
+
+    def test_compare(self):
+        results = self.index.compare("example", "1", [("index", 0)], limit=10)
+        assert results == [("1", [1.0]), ("2", [0.5])]
+        assert self.index.compare("example", "1", [("index", 0)], limit=10) == results
+        assert self.backend.compare.call_count == 1
+
+        # Different requests are cached separately.
+        self.index.compare("example", "1", [("index", 0)])
+        self.index.compare("example", "2", [("index", 0)], limit=10)
+        assert self.backend.compare.call_count == 3
+
+        # Writes to keys that aren't part of any results don't invalidate
+        # anything.
+        self.index.record("example", "3", [("index", ["foo"])])
+        self.index.compare("example", "1", [("index", 0)], limit=10)
+        self.index.compare("example", "2", [("index", 0)], limit=10)
+        assert self.backend.compare.call_count == 3
+
+        # Writes invalidate the keys they touch, as well as the keys that
+        # include them in their results.
+        self.index.record("example", "2", [("index", ["foo"])])
+        self.index.compare("example", "1", [("index", 0)], limit=10)
+        assert self.backend.compare.call_count == 4
+        self.index.compare("example", "2", [("index", 0)], limit=10)
+        assert self.backend.compare.call_count == 5
+
+        self.index.merge("example", "3", [("index", "1")])
+        self.index.compare("example", "1", [("index", 0)], limit=10)
+        assert self.backend.compare.call_count == 6
+
+        self.index.delete("example", [("index", "1")])
+        self.index.compare("example", "1", [("index", 0)], limit=10)
+        assert self.backend.compare.call_count == 7
+
+    def test_record_uncompared(self):
+        index = CacheWrapper(self.backend, Mock(wraps=cache))
+        index.compare("example", "1", [("index", 0)])
+        index.cache.reset_mock()
+
+        # Writes to keys that aren't cached or part of any cached results
+        # only need to check the cache once.
+        index.record("example", "3", [("index", ["foo"])])
+        assert index.cache.get_many.call_count == 1
+        assert not index.cache.delete_many.called
+        assert not index.cache.set_many.called
+
+    @patch("sentry.tasks.similarity.refresh_similarity_cache.apply_async")
+    def test_hot_keys(self, apply_async):
+        for i in range(3):
+            self.index.compare("example", "1", [("index", 0)])
+        assert self.backend.compare.call_count == 1
+
+        self.backend.compare.return_value = [("1", [1.0])]
+        self.index.record("example", "1", [("index", ["foo"])])
+        self.index.record("example", "1", [("index", ["bar"])])
+
+        # Refreshes are debounced.
+        apply_async.assert_called_once_with(
+            kwargs={"scope": "example", "key": "1"}, countdown=self.index.refresh_delay
+        )
+
+        self.index.refresh("example", "1")
+        assert self.backend.compare.call_count == 2
+        assert self.index.compare("example", "1", [("index", 0)]) == [("1", [1.0])]
+        assert self.backend.compare.call_count == 2
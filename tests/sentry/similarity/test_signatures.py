@@ -3,6 +3,8 @@ from __future__ import absolute_import
 from collections import Counter
 from unittest import TestCase
 
+import mmh3
+
 from sentry.similarity.signatures import MinHashSignatureBuilder
 
 
@@ -30,3 +32,22 @@ class MinHashSignatureBuilderTestCase(TestCase):
         self.assertAlmostEqual(
             similarity, estimation, delta=0.1  # totally made up constant, seems reasonable
         )
+
+    def test_signatures_match_reference_implementation(self):
+        columns, rows = 16, 0xFFFF
+
+        def reference(features):
+            return [
+                min(mmh3.hash(feature, column) % rows for feature in features)
+                for column in range(columns)
+            ]
+
+        get_signature = MinHashSignatureBuilder(columns, rows)
+        for features in (
+            ["foo"],
+            ["foo", "bar", "foo", "baz", "foo"],
+            "the quick brown fox jumps over the lazy dog".split(),
+            [str(i) for i in range(1000)],
+        ):
+            assert get_signature(features) == reference(features)
+            assert get_signature(iter(features)) == reference(features)
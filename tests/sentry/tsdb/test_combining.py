@@ -0,0 +1,87 @@
+from __future__ import absolute_import
+
+import pytz
+
+from datetime import datetime, timedelta
+
+from sentry.testutils import TestCase
+from sentry.tsdb.base import TSDBModel, ONE_MINUTE, ONE_HOUR, ONE_DAY
+from sentry.tsdb.combining import CombiningRedisTSDB
+from sentry.utils.dates import to_timestamp
+
+
+class CombiningRedisTSDBTest(TestCase):
+    def setUp(self):
+        self.db = CombiningRedisTSDB(
+            rollups=(
+                # time in seconds, samples to keep
+                (10, 30),  # 5 minutes at 10 seconds
+                (ONE_MINUTE, 120),  # 2 hours at 1 minute
+                (ONE_HOUR, 24),  # 1 days at 1 hour
+                (ONE_DAY, 30),  # 30 days at 1 day
+            ),
+            vnodes=64,
+            enable_frequency_sketches=True,
+            hosts={i - 6: {"db": i} for i in range(6, 9)},
+            combine_interval=60,
+        )
+
+    def tearDown(self):
+        with self.db.cluster.all() as client:
+            client.flushdb()
+
+    def test_counters(self):
+        now = datetime.utcnow().replace(tzinfo=pytz.UTC) - timedelta(hours=4)
+        dts = [now + timedelta(hours=i) for i in range(4)]
+
+        def timestamp(d):
+            t = int(to_timestamp(d))
+            return t - (t % 3600)
+
+        self.db.incr(TSDBModel.project, 1, dts[0])
+        self.db.incr(TSDBModel.project, 1, dts[0], count=2)
+        self.db.incr_multi(
+            [(TSDBModel.project, 1), (TSDBModel.project, 2)], dts[3], count=3, environment_id=1
+        )
+
+        assert self.db.get_sums(TSDBModel.project, [1, 2], dts[0], dts[-1]) == {1: 0, 2: 0}
+
+        self.db.combiner.flush()
+
+        assert self.db.get_range(TSDBModel.project, [1], dts[0], dts[-1]) == {
+            1: [
+                (timestamp(dts[0]), 3),
+                (timestamp(dts[1]), 0),
+                (timestamp(dts[2]), 0),
+                (timestamp(dts[3]), 3),
+            ]
+        }
+        assert self.db.get_sums(TSDBModel.project, [1, 2], dts[0], dts[-1], environment_id=1) == {
+            1: 3,
+            2: 3,
+        }
+
+    def test_distinct_counts(self):
+        now = datetime.utcnow().replace(tzinfo=pytz.UTC) - timedelta(hours=4)
+
+        self.db.record(TSDBModel.users_affected_by_group, 1, ("foo", "bar"), now)
+        self.db.record(TSDBModel.users_affected_by_group, 1, ("bar", "baz"), now)
+        self.db.combiner.flush()
+
+        assert self.db.get_distinct_counts_totals(
+            TSDBModel.users_affected_by_group, [1], now, now + timedelta(hours=1)
+        ) == {1: 3}
+
+    def test_frequencies(self):
+        now = datetime.utcnow().replace(tzinfo=pytz.UTC) - timedelta(hours=4)
+        model = TSDBModel.frequent_issues_by_project
+
+        self.db.record_frequency_multi([(model, {"organization:1": {"project:1": 1}})], now)
+        self.db.record_frequency_multi(
+            [(model, {"organization:1": {"project:1": 2, "project:2": 1}})], now
+        )
+        self.db.combiner.flush()
+
+        assert self.db.get_most_frequent(
+            model, ["organization:1"], now, now + timedelta(hours=1)
+        ) == {"organization:1": [("project:1", 3.0), ("project:2", 1.0)]}
@@ -178,6 +178,58 @@ class RedisTSDBTest(TestCase):
         results = self.db.get_sums(TSDBModel.project, [1, 2], dts[0], dts[-1], environment_id=1)
         assert results == {1: 0, 2: 0}
 
+    def test_get_range_multi(self):
+        now = datetime.utcnow().replace(tzinfo=pytz.UTC) - timedelta(hours=4)
+        dts = [now + timedelta(hours=i) for i in range(4)]
+
+        def timestamp(d):
+            t = int(to_timestamp(d))
+            return t - (t % 3600)
+
+        self.db.incr(TSDBModel.project_total_received, 1, dts[0], count=5)
+        self.db.incr(TSDBModel.project_total_received, 2, dts[2])
+        self.db.incr(TSDBModel.project_total_rejected, 1, dts[1], count=2)
+
+        results = self.db.get_range_multi(
+            [
+                (TSDBModel.project_total_received, [1, 2]),
+                (TSDBModel.project_total_rejected, [1]),
+                (TSDBModel.project_total_blacklisted, [1]),
+            ],
+            dts[0],
+            dts[-1],
+        )
+        assert results == {
+            TSDBModel.project_total_received: {
+                1: [(timestamp(dts[0]), 5)] + [(timestamp(dts[i]), 0) for i in range(1, 4)],
+                2: [
+                    (timestamp(dts[0]), 0),
+                    (timestamp(dts[1]), 0),
+                    (timestamp(dts[2]), 1),
+                    (timestamp(dts[3]), 0),
+                ],
+            },
+            TSDBModel.project_total_rejected: {
+                1: [
+                    (timestamp(dts[0]), 0),
+                    (timestamp(dts[1]), 2),
+                    (timestamp(dts[2]), 0),
+                    (timestamp(dts[3]), 0),
+                ]
+            },
+            TSDBModel.project_total_blacklisted: {1: [(timestamp(dts[i]), 0) for i in range(4)]},
+        }
+
+        results = self.db.get_sums_multi(
+            [(TSDBModel.project_total_received, [1, 2]), (TSDBModel.project_total_rejected, [1])],
+            dts[0],
+            dts[-1],
+        )
+        assert results == {
+            TSDBModel.project_total_received: {1: 5, 2: 1},
+            TSDBModel.project_total_rejected: {1: 2},
+        }
+
     def test_count_distinct(self):
         now = datetime.utcnow().replace(tzinfo=pytz.UTC) - timedelta(hours=4)
         dts = [now + timedelta(hours=i) for i in range(4)]
@@ -585,6 +637,53 @@ class RedisTSDBTest(TestCase):
             model, ("organization:1", "organization:2"), now, environment_id=1
         ) == {"organization:1": [], "organization:2": []}
 
+    def test_space_saving_frequency_tables(self):
+        model = TSDBModel.frequent_issues_by_project
+        self.db.frequency_tables[model] = self.db.make_frequency_table(
+            implementation="spacesaving", capacity=3
+        )
+
+        now = datetime.utcnow().replace(tzinfo=pytz.UTC)
+        rollup = 3600
+
+        self.db.record_frequency_multi(
+            ((model, {"organization:1": {"project:1": 1, "project:2": 2, "project:3": 3}}),), now
+        )
+
+        assert self.db.get_most_frequent(model, ("organization:1",), now, rollup=rollup) == {
+            "organization:1": [("project:3", 3.0), ("project:2", 2.0), ("project:1", 1.0)]
+        }
+
+        # The summary is full, so the new item replaces the lowest scoring
+        # item and inherits its score. (Ties are ranked in reverse
+        # lexicographical order, like ``ZREVRANGE``.)
+        self.db.record_frequency_multi(((model, {"organization:1": {"project:4": 1}}),), now)
+
+        assert self.db.get_most_frequent(model, ("organization:1",), now, rollup=rollup) == {
+            "organization:1": [("project:3", 3.0), ("project:4", 2.0), ("project:2", 2.0)]
+        }
+
+        assert self.db.get_frequency_totals(
+            model, {"organization:1": ("project:1", "project:3")}, now, rollup=rollup
+        ) == {"organization:1": {"project:1": 0.0, "project:3": 3.0}}
+
+        self.db.record_frequency_multi(
+            ((model, {"organization:1": {"project:1": 5}}),), now - timedelta(hours=1)
+        )
+
+        assert self.db.get_most_frequent(
+            model, ("organization:1",), now - timedelta(hours=1), now, rollup=rollup, limit=2
+        ) == {"organization:1": [("project:1", 5.0), ("project:3", 3.0)]}
+
+        self.db.merge_frequencies(model, "organization:2", ["organization:1"], now)
+
+        assert self.db.get_most_frequent(
+            model, ("organization:1", "organization:2"), now, rollup=rollup
+        ) == {
+            "organization:1": [],
+            "organization:2": [("project:3", 3.0), ("project:4", 2.0), ("project:2", 2.0)],
+        }
+
     def test_frequency_table_import_export_no_estimators(self):
         client = self.db.cluster.get_local_client_for_key("key")
 
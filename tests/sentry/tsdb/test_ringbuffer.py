@@ -0,0 +1,221 @@
+from __future__ import absolute_import
+
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+import pytz
+from mock import patch
+
+from sentry.testutils import TestCase
+from sentry.tsdb.base import TSDBModel, ONE_MINUTE, ONE_HOUR, ONE_DAY
+from sentry.tsdb.ringbuffer import CounterRing, FrequencyRing, RingBufferTSDB
+from sentry.utils.dates import to_timestamp
+
+
+def test_counter_ring():
+    ring = CounterRing(5)
+    for bucket in range(10, 17):
+        ring.incr(bucket, bucket)
+
+    # Buckets 10 and 11 have been overwritten by 15 and 16.
+    assert ring.get(10) == 0
+    assert ring.get(16) == 16
+    assert ring.get_range(10, 7) == [0, 0, 12, 13, 14, 15, 16]
+    assert ring.get_range(14, 4) == [14, 15, 16, 0]
+
+    # Writes to buckets that have already been overwritten are dropped.
+    ring.incr(11, 1)
+    assert ring.get(11) == 0
+    assert ring.get(16) == 16
+
+    ring.discard(16)
+    assert ring.get_range(15, 2) == [15, 0]
+
+
+def test_frequency_ring():
+    ring = FrequencyRing(5, members=2, member_length=8)
+    ring.update(10, {"a": 1.0, "b": 2.0})
+    assert ring.get(10) == {"a": 1.0, "b": 2.0}
+
+    # The lowest scoring member is replaced, keeping its score.
+    ring.update(10, {"c": 1.0})
+    assert ring.get(10) == {"b": 2.0, "c": 2.0}
+
+    # Members that don't fit aren't recorded.
+    ring.update(10, {"b": 1.0, "too long for the ring": 5.0})
+    assert ring.get(10) == {"b": 3.0, "c": 2.0}
+
+
+class RingBufferTSDBTest(TestCase):
+    rollups = (
+        # time in seconds, samples to keep
+        (10, 30),  # 5 minutes at 10 seconds
+        (ONE_MINUTE, 120),  # 2 hours at 1 minute
+        (ONE_HOUR, 24),  # 1 days at 1 hour
+        (ONE_DAY, 30),  # 30 days at 1 day
+    )
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, "tsdb")
+        self.db = self.create_backend()
+
+    def create_backend(self, **options):
+        options.setdefault("rollups", self.rollups)
+        db = RingBufferTSDB(path=self.path, **options)
+        self.addCleanup(db.close)
+        return db
+
+    def test_simple(self):
+        now = datetime.utcnow().replace(tzinfo=pytz.UTC) - timedelta(hours=4)
+        dts = [now + timedelta(hours=i) for i in range(4)]
+
+        def timestamp(d):
+            t = int(to_timestamp(d))
+            return t - (t % 3600)
+
+        self.db.incr(TSDBModel.project, 1, dts[0])
+        self.db.incr(TSDBModel.project, 1, dts[1], count=2)
+        self.db.incr(TSDBModel.project, 1, dts[1], environment_id=1)
+        self.db.incr(TSDBModel.project, 1, dts[2])
+        self.db.incr_multi(
+            [(TSDBModel.project, 1), (TSDBModel.project, 2)], dts[3], count=3, environment_id=1
+        )
+
+        assert self.db.get_range(TSDBModel.project, [1, 2], dts[0], dts[-1]) == {
+            1: [
+                (timestamp(dts[0]), 1),
+                (timestamp(dts[1]), 3),
+                (timestamp(dts[2]), 1),
+                (timestamp(dts[3]), 3),
+            ],
+            2: [
+                (timestamp(dts[0]), 0),
+                (timestamp(dts[1]), 0),
+                (timestamp(dts[2]), 0),
+                (timestamp(dts[3]), 3),
+            ],
+        }
+
+        assert self.db.get_range(TSDBModel.project, [1], dts[0], dts[-1], environment_ids=[1]) == {
+            1: [
+                (timestamp(dts[0]), 0),
+                (timestamp(dts[1]), 1),
+                (timestamp(dts[2]), 0),
+                (timestamp(dts[3]), 3),
+            ]
+        }
+
+        assert self.db.get_sums(TSDBModel.project, [1, 2], dts[0], dts[-1]) == {1: 8, 2: 3}
+
+        self.db.merge(TSDBModel.project, 1, [2], now)
+        assert self.db.get_sums(TSDBModel.project, [1, 2], dts[0], dts[-1]) == {1: 11, 2: 0}
+
+        self.db.delete([TSDBModel.project], [1], dts[0], dts[-1])
+        assert self.db.get_sums(TSDBModel.project, [1], dts[0], dts[-1]) == {1: 0}
+
+    def test_distinct_counts(self):
+        now = datetime.utcnow().replace(tzinfo=pytz.UTC) - timedelta(hours=4)
+        dts = [now + timedelta(hours=i) for i in range(4)]
+
+        model = TSDBModel.users_affected_by_group
+
+        self.db.record(model, 1, ("foo", "bar"), dts[0])
+        self.db.record(model, 1, ("baz",), dts[1], environment_id=1)
+        self.db.record_multi(((model, 1, ("foo", "bar")), (model, 2, ("bar",))), dts[2])
+        self.db.record(model, 1, ("baz",), dts[3])
+
+        assert self.db.get_distinct_counts_series(model, [1], dts[0], dts[-1], rollup=3600) == {
+            1: [
+                (int(to_timestamp(dts[0])) // 3600 * 3600, 2),
+                (int(to_timestamp(dts[1])) // 3600 * 3600, 1),
+                (int(to_timestamp(dts[2])) // 3600 * 3600, 2),
+                (int(to_timestamp(dts[3])) // 3600 * 3600, 1),
+            ]
+        }
+        assert self.db.get_distinct_counts_totals(model, [1, 2], dts[0], dts[-1]) == {1: 3, 2: 1}
+        assert self.db.get_distinct_counts_totals(
+            model, [1], dts[0], dts[-1], environment_id=1
+        ) == {1: 1}
+        assert self.db.get_distinct_counts_union(model, [1, 2], dts[0], dts[-1]) == 3
+
+        self.db.merge_distinct_counts(model, 1, [2], now)
+        assert self.db.get_distinct_counts_totals(model, [1, 2], dts[0], dts[-1]) == {1: 3, 2: 0}
+
+        self.db.delete_distinct_counts([model], [1], dts[0], dts[-1])
+        assert self.db.get_distinct_counts_totals(model, [1], dts[0], dts[-1]) == {1: 0}
+
+    def test_frequency_tables(self):
+        now = datetime.utcnow().replace(tzinfo=pytz.UTC)
+        model = TSDBModel.frequent_issues_by_project
+
+        self.db.record_frequency_multi(
+            ((model, {"organization:1": {"project:1": 1, "project:2": 2, "project:3": 3}}),),
+            now - timedelta(hours=1),
+        )
+        self.db.record_frequency_multi(
+            ((model, {"organization:1": {"project:1": 1, "project:2": 2}}),), now
+        )
+
+        assert self.db.get_most_frequent(
+            model, ("organization:1",), now - timedelta(hours=1), now, rollup=ONE_HOUR
+        ) == {"organization:1": [("project:2", 4.0), ("project:3", 3.0), ("project:1", 2.0)]}
+
+        assert self.db.get_frequency_totals(
+            model, {"organization:1": ("project:1", "project:4")}, now, now, rollup=ONE_HOUR
+        ) == {"organization:1": {"project:1": 1.0, "project:4": 0.0}}
+
+        self.db.merge_frequencies(model, "organization:2", ["organization:1"], now)
+        assert self.db.get_frequency_totals(
+            model,
+            {"organization:1": ("project:1",), "organization:2": ("project:1",)},
+            now - timedelta(hours=1),
+            now,
+            rollup=ONE_HOUR,
+        ) == {"organization:1": {"project:1": 0.0}, "organization:2": {"project:1": 2.0}}
+
+        self.db.delete_frequencies([model], ["organization:2"], now - timedelta(hours=1), now)
+        assert self.db.get_most_frequent(
+            model, ("organization:2",), now - timedelta(hours=1), now, rollup=ONE_HOUR
+        ) == {"organization:2": []}
+
+    def test_shared(self):
+        now = datetime.utcnow().replace(tzinfo=pytz.UTC)
+
+        # Backends using the same path (e.g. in other processes) share data.
+        other = self.create_backend()
+        self.db.incr(TSDBModel.project, 1, now, count=5)
+        other.incr(TSDBModel.project, 1, now)
+        assert other.get_sums(TSDBModel.project, [1], now, now) == {1: 6}
+
+        # The data persists after the file is closed.
+        self.db.close()
+        other.close()
+        assert self.create_backend().get_sums(TSDBModel.project, [1], now, now) == {1: 6}
+
+        # Data written with a different configuration is discarded.
+        mismatched = self.create_backend(rollups=((ONE_HOUR, 24),))
+        assert mismatched.get_sums(TSDBModel.project, [1], now, now) == {1: 0}
+
+    def test_capacity(self):
+        now = datetime.utcnow().replace(tzinfo=pytz.UTC)
+        db = self.create_backend(max_counters=2)
+
+        # Writes are dropped when all records are in use.
+        db.incr(TSDBModel.project, 1, now)
+        db.incr(TSDBModel.project, 2, now)
+        db.incr(TSDBModel.project, 3, now)
+        assert db.get_sums(TSDBModel.project, [1, 2, 3], now, now) == {1: 1, 2: 1, 3: 0}
+
+        # Records are released when they're merged into another key.
+        db.merge(TSDBModel.project, 1, [2], now)
+        db.incr(TSDBModel.project, 3, now)
+        assert db.get_sums(TSDBModel.project, [1, 2, 3], now, now) == {1: 2, 2: 0, 3: 1}
+
+        # Records are reused once they only hold expired data.
+        with patch("time.time", return_value=to_timestamp(now) + ONE_DAY * 31):
+            db.incr(TSDBModel.project, 4, now)
+        assert db.get_sums(TSDBModel.project, [4], now, now) == {4: 1}
@@ -51,3 +51,34 @@ class RedisLockBackendTestCase(TestCase):
 
         with pytest.raises(Exception):
             self.backend.acquire(key, duration)
+
+    def test_fencing_tokens(self):
+        first = self.backend.acquire("lock", 60)
+        self.backend.release("lock")
+        second = self.backend.acquire("lock", 60)
+        assert second > first
+
+    def test_acquire_many(self):
+        keys = ["a", "b", "c"]
+        token = self.backend.acquire_many(keys, 60)
+        assert token is not None
+        for key in keys:
+            client = self.backend.get_client(key)
+            assert client.get(self.backend.prefix_key(key)) == self.backend.uuid.encode("utf-8")
+
+        self.backend.release_many(keys)
+        for key in keys:
+            assert self.backend.get_client(key).exists(self.backend.prefix_key(key)) is False
+
+    def test_acquire_many_is_all_or_nothing(self):
+        other = RedisLockBackend(self.cluster)
+        other.acquire("b", 60)
+
+        with pytest.raises(Exception):
+            self.backend.acquire_many(["a", "b", "c"], 60)
+
+        for key in ["a", "c"]:
+            assert self.backend.get_client(key).exists(self.backend.prefix_key(key)) is False
+
+        other.release("b")
+        self.backend.acquire_many(["a", "b", "c"], 60)
@@ -6,7 +6,7 @@ import pytest
 from sentry.testutils import TestCase
 from sentry.utils.locking import UnableToAcquireLock
 from sentry.utils.locking.backends import LockBackend
-from sentry.utils.locking.lock import Lock
+from sentry.utils.locking.lock import Lock, MultiLock
 
 
 class LockTestCase(TestCase):
@@ -40,3 +40,34 @@ class LockTestCase(TestCase):
             backend.acquire.assert_called_once_with(key, duration, routing_key)
 
         backend.release.assert_called_once_with(key, routing_key)
+
+    @mock.patch("sentry.utils.locking.lock.metrics")
+    def test_metrics(self, metrics):
+        backend = mock.Mock(spec=LockBackend)
+        backend.acquire.side_effect = [Exception("Boom!"), 1]
+
+        lock = Lock(backend, "fileblob:upload:abc", 60)
+        assert lock.name == "fileblob"
+
+        with pytest.raises(UnableToAcquireLock):
+            lock.acquire()
+        metrics.incr.assert_called_once_with("locks.contended", tags={"name": "fileblob"})
+
+        with lock.acquire():
+            assert lock.token == 1
+
+        timings = {call[0][0]: call[0][1] for call in metrics.timing.call_args_list}
+        assert timings["locks.attempts"] == 2
+        assert timings["locks.wait_time"] >= 0
+        assert "locks.hold_time" in timings
+
+    def test_multi_lock(self):
+        backend = mock.Mock(spec=LockBackend)
+        backend.acquire_many.return_value = 5
+
+        lock = MultiLock(backend, ["b", "a", "b"], 60, name="example")
+        with lock.acquire():
+            backend.acquire_many.assert_called_once_with(["a", "b"], 60, None)
+            assert lock.token == 5
+
+        backend.release_many.assert_called_once_with(["a", "b"], None)
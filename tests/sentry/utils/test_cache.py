@@ -0,0 +1,34 @@
+from __future__ import absolute_import
+
+from sentry.utils.cache import LocalCache
+
+
+def test_local_cache():
+    cache = LocalCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    # "b" is the least recently used key, so it's evicted first.
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+    cache.delete("a")
+    assert cache.get("a") is None
+
+    cache.clear()
+    assert cache.get("c") is None
+
+
+def test_local_cache_ttl():
+    now = [1000.0]
+    cache = LocalCache(max_size=10, ttl=60, clock=lambda: now[0])
+    cache.set("a", 1)
+
+    now[0] += 59
+    assert cache.get("a") == 1
+
+    now[0] += 1
+    assert cache.get("a") is None
@@ -0,0 +1,47 @@
+from __future__ import absolute_import
+
+import mock
+
+from sentry.utils.combining import WriteCombiner, flush_all
+
+
+def merge(key, existing, value):
+    return existing + value
+
+
+def test_combines_writes():
+    apply = mock.Mock()
+    combiner = WriteCombiner(apply, merge, interval=60)
+
+    combiner.add("a", 1)
+    combiner.add("a", 2)
+    combiner.add("b", 5)
+    assert apply.call_count == 0
+
+    combiner.flush()
+    apply.assert_called_once_with({"a": 3, "b": 5})
+
+    # Nothing pending, nothing to apply.
+    combiner.flush()
+    assert apply.call_count == 1
+
+
+def test_flushes_at_max_size():
+    apply = mock.Mock()
+    combiner = WriteCombiner(apply, merge, interval=60, max_size=2)
+
+    combiner.add("a", 1)
+    combiner.add("a", 1)
+    assert apply.call_count == 0
+
+    combiner.add("b", 1)
+    apply.assert_called_once_with({"a": 2, "b": 1})
+
+
+def test_flush_all():
+    apply = mock.Mock()
+    combiner = WriteCombiner(apply, merge, interval=60)
+
+    combiner.add("a", 1)
+    flush_all()
+    apply.assert_called_once_with({"a": 1})
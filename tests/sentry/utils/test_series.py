@@ -0,0 +1,56 @@
+from __future__ import absolute_import
+
+import pytest
+
+from sentry.utils.series import Series
+
+
+def test_from_points():
+    series = Series.from_points([(10, 1), (20, 2), (30, 3), (40, 4)], 10, 10, 3)
+    assert series == Series(10, 10, [1, 2, 3])
+    assert series.points() == [(10, 1), (20, 2), (30, 3)]
+    assert series.total() == 6
+
+    with pytest.raises(ValueError):
+        Series.from_points([(10, 1), (30, 2)], 10, 10, 2)
+
+    with pytest.raises(ValueError):
+        Series.from_points([(10, 1)], 10, 10, 2)
+
+
+def test_zerofill():
+    series = Series.zerofill([(20, 2), (25, 9), (40, 4), (100, 1)], 10, 10, 4)
+    assert series.points() == [(10, 0), (20, 2), (30, 0), (40, 4)]
+
+
+def test_sum():
+    series = Series.sum(
+        [[(10, i), (20, i * 2), (30, i * 3)] for i in range(10)] + [[(10, 1), (20, 1)]], 10, 10, 2
+    )
+    assert series.points() == [(10, 46), (20, 91)]
+
+    assert Series.sum([], 10, 10, 2) == Series.zeros(10, 10, 2)
+
+    with pytest.raises(ValueError):
+        Series.sum([[(10, 1), (20, 1)], [(20, 1), (30, 1)]], 10, 10, 2)
+
+
+def test_arithmetic():
+    a = Series(10, 10, [5, 6, 7])
+    b = Series(10, 10, [1, 2, 3])
+
+    assert a + b == Series(10, 10, [6, 8, 10])
+    assert a - b == Series(10, 10, [4, 4, 4])
+    assert a.merge(b, lambda x, y: (x, y)) == [(5, 1), (6, 2), (7, 3)]
+
+    with pytest.raises(ValueError):
+        a + Series(20, 10, [1, 2, 3])
+
+
+def test_resample():
+    series = Series(20, 10, [1, 2, 3, 4, 5])
+    assert series.resample(30) == Series(0, 30, [1, 9, 5])
+    assert series.resample(10) == series
+
+    with pytest.raises(ValueError):
+        series.resample(15)
@@ -1,27 +1,44 @@
 from __future__ import absolute_import
 
-from datetime import datetime
-from mock import patch
+import threading
+from datetime import datetime, timedelta
+from mock import Mock, patch
 import pytest
 import pytz
 
 from sentry.models import GroupRelease, Release
 from sentry.testutils import TestCase, SnubaTestCase
 from sentry.testutils.helpers.datetime import iso_format, before_now
+from sentry.utils import json
 from sentry.utils.snuba import (
     _prepare_query_params,
+    get_query_cache_key,
     get_snuba_translators,
+    options_override,
+    prepare_query,
+    raw_query,
+    run_concurrently,
     zerofill,
     get_json_type,
     get_snuba_column_name,
     detect_dataset,
+    nest_groups,
     transform_aliases_and_query,
     Dataset,
+    SnubaError,
     SnubaQueryParams,
+    StreamingResponseDecoder,
+    UnexpectedResponseError,
     UnqualifiedQueryError,
+    _snuba_query,
 )
 
 
+def mock_response(status, body):
+    data = json.dumps(body).encode("utf-8")
+    return Mock(status=status, data=data, stream=lambda *args, **kwargs: iter([data]))
+
+
 class SnubaUtilsTest(TestCase):
     def setUp(self):
         self.now = datetime.utcnow().replace(
@@ -632,3 +649,176 @@ class PrepareQueryParamsTest(TestCase):
 
         with pytest.raises(UnqualifiedQueryError):
             _prepare_query_params(query_params)
+
+
+class QueryCacheTest(TestCase):
+    def setUp(self):
+        self.end = datetime(2019, 10, 1, 12, 0, 5)
+        self.start = self.end - timedelta(days=1)
+
+    def query(self, **kwargs):
+        return raw_query(
+            start=self.start,
+            end=self.end,
+            filter_keys={"project_id": [self.project.id]},
+            aggregations=[["count()", "", "count"]],
+            referrer="test",
+            **kwargs
+        )
+
+    @patch("sentry.utils.snuba._snuba_pool")
+    def test_cache(self, pool):
+        pool.urlopen.return_value = mock_response(200, {"data": [{"count": 1}], "meta": []})
+
+        with self.settings(SENTRY_SNUBA_CACHE_TTLS={"test": 60}):
+            assert self.query()["data"] == [{"count": 1}]
+            assert self.query()["data"] == [{"count": 1}]
+            assert pool.urlopen.call_count == 1
+
+            # Consistent queries are never served from the cache.
+            with options_override({"consistent": True}):
+                assert self.query()["data"] == [{"count": 1}]
+            assert pool.urlopen.call_count == 2
+
+        # Queries are only cached for the configured referrers.
+        assert self.query()["data"] == [{"count": 1}]
+        assert pool.urlopen.call_count == 3
+
+    @patch("sentry.utils.snuba._snuba_pool")
+    def test_errors_are_not_cached(self, pool):
+        pool.urlopen.return_value = mock_response(
+            500, {"error": {"type": "unknown", "message": "failed"}}
+        )
+
+        with self.settings(SENTRY_SNUBA_CACHE_TTLS={"test": 60}):
+            for _ in range(2):
+                with pytest.raises(SnubaError):
+                    self.query()
+            assert pool.urlopen.call_count == 2
+
+    def test_cache_key(self):
+        params = {
+            "from_date": "2019-10-01T12:00:05",
+            "to_date": "2019-10-02T12:00:05",
+            "conditions": [["a", "=", 1], ["b", "=", 2]],
+        }
+        key = get_query_cache_key(params, "test", 60)
+
+        # Time bounds are rounded and conditions are unordered.
+        assert key == get_query_cache_key(
+            dict(
+                params, from_date="2019-10-01T12:00:55", conditions=[["b", "=", 2], ["a", "=", 1]]
+            ),
+            "test",
+            60,
+        )
+        assert key != get_query_cache_key(dict(params, from_date="2019-10-01T12:01:05"), "test", 60)
+        assert key != get_query_cache_key(params, "other", 60)
+        assert key != get_query_cache_key(dict(params, consistent=True), "test", 60)
+
+
+class PrepareQueryTest(TestCase):
+    @patch("sentry.utils.snuba._snuba_pool")
+    def test_prepare_query(self, pool):
+        pool.urlopen.return_value = mock_response(
+            200,
+            {"data": [{"issue": 1, "count": 2}], "meta": [{"name": "issue"}, {"name": "count"}]},
+        )
+
+        run_query = prepare_query(
+            groupby=["issue"],
+            filter_keys={"project_id": [self.project.id]},
+            aggregations=[["count()", "", "count"]],
+            referrer="test",
+        )
+        # The query is only sent once the prepared query is run.
+        assert not pool.urlopen.called
+
+        future, = run_concurrently([run_query])
+        assert future.result() == {1: 2}
+        assert pool.urlopen.call_count == 1
+
+    def test_prepare_query_outside_retention(self):
+        end = datetime.utcnow() - timedelta(days=365)
+        with self.options({"system.event-retention-days": 90}):
+            run_query = prepare_query(
+                start=end - timedelta(days=1),
+                end=end,
+                filter_keys={"project_id": [self.project.id]},
+                totals=True,
+            )
+        assert run_query() == ({}, {})
+
+    def test_run_concurrently_timeout(self):
+        event = threading.Event()
+        try:
+            fast, slow = run_concurrently([lambda: 1, event.wait], timeout=0.1)
+            assert fast.result(timeout=0) == 1
+            assert not slow.done()
+        finally:
+            event.set()
+
+
+class SnubaQueryTest(TestCase):
+    @patch("sentry.utils.snuba._snuba_pool")
+    def test_connection_is_drained(self, pool):
+        chunks = [b'{"data": [], "meta": []}', b"\n"]
+        response = pool.urlopen.return_value = Mock(status=200)
+        response.stream.return_value = iter(chunks)
+
+        assert _snuba_query({}, {}) == {"data": [], "meta": []}
+        assert list(response.stream.return_value) == []
+        assert response.release_conn.called
+        assert not response.close.called
+
+    @patch("sentry.utils.snuba._snuba_pool")
+    def test_connection_is_closed_on_error(self, pool):
+        response = pool.urlopen.return_value = mock_response(200, {"data": [{"a": 1}]})
+
+        with pytest.raises(KeyError):
+            _snuba_query({}, {}, transform=lambda row: row["b"])
+        assert response.close.called
+        assert not response.release_conn.called
+
+
+class StreamingResponseDecoderTest(TestCase):
+    def decode(self, data, size, **kwargs):
+        return StreamingResponseDecoder(
+            [data[i : i + size] for i in range(0, len(data), size)], **kwargs
+        ).decode()
+
+    def test_decode(self):
+        body = {
+            "data": [{"count": 12345, "name": u"\u00fc\u20ac", "rate": -1.25e-3}, {"count": 0}],
+            "meta": [{"name": "count", "type": "UInt64"}],
+            "totals": 1.5,
+        }
+        data = json.dumps(body).encode("utf-8")
+
+        # Values (including numbers and multibyte characters) that are split
+        # across chunks are decoded correctly.
+        for size in range(1, len(data) + 1):
+            assert self.decode(data, size) == body
+
+    def test_transform(self):
+        data = b'{"data": [{"a": 1}, {"a": 2}], "meta": [{"name": "a"}]}'
+        assert self.decode(data, 4, transform=lambda row: row["a"]) == {
+            "data": [1, 2],
+            "meta": [{"name": "a"}],
+        }
+
+    def test_empty(self):
+        assert self.decode(b'{"data": [], "meta": []}', 3) == {"data": [], "meta": []}
+        assert self.decode(b"{}", 1) == {}
+
+    def test_invalid(self):
+        for data in [b"", b"[]", b'{"data": [{"a": 1},', b'{"data" []}', b'{"count": 12']:
+            with pytest.raises(UnexpectedResponseError):
+                self.decode(data, 4)
+
+
+class NestGroupsTest(TestCase):
+    def test_iterator(self):
+        data = [{"a": 1, "count": 2}, {"a": 2, "count": 3}]
+        assert nest_groups(iter(data), ["a"], ["count"]) == {1: 2, 2: 3}
+        assert nest_groups(iter([]), [], ["count"]) is None
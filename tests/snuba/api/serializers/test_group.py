@@ -3,6 +3,7 @@
 from __future__ import absolute_import
 
 import mock
+import pytest
 import six
 
 from datetime import timedelta
@@ -30,6 +31,7 @@ from sentry.models import (
 )
 from sentry.testutils import APITestCase, SnubaTestCase
 from sentry.testutils.helpers.datetime import iso_format, before_now
+from sentry.utils.snuba import SnubaError
 
 
 class GroupSerializerSnubaTest(APITestCase, SnubaTestCase):
@@ -347,6 +349,16 @@ class GroupSerializerSnubaTest(APITestCase, SnubaTestCase):
         assert iso_format(result["firstSeen"]) == iso_format(group_env.first_seen)
         assert result["count"] == "1"
 
+    def test_stats_errors(self):
+        def fail():
+            raise SnubaError("failed")
+
+        with mock.patch(
+            "sentry.tagstore.snuba.backend.SnubaTagStorage.prepare_groups_user_counts",
+            return_value=fail,
+        ), pytest.raises(SnubaError):
+            serialize(self.group, serializer=GroupSerializerSnuba())
+
 
 class StreamGroupSerializerTestCase(APITestCase, SnubaTestCase):
     def test_environment(self):
@@ -355,27 +367,76 @@ class StreamGroupSerializerTestCase(APITestCase, SnubaTestCase):
         environment = Environment.get_or_create(group.project, "production")
 
         with mock.patch(
-            "sentry.api.serializers.models.group.snuba_tsdb.get_range",
-            side_effect=snuba_tsdb.get_range,
-        ) as get_range:
+            "sentry.api.serializers.models.group.snuba_tsdb.prepare_range",
+            side_effect=snuba_tsdb.prepare_range,
+        ) as prepare_range:
             serialize(
                 [group],
                 serializer=StreamGroupSerializerSnuba(
                     environment_ids=[environment.id], stats_period="14d"
                 ),
             )
-            assert get_range.call_count == 1
-            for args, kwargs in get_range.call_args_list:
+            assert prepare_range.call_count == 1
+            for args, kwargs in prepare_range.call_args_list:
                 assert kwargs["environment_ids"] == [environment.id]
 
         with mock.patch(
-            "sentry.api.serializers.models.group.snuba_tsdb.get_range",
-            side_effect=snuba_tsdb.get_range,
-        ) as get_range:
+            "sentry.api.serializers.models.group.snuba_tsdb.prepare_range",
+            side_effect=snuba_tsdb.prepare_range,
+        ) as prepare_range:
             serialize(
                 [group],
                 serializer=StreamGroupSerializerSnuba(environment_ids=None, stats_period="14d"),
             )
-            assert get_range.call_count == 1
-            for args, kwargs in get_range.call_args_list:
+            assert prepare_range.call_count == 1
+            for args, kwargs in prepare_range.call_args_list:
                 assert kwargs["environment_ids"] is None
+
+    def test_stats_errors(self):
+        group = self.group
+        group.times_seen = 5
+        group.save()
+
+        def fail():
+            raise SnubaError("failed")
+
+        # Stats that can't be retrieved are reported as unavailable, rather
+        # than failing the whole response.
+        with mock.patch(
+            "sentry.api.serializers.models.group.snuba_tsdb.prepare_range", return_value=fail
+        ), mock.patch(
+            "sentry.tagstore.snuba.backend.SnubaTagStorage.prepare_groups_user_counts",
+            return_value=fail,
+        ):
+            result, = serialize([group], serializer=StreamGroupSerializerSnuba(stats_period="24h"))
+
+        assert result["count"] == "5"
+        assert result["userCount"] is None
+        assert result["stats"]["24h"] is None
+        assert result["statsUnavailable"] is True
+
+    def test_stats_errors_with_environment(self):
+        group = self.group
+        group.times_seen = 5
+        group.save()
+
+        environment = Environment.get_or_create(group.project, "production")
+
+        def fail():
+            raise SnubaError("failed")
+
+        # The issue fields cover all environments, so they aren't used in
+        # place of the values for the environment.
+        with mock.patch(
+            "sentry.tagstore.snuba.backend.SnubaTagStorage.prepare_group_seen_values_for_environments",
+            return_value=fail,
+        ):
+            result, = serialize(
+                [group], serializer=StreamGroupSerializerSnuba(environment_ids=[environment.id])
+            )
+
+        assert result["count"] is None
+        assert result["userCount"] == 0
+        assert result["firstSeen"] is None
+        assert result["lastSeen"] is None
+        assert result["statsUnavailable"] is True
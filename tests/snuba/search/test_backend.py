@@ -17,9 +17,10 @@ from sentry.models import (
     GroupStatus,
     GroupSubscription,
 )
-from sentry.search.snuba.backend import SnubaSearchBackend
+from sentry.search.snuba.backend import get_chunk_limit, get_search_cache_key, SnubaSearchBackend
 from sentry.testutils import SnubaTestCase, TestCase, xfail_if_not_postgres
 from sentry.testutils.helpers.datetime import iso_format
+from sentry.utils.cache import cache
 from sentry.utils.snuba import Dataset, SENTRY_SNUBA_MAP, SnubaError
 
 
@@ -959,6 +960,48 @@ class SnubaSearchTest(TestCase, SnubaTestCase):
         finally:
             options.set("snuba.search.max-pre-snuba-candidates", prev_max_pre)
 
+    def test_candidates_cache(self):
+        with self.options({"snuba.search.candidates-cache-ttl": 60}):
+            results = self.make_query(search_filter_query="is:unresolved foo")
+            assert set(results) == set([self.group1])
+
+            # The candidates from the first query are reused until they
+            # expire, so changes to the group aren't visible yet.
+            self.group1.update(status=GroupStatus.RESOLVED)
+            results = self.make_query(search_filter_query="is:unresolved foo")
+            assert set(results) == set([self.group1])
+
+            # Queries with different Postgres filters don't share candidates.
+            results = self.make_query(search_filter_query="is:resolved foo")
+            assert set(results) == set([self.group1])
+
+        results = self.make_query(search_filter_query="is:unresolved foo")
+        assert set(results) == set()
+
+    def test_post_filter_hit_ratio(self):
+        query = "is:unresolved server:example.com"
+        with self.options({"snuba.search.max-pre-snuba-candidates": 0}):
+            results = self.make_query(search_filter_query=query)
+            assert set(results) == set([self.group1])
+
+        # Both groups match in Snuba, but only one passes the post-filter.
+        search_filters = self.build_search_filter(query)
+        hit_ratio_cache_key = get_search_cache_key(
+            "hr", [self.project], None, search_filters, "date"
+        )
+        assert cache.get(hit_ratio_cache_key) == 0.5
+
+    def test_get_chunk_limit(self):
+        # Without a hit ratio, chunks grow at the configured rate.
+        assert get_chunk_limit(100, 1.5, 2000, 100) == 150
+        assert get_chunk_limit(1500, 1.5, 2000, 100) == 2000
+
+        # Otherwise, chunks are sized to contain the remaining results.
+        assert get_chunk_limit(100, 1.5, 2000, 100, hit_ratio=0.9) == 150
+        assert get_chunk_limit(100, 1.5, 2000, 100, hit_ratio=0.1) == 1250
+        assert get_chunk_limit(100, 1.5, 2000, 100, hit_ratio=0.01) == 2000
+        assert get_chunk_limit(100, 1.5, 2000, 100, hit_ratio=0) == 2000
+
     def test_optimizer_enabled(self):
         prev_optimizer_enabled = options.get("snuba.search.pre-snuba-candidates-optimizer")
         options.set("snuba.search.pre-snuba-candidates-optimizer", True)